@@ -0,0 +1,72 @@
+"""
+LogDietStrategy benchmark on a ~100 MB CI job log: colored build output with ``pip`` and
+``tqdm`` progress bars redrawn in place by carriage returns, and a colored traceback now
+and then.
+
+Reports how fast the log is cleaned of escape sequences and progress redraws, how much
+smaller it gets, and what the cleaning costs the error-first selection compared with an
+already clean log of the same lines.
+"""
+
+import sys
+
+from harness import char_heuristic, timed
+
+from context_diet.strategies.log_diet import LogDietStrategy, _clean_terminal
+
+
+def build_log(megabytes: int = 100, error_every: int = 20_000) -> str:
+    """Renders CI steps, each with a progress bar of 50 redraws, and a failing step now and then."""
+    parts = []
+    size = i = 0
+    while size < megabytes * 1_000_000:
+        stamp = f"2024-01-01T{i // 360_000 % 24:02d}:{i // 6000 % 60:02d}:{i // 100 % 60:02d}Z"
+        if i % error_every == error_every - 1:
+            part = (
+                f"{stamp} \x1b[31;1mERROR\x1b[0m step {i} failed\n"
+                "Traceback (most recent call last):\n"
+                f'  File "\x1b[35mci/run.py\x1b[0m", line {i % 300}, in step\n'
+                f"\x1b[31mRuntimeError: exit status {i % 7 + 1}\x1b[0m\n"
+            )
+        elif i % 3 == 0:
+            bar = "".join(
+                f"\r\x1b[K{p:3d}%|{'#' * (p // 10):<10}| {p * 41 // 100}/41 [00:{p % 60:02d}<00:12]"
+                for p in range(0, 101, 2)
+            )
+            part = f"{stamp} \x1b[32mDownloading\x1b[0m pkg-{i % 997}.whl{bar}\n"
+        else:
+            part = f"{stamp} \x1b]0;job {i}\x07\x1b[1mINFO\x1b[0m  \x1b[36m$ make target-{i % 89}\x1b[0m\n"
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    strategy = LogDietStrategy()
+    content = build_log(megabytes)
+    print(f"log: {len(content) / 1e6:.0f} MB")
+
+    cleaned = timed("clean escapes and progress redraws", lambda: _clean_terminal(content), 1)
+    print(f"{'cleaned size':<56} {len(cleaned) / len(content):10.1%}")
+    print(
+        f"{'cleaned tokens (len // 4)':<56} "
+        f"{char_heuristic(cleaned) / char_heuristic(content):10.1%}"
+    )
+
+    raw = timed(
+        "errors mode on the CI log",
+        lambda: strategy.compress(content, 4000, char_heuristic),
+        1,
+    )
+    clean = timed(
+        "errors mode on the cleaned log",
+        lambda: strategy.compress(cleaned, 4000, char_heuristic),
+        1,
+    )
+    assert raw == clean
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+JsonLogDietStrategy benchmark on a ~100 MB JSON Lines service log with occasional error
+records.
+
+Compares the JSON log strategy against the plain log strategy on the same input, and
+against decoding every line with ``json.loads``, which is what the prefilter avoids once
+regular records have filled the budget.
+"""
+
+import json
+import sys
+
+from harness import char_heuristic, timed
+
+from context_diet.strategies.json_log_diet import JsonLogDietStrategy
+from context_diet.strategies.log_diet import LogDietStrategy
+
+
+def build_log(megabytes: int = 100, error_every: int = 5_000) -> str:
+    """Renders request records with an error record every ``error_every`` lines."""
+    parts = []
+    size = i = 0
+    while size < megabytes * 1_000_000:
+        record = {
+            "timestamp": f"2024-01-01T{i // 3_600_000 % 24:02d}:{i // 60_000 % 60:02d}:{i // 1000 % 60:02d}Z",
+            "level": "info",
+            "message": f"GET /api/items/{i % 9973} 200",
+            "duration_ms": i % 97,
+            "request_id": f"{i:012x}",
+            "client": {"ip": f"10.0.{i % 256}.{i % 199}", "agent": "python-requests/2.31"},
+        }
+        if i % error_every == error_every - 1:
+            record["level"] = "error"
+            record["message"] = f"request {i} failed"
+            record["exception"] = (
+                f"Traceback (most recent call last):\nValueError: invalid payload {i}"
+            )
+        part = json.dumps(record) + "\n"
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def decode_all(content: str) -> int:
+    return sum(1 for line in content.splitlines() if json.loads(line))
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    content = build_log(megabytes)
+    print(f"log: {len(content) / 1e6:.0f} MB, {content.count(chr(10))} records")
+
+    timed("baseline: json.loads every line", lambda: decode_all(content), 1)
+    for budget in (4_000, 100_000):
+        plain = timed(
+            f"log strategy: compress(budget={budget})",
+            lambda budget=budget: LogDietStrategy().compress(content, budget, char_heuristic),
+            1,
+        )
+        projected = timed(
+            f"jsonl strategy: compress(budget={budget})",
+            lambda budget=budget: JsonLogDietStrategy().compress(content, budget, char_heuristic),
+            1,
+        )
+        plain_errors = plain.count('"level": "error"')
+        print(
+            f"  records kept: log {plain.count(chr(10)) + 1} ({plain_errors} errors), "
+            f"jsonl {projected.count('Z info ') + projected.count('Z error ')} "
+            f"({projected.count('Z error ')} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
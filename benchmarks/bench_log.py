@@ -0,0 +1,139 @@
+"""
+LogDietStrategy benchmark on a ~100 MB service log of single-line requests with
+occasional multi-line tracebacks.
+
+Compares the error-first mode against the original implementation (split the whole log,
+classify every block with ``re.search``, count every block, grow the output with ``+=``),
+both when errors are rare, so every block has to be classified, and when they are
+frequent enough that the error blocks overflow the budget early. The rare-error log is
+then selected serially and with worker processes, in the error-first and template modes,
+and mined into templates again with a UUID request id on every line. Each of those lines
+misses the shape cache until its id is masked, but should still cost a small multiple of
+a numeric one rather than become a line shape of its own.
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+
+from harness import char_heuristic, timed
+
+from context_diet.strategies.log_diet import LogDietStrategy
+
+
+def build_log(megabytes: int = 100, error_every: int = 50_000, request_ids: bool = False) -> str:
+    """
+    Renders request lines with a traceback block every ``error_every`` lines, each tagged
+    with a random-looking UUID if ``request_ids``.
+    """
+    parts = []
+    size = i = 0
+    while size < megabytes * 1_000_000:
+        stamp = f"2024-01-01 {i // 3_600_000 % 24:02d}:{i // 60_000 % 60:02d}:{i // 1000 % 60:02d}"
+        if i % error_every == error_every - 1:
+            part = (
+                f"{stamp} ERROR request {i} failed\n"
+                "Traceback (most recent call last):\n"
+                f'  File "app/handlers.py", line {i % 500}, in handle\n'
+                f"ValueError: invalid payload for request {i}\n"
+            )
+        else:
+            part = f"{stamp} INFO GET /api/items/{i % 9973} 200 in {i % 97}ms from 10.0.{i % 256}.{i % 199}\n"
+            if request_ids:
+                request_id = uuid.UUID(int=i * 0x9E3779B97F4A7C15 % (1 << 128))
+                part = f"{part[:-1]} request_id={request_id}\n"
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def legacy_compress(content: str, budget: int) -> str:
+    """The error-first selection as first written, before streaming."""
+    content = content.encode("utf-8", errors="ignore").decode("utf-8")
+    if char_heuristic(content) <= budget:
+        return content
+    split_pattern = re.compile(
+        r"\n(?=\d{2,4}[-/]\d{2}[-/]\d{2}|\[?\d{4}-\d{2}-\d{2}|(?:INFO|ERROR|WARN|DEBUG|CRITICAL)\b|\[)",
+        re.IGNORECASE,
+    )
+    high_value_blocks = []
+    regular_blocks = []
+    for block in split_pattern.split(content):
+        if re.search(r"(Traceback \(most recent call last\):|Error:|Exception:|[Ff]atal)", block):
+            high_value_blocks.append(block)
+        else:
+            regular_blocks.append(block)
+    output = ""
+    tokens_used = 0
+    for block in high_value_blocks + regular_blocks:
+        item_tokens = char_heuristic(block) + 1
+        if tokens_used + item_tokens > budget:
+            break
+        output += block + "\n"
+        tokens_used += item_tokens
+    return output.strip()
+
+
+def compare(strategy: LogDietStrategy, megabytes: int, label: str, error_every: int) -> None:
+    content = build_log(megabytes, error_every)
+    print(f"log: {len(content) / 1e6:.0f} MB, {label} (1 in {error_every} blocks)")
+    legacy = timed("legacy: split + re.search + +=", lambda: legacy_compress(content, 4000), 1)
+    current = timed(
+        "errors mode: compress(budget=4000)",
+        lambda: strategy.compress(content, 4000, char_heuristic),
+        1,
+    )
+    assert current == legacy
+
+
+def parallel(strategy: LogDietStrategy, megabytes: int) -> None:
+    content = build_log(megabytes)
+    workers = max(os.cpu_count() or 1, 2)
+    print(f"log: {len(content) / 1e6:.0f} MB, {os.cpu_count() or 1} CPUs")
+    for mode in ("errors", "templates"):
+        serial = timed(
+            f"{mode} mode, serial",
+            lambda mode=mode: strategy.compress(content, 4000, char_heuristic, mode=mode),
+            1,
+        )
+        pooled = timed(
+            f"{mode} mode, workers={workers}",
+            lambda mode=mode: strategy.compress(
+                content, 4000, char_heuristic, mode=mode, workers=workers
+            ),
+            1,
+        )
+        assert pooled == serial
+
+
+def opaque_ids(strategy: LogDietStrategy, megabytes: int) -> None:
+    for request_ids in (False, True):
+        content = build_log(megabytes, request_ids=request_ids)
+        lines = content.count("\n")
+        label = "UUID" if request_ids else "numeric"
+        print(f"log: {len(content) / 1e6:.0f} MB, {lines} lines, {label} request ids")
+        start = time.perf_counter()
+        timed(
+            "templates mode, serial",
+            lambda content=content: strategy.compress(
+                content, 4000, char_heuristic, mode="templates"
+            ),
+            1,
+        )
+        print(f"{'lines per second':<56} {lines / (time.perf_counter() - start):10.0f}")
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    strategy = LogDietStrategy()
+    compare(strategy, megabytes, "rare errors", 50_000)
+    compare(strategy, megabytes, "frequent errors", 500)
+    parallel(strategy, megabytes)
+    opaque_ids(strategy, megabytes)
+
+
+if __name__ == "__main__":
+    main()
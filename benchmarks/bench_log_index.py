@@ -0,0 +1,56 @@
+"""
+LogDietStrategy benchmark of the sidecar block index on a ~100 MB service log (see
+``bench_log.build_log``) written to a temporary file.
+
+Times error-first selection and a window over the last few minutes, streamed and through
+the index: when the index is built, once it is up to date, and after lines are appended
+to the log, when only the new blocks are indexed.
+"""
+
+import os
+import sys
+import tempfile
+
+from bench_log import build_log
+from harness import char_heuristic, timed
+
+from context_diet.strategies.log_diet import LogDietStrategy
+from context_diet.strategies.log_index import INDEX_SUFFIX
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    strategy = LogDietStrategy()
+    content = build_log(megabytes)
+    window = {"mode": "window", "since": "2024-01-01T00:15:00"}
+
+    def distill(index: bool, **kwargs: str) -> str:
+        with open(path, "rb") as handle:
+            if index:
+                return strategy.compress_file(handle, 4000, char_heuristic, index=True, **kwargs)
+            return strategy.compress_file(handle, 4000, char_heuristic, **kwargs)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "service.log")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+        print(f"log: {len(content) / 1e6:.0f} MB")
+
+        streamed = timed("errors mode, streamed", lambda: distill(False), 1)
+        built = timed("errors mode, building the index", lambda: distill(True), 1)
+        print(f"{'index size':<56} {os.path.getsize(path + INDEX_SUFFIX) / 1e6:7.1f} MB")
+        indexed = timed("errors mode, indexed", lambda: distill(True))
+        assert streamed == built == indexed
+
+        streamed = timed("window mode (since 00:15), streamed", lambda: distill(False, **window))
+        indexed = timed("window mode (since 00:15), indexed", lambda: distill(True, **window))
+        assert streamed == indexed
+
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(build_log(max(megabytes // 100, 1)))
+        timed("errors mode, indexing 1% appended", lambda: distill(True), 1)
+        assert distill(True) == distill(False)
+
+
+if __name__ == "__main__":
+    main()
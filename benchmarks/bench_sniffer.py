@@ -0,0 +1,112 @@
+"""
+Content sniffer benchmark: detection accuracy on a labelled corpus of everyday samples
+(see ``sniffer_corpus``), and detection latency on inputs from 1 MB to 1 GB.
+
+Accuracy is measured for the scored sniffer, counting the samples whose right strategy
+comes first and those where it comes first or second (``distill`` falls back on the
+second when the first raises), and for the ordered chain of checks it replaced. Latency
+is timed on plain text that matches no signature and on a service log, sniffing the head
+alone and the head, middle and tail; it should not grow with the size of the input.
+"""
+
+import json
+import re
+import sys
+import time
+from collections import Counter
+from functools import partial
+
+from harness import timed
+from sniffer_corpus import build_corpus
+
+from context_diet.sniffer import SNIFFED_STRATEGIES, detect_strategy, rank_strategies
+
+# The roadmap's goal for automated detection
+TARGET_ACCURACY = 0.95
+
+_PROSE = "The quick brown fox jumps over the lazy dog, again and again and again.\n"
+_LOG = "2024-01-01 00:00:00 INFO request served in 12 ms\n"
+
+
+def chained_detect(content: str) -> str:
+    """The previous sniffer: the first of an ordered chain of checks that matches."""
+    stripped = content.lstrip()
+    if not stripped:
+        return "text"
+    if stripped.startswith("{"):
+        lines = stripped.split("\n", 2)[:2]
+        try:
+            if len(lines) == 2 and all(isinstance(json.loads(line), dict) for line in lines):
+                return "jsonl"
+        except ValueError:
+            pass
+    if stripped.startswith(("{", "[")):
+        return "json"
+    if re.search(r"^(import |from .* import |def |class )", content, flags=re.MULTILINE):
+        return "python"
+    if re.match(r"(SELECT|INSERT|UPDATE|DELETE|CREATE TABLE|ALTER TABLE)\b", stripped, re.I):
+        return "sql"
+    if re.search(
+        r"^\s*(?:\d{2,4}[-/]\d{2}[-/]\d{2}|\[?\d{4}-\d{2}-\d{2}|INFO|ERROR|WARN|DEBUG|CRITICAL|Traceback)\b",
+        stripped,
+        flags=re.IGNORECASE | re.MULTILINE,
+    ):
+        return "log"
+    if re.search(r"^[\w-]+:", stripped, flags=re.MULTILINE):
+        return "yaml"
+    return "text"
+
+
+def accuracy() -> None:
+    corpus = build_corpus()
+    totals = Counter(expected for expected, _ in corpus)
+    first: Counter[str] = Counter()
+    second: Counter[str] = Counter()
+    chained: Counter[str] = Counter()
+    elapsed = 0.0
+    for expected, sample in corpus:
+        start = time.perf_counter()
+        ranked = [strategy for strategy, _ in rank_strategies(sample)]
+        elapsed += time.perf_counter() - start
+        first[expected] += ranked[0] == expected
+        second[expected] += expected in ranked[:2]
+        chained[expected] += chained_detect(sample) == expected
+        if ranked[0] != expected:
+            print(f"  {expected} sample sniffed as {ranked[0]}: {sample[:50]!r}")
+
+    print(f"{'corpus':<20} {'samples':>8} {'first':>8} {'top two':>8} {'chained':>8}")
+    for strategy in SNIFFED_STRATEGIES:
+        count = totals[strategy]
+        print(
+            f"{strategy:<20} {count:>8} {first[strategy] / count:>8.0%} "
+            f"{second[strategy] / count:>8.0%} {chained[strategy] / count:>8.0%}"
+        )
+    overall = sum(first.values()) / len(corpus)
+    print(
+        f"{'all':<20} {len(corpus):>8} {overall:>8.1%} "
+        f"{sum(second.values()) / len(corpus):>8.1%} {sum(chained.values()) / len(corpus):>8.1%}"
+    )
+    print(f"{'mean latency per sample':<56} {elapsed / len(corpus) * 1e6:10.1f} us")
+    assert overall >= TARGET_ACCURACY, f"detection accuracy {overall:.1%} is below the target"
+
+
+def latency(largest: int) -> None:
+    megabytes = 1
+    while megabytes <= largest:
+        for kind, line in (("text", _PROSE), ("log", _LOG)):
+            content = line * (megabytes * 1_000_000 // len(line))
+            for windows in (1, 3):
+                label = f"{kind}, {megabytes} MB, {windows} window{'s' * (windows > 1)}"
+                sniff = partial(detect_strategy, content, windows=windows)
+                assert timed(label, sniff) == kind
+            del content
+        megabytes *= 10
+
+
+def main() -> None:
+    accuracy()
+    latency(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+SqlDietStrategy benchmark on a pg_dump-style dump dominated by data rows.
+
+Compares Tier 1 against parsing the whole dump with sqlglot and filtering the DDL
+afterwards, which is what it did before statements were pre-filtered by kind. A
+schema-only dump then times Tier 1 cold (serial and with a parse pool) and warm, when
+every statement is served from the render cache. Last, schemas of growing size are parsed
+cold serially and with a pool started regardless of ``PARALLEL_MIN_DDL_CHARS``, for each
+way of starting workers, to find where the pool starts paying for itself.
+"""
+
+import multiprocessing
+import os
+import sys
+
+from harness import char_heuristic, timed
+
+from context_diet.strategies import sql_diet
+from context_diet.strategies.sql_diet import SqlDietStrategy, clear_render_cache
+
+
+def build_dump(tables: int = 40, rows_per_table: int = 1_000) -> str:
+    """Renders ``tables`` CREATE TABLE/ALTER TABLE pairs, each followed by INSERT rows."""
+    parts = ["SET statement_timeout = 0;\nSET client_encoding = 'UTF8';\n\n"]
+    for t in range(tables):
+        parts.append(
+            f"CREATE TABLE public.table_{t} (\n"
+            f"    id integer NOT NULL,\n"
+            f"    parent_id integer,\n"
+            f"    name character varying(255) NOT NULL,\n"
+            f"    note text,\n"
+            f"    created_at timestamp with time zone DEFAULT now()\n"
+            f");\n\n"
+            f"ALTER TABLE ONLY public.table_{t}\n"
+            f"    ADD CONSTRAINT table_{t}_pkey PRIMARY KEY (id);\n\n"
+        )
+        for r in range(rows_per_table):
+            parts.append(
+                f"INSERT INTO public.table_{t} VALUES ({r}, {r // 2}, 'row {r}; of {t}', "
+                f"'it''s a note', '2024-01-01 00:00:00+00');\n"
+            )
+    return "".join(parts)
+
+
+def legacy_parse(content: str) -> int:
+    """Whole-dump ``sqlglot.parse`` followed by the DDL whitelist."""
+    import sqlglot
+    from sqlglot import exp
+
+    expressions = sqlglot.parse(content)
+    return sum(isinstance(e, (exp.Create, exp.Alter, exp.Drop)) for e in expressions)
+
+
+def cold(strategy: SqlDietStrategy, content: str, **kwargs: int) -> str:
+    clear_render_cache()
+    return strategy.compress(content, 10_000_000, char_heuristic, **kwargs)
+
+
+def break_even(strategy: SqlDietStrategy, workers: int) -> None:
+    threshold = sql_diet.PARALLEL_MIN_DDL_CHARS
+    sql_diet.PARALLEL_MIN_DDL_CHARS = 0
+    try:
+        for method in ("fork", "spawn"):
+            if method not in multiprocessing.get_all_start_methods():
+                continue
+            multiprocessing.set_start_method(method, force=True)
+            for tables in (150, 300, 600, 1_200, 2_400):
+                schema = build_dump(tables=tables, rows_per_table=0)
+                print(f"schema: {len(schema) // 1000} kB of DDL, workers started by {method}")
+                timed("tier 1 cold, serial", lambda schema=schema: cold(strategy, schema), 1)
+                timed(
+                    f"tier 1 cold, parse_workers={workers}",
+                    lambda schema=schema: cold(strategy, schema, parse_workers=workers),
+                    1,
+                )
+    finally:
+        sql_diet.PARALLEL_MIN_DDL_CHARS = threshold
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    content = build_dump(rows_per_table=rows)
+    print(f"dump: {len(content) / 1e6:.1f} MB, {40 * rows} rows")
+
+    strategy = SqlDietStrategy()
+    timed("legacy: sqlglot.parse(whole dump) + filter", lambda: legacy_parse(content), 1)
+    timed(
+        "tier 1: compress(budget=100000)",
+        lambda: strategy.compress(content, 100_000, char_heuristic),
+        1,
+    )
+
+    schema = build_dump(tables=2_000, rows_per_table=0)
+    workers = os.cpu_count() or 1
+    print(f"schema: {len(schema) / 1e6:.1f} MB, {2 * 2_000} DDL statements, {workers} CPUs")
+    timed("tier 1 cold, serial", lambda: cold(strategy, schema), 1)
+    timed(
+        f"tier 1 cold, parse_workers={max(workers, 2)}",
+        lambda: cold(strategy, schema, parse_workers=max(workers, 2)),
+        1,
+    )
+    timed(
+        "tier 1 warm (render cache)",
+        lambda: strategy.compress(schema, 10_000_000, char_heuristic),
+    )
+    break_even(strategy, max(workers, 2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+YamlDietStrategy benchmark on a ~10 MB Kubernetes manifest bundle (``kind: List``).
+
+Compares the strategy against the round-trip load/dump/reload cycle it used to run
+unconditionally, with and without comments in the input, and times the same manifests
+rendered as a ``---``-separated Helm-style stream.
+"""
+
+import io
+
+from harness import char_heuristic, timed
+
+from context_diet.strategies.yaml_diet import YamlDietStrategy, _safe_yaml
+
+
+def build_manifest_bundle(
+    deployments: int = 14_000, comments: bool = False, stream: bool = False
+) -> str:
+    """Renders a ``kubectl get -o yaml`` List of Deployments, or a ``---`` stream of them."""
+    note = "  # managed by helm\n" if comments else "\n"
+    parts = [] if stream else ["apiVersion: v1\nkind: List\nitems:\n"]
+    for i in range(deployments):
+        parts.append(
+            ("---\n" if stream else "") + f"- apiVersion: apps/v1\n"
+            f"  kind: Deployment\n"
+            f"  metadata:\n"
+            f"    name: service-{i}{note}"
+            f"    namespace: team-{i % 40}\n"
+            f"    labels:\n"
+            f"      app.kubernetes.io/name: service-{i}\n"
+            f"      app.kubernetes.io/part-of: platform\n"
+            f"  spec:\n"
+            f"    replicas: {i % 5 + 1}\n"
+            f"    selector:\n"
+            f"      matchLabels:\n"
+            f"        app: service-{i}\n"
+            f"    template:\n"
+            f"      spec:\n"
+            f"        containers:\n"
+            f"        - name: app\n"
+            f"          image: registry.example.com/service-{i}:1.{i % 17}.0\n"
+            f"          ports:\n"
+            f"          - containerPort: {8000 + i % 1000}\n"
+            f"          env:\n"
+            f"          - name: LOG_LEVEL\n"
+            f"            value: info\n"
+            f"          - name: UPSTREAM\n"
+            f"            value: http://service-{(i + 1) % deployments}.svc.cluster.local\n"
+            f"          resources:\n"
+            f"            limits:\n"
+            f"              cpu: 500m\n"
+            f"              memory: 256Mi\n"
+        )
+    bundle = "".join(parts)
+    # A stream holds one manifest per document rather than a sequence item per manifest
+    return bundle.replace("---\n- ", "---\n").replace("\n  ", "\n") if stream else bundle
+
+
+def legacy_round_trip(content: str) -> str:
+    """The rt load -> dump -> safe reload cycle every call used to pay before pruning."""
+    from ruamel.yaml import YAML
+
+    yaml_rt = YAML(typ="rt")
+    buf = io.StringIO()
+    yaml_rt.dump(yaml_rt.load(content), buf)
+    return str(YAML(typ="safe", pure=True).load(buf.getvalue()) is not None)
+
+
+def main() -> None:
+    engine = _safe_yaml()
+    print(f"safe engine: {engine.Parser.__name__} / {engine.Emitter.__name__}")
+
+    strategy = YamlDietStrategy()
+    for comments in (False, True):
+        content = build_manifest_bundle(comments=comments)
+        label = "commented" if comments else "comment-free"
+        print(f"\n{label} bundle: {len(content) / 1e6:.1f} MB")
+        timed(f"{label}: legacy rt round-trip only", lambda c=content: legacy_round_trip(c), 1)
+        for budget in (10_000_000, 2_000):
+            timed(
+                f"{label}: compress(budget={budget})",
+                lambda c=content, b=budget: strategy.compress(c, b, char_heuristic),
+                1,
+            )
+
+    content = build_manifest_bundle(stream=True)
+    print(f"\n--- stream: {len(content) / 1e6:.1f} MB")
+    for budget in (10_000_000, 2_000):
+        timed(
+            f"stream: compress(budget={budget})",
+            lambda b=budget: strategy.compress(content, b, char_heuristic),
+            1,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Shared timing helpers for the context-diet benchmark scripts.
+
+Benchmarks are standalone scripts run from the repository root, e.g.
+``PYTHONPATH=src python benchmarks/bench_yaml.py``. They are not collected by pytest.
+"""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def timed(label: str, fn: Callable[[], Any], repeat: int = 3) -> Any:
+    """Runs ``fn`` ``repeat`` times, prints the best wall-clock time and returns its result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<56} {best * 1000:10.1f} ms")
+    return result
+
+
+def char_heuristic(text: str) -> int:
+    """Same len // 4 estimate as the default heuristic, without the RuntimeWarning."""
+    return len(text) // 4
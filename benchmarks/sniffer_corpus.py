@@ -0,0 +1,467 @@
+"""
+Labelled corpus for the content sniffer benchmark: short, everyday samples of each format
+the sniffer tells apart, including the ones an ordered chain of checks misroutes
+(JSON Lines, Python that embeds SQL, prose with a ``Key: value`` line, logs that open
+with a bracket).
+"""
+
+import json
+import textwrap
+
+
+def _dedent(text: str) -> str:
+    return textwrap.dedent(text).lstrip("\n")
+
+
+def _json_lines() -> list[str]:
+    requests = "".join(
+        json.dumps(
+            {
+                "ts": f"2024-03-01T10:00:{i:02d}Z",
+                "level": "error" if i % 7 == 6 else "info",
+                "msg": f"GET /items/{i}",
+                "status": 500 if i % 7 == 6 else 200,
+            }
+        )
+        + "\n"
+        for i in range(40)
+    )
+    events = "".join(
+        f'{{"event": "click", "user": {i}, "props": {{"page": "/p/{i % 5}", "ab": [1, 2]}}}}\n'
+        for i in range(30)
+    )
+    bunyan = "".join(
+        f'{{"name":"api","hostname":"web-{i % 3}","pid":{4000 + i},"level":{50 if i % 9 == 0 else 30},'
+        f'"msg":"handled request {i}","time":"2024-03-01T10:00:00.{i:03d}Z","v":0}}\n'
+        for i in range(25)
+    )
+    audit = "".join(
+        json.dumps(
+            {"@timestamp": f"2024-03-01T10:{i:02d}:00Z", "actor": {"id": i}, "action": "login"}
+        )
+        + "\n"
+        for i in range(20)
+    )
+    spaced = "\n".join(json.dumps({"id": i, "tags": ["a", "b"], "ok": True}) for i in range(15))
+    return [requests, events, bunyan, audit, "\n" + spaced + "\n"]
+
+
+def _json_documents() -> list[str]:
+    config = {
+        "name": "service",
+        "version": "1.4.2",
+        "dependencies": {f"pkg-{i}": f"^{i}.0.0" for i in range(12)},
+        "scripts": {"build": "tsc -p .", "test": "jest"},
+    }
+    items = [{"id": i, "name": f"item {i}", "price": i * 3.5, "tags": []} for i in range(20)]
+    return [
+        json.dumps(config, indent=2),
+        json.dumps(items),
+        json.dumps(items, indent=4),
+        json.dumps({"data": {"user": {"id": 7, "roles": ["admin"]}}, "errors": None}),
+        json.dumps([[1, 2, 3], [4, 5, 6]], indent=1),
+        '{\n  "a": 1,\n  "b": {}\n}',
+        json.dumps({"level": "info", "msg": "a single JSON object is a document"}),
+    ]
+
+
+def _python() -> list[str]:
+    return [
+        _dedent(
+            '''
+            """Helpers for the user repository."""
+
+            import sqlite3
+
+            USERS = """
+            SELECT id, name, email
+            FROM users
+            WHERE active = 1
+            ORDER BY name
+            """
+
+            ORDERS = """
+            SELECT o.id, o.total
+            FROM orders o
+            JOIN users u ON u.id = o.user_id
+            WHERE u.id = ?
+            """
+
+
+            def active_users(db: sqlite3.Connection) -> list[tuple]:
+                return db.execute(USERS).fetchall()
+
+
+            def orders(db, user_id):
+                return db.execute(ORDERS, (user_id,)).fetchall()
+            '''
+        ),
+        _dedent(
+            """
+            from dataclasses import dataclass, field
+
+
+            @dataclass
+            class Settings:
+                host: str = "localhost"
+                port: int = 8080
+                debug: bool = False
+                tags: list[str] = field(default_factory=list)
+
+                def url(self) -> str:
+                    return f"http://{self.host}:{self.port}"
+            """
+        ),
+        _dedent(
+            """
+            #!/usr/bin/env python3
+            # Copies files matching a glob into a target directory.
+            import argparse
+            import shutil
+            from pathlib import Path
+
+
+            def main():
+                parser = argparse.ArgumentParser()
+                parser.add_argument("pattern")
+                parser.add_argument("target")
+                args = parser.parse_args()
+                for path in Path(".").glob(args.pattern):
+                    shutil.copy(path, args.target)
+
+
+            if __name__ == "__main__":
+                main()
+            """
+        ),
+        _dedent(
+            """
+            class Stack:
+                def __init__(self):
+                    self.items = []
+
+                def push(self, item):
+                    self.items.append(item)
+
+                def pop(self):
+                    if not self.items:
+                        raise IndexError("pop from empty stack")
+                    return self.items.pop()
+            """
+        ),
+        _dedent(
+            """
+            QUERY = "SELECT * FROM users WHERE id = %s"
+            TIMEOUT = 30
+
+
+            def fetch(cursor, user_id):
+                cursor.execute(QUERY, (user_id,))
+                try:
+                    return cursor.fetchone()
+                except Exception:
+                    return None
+            """
+        ),
+        _dedent(
+            """
+            async def handler(request):
+                async with request.app["db"].acquire() as conn:
+                    rows = await conn.fetch("SELECT id FROM jobs")
+                return web.json_response([dict(r) for r in rows])
+            """
+        ),
+        "import os\n",
+        "def hello():\n    pass",
+    ]
+
+
+def _sql() -> list[str]:
+    rows = "".join(
+        f"INSERT INTO `users` VALUES ({i},'user{i}','user{i}@example.com','2024-01-01 00:00:00');\n"
+        for i in range(20)
+    )
+    return [
+        _dedent(
+            """
+            -- MySQL dump 10.13  Distrib 8.0.36, for Linux (x86_64)
+            --
+            -- Host: localhost    Database: shop
+            -- ------------------------------------------------------
+            /*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+            /*!40101 SET NAMES utf8mb4 */;
+
+            DROP TABLE IF EXISTS `users`;
+            CREATE TABLE `users` (
+              `id` int NOT NULL AUTO_INCREMENT,
+              `name` varchar(255) NOT NULL,
+              `email` varchar(255) DEFAULT NULL,
+              `created_at` datetime NOT NULL,
+              PRIMARY KEY (`id`)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+            LOCK TABLES `users` WRITE;
+            """
+        )
+        + rows
+        + "UNLOCK TABLES;\n",
+        _dedent(
+            """
+            SET statement_timeout = 0;
+            SET client_encoding = 'UTF8';
+            SET standard_conforming_strings = on;
+
+            CREATE TABLE public.orders (
+                id integer NOT NULL,
+                user_id integer NOT NULL,
+                total numeric(10,2)
+            );
+
+            ALTER TABLE ONLY public.orders
+                ADD CONSTRAINT orders_pkey PRIMARY KEY (id);
+
+            COPY public.orders (id, user_id, total) FROM stdin;
+            1\t7\t19.99
+            2\t7\t5.00
+            \\.
+            """
+        ),
+        _dedent(
+            """
+            select u.id,
+                   u.name,
+                   count(o.id) as orders
+            from users u
+            left join orders o on o.user_id = u.id
+            where u.created_at > now() - interval '30 days'
+            group by u.id, u.name
+            order by orders desc
+            limit 20;
+            """
+        ),
+        _dedent(
+            """
+            WITH recent AS (
+                SELECT user_id, MAX(created_at) AS last_seen
+                FROM events
+                GROUP BY user_id
+            )
+            SELECT u.email, r.last_seen
+            FROM users u
+            JOIN recent r ON r.user_id = u.id
+            WHERE r.last_seen < '2024-01-01';
+            """
+        ),
+        _dedent(
+            """
+            BEGIN;
+            UPDATE accounts SET balance = balance - 100 WHERE id = 1;
+            UPDATE accounts SET balance = balance + 100 WHERE id = 2;
+            COMMIT;
+            """
+        ),
+        "SELECT * FROM users;",
+        "SELECT id, name FROM users WHERE id = 1;",
+        "SELECT u.id, u.name\nFROM users u\nWHERE u.id = 1;\n",
+        "SELECT count(*) FROM users;",
+        "  CREATE TABLE test (id int);",
+        "ALTER TABLE foo ADD COLUMN bar TEXT;",
+    ]
+
+
+def _logs() -> list[str]:
+    service = "".join(
+        f"2024-03-01 10:{i // 60:02d}:{i % 60:02d},{i * 7 % 1000:03d} INFO  [worker-{i % 4}] "
+        f"processed batch {i} in {i % 90} ms\n"
+        for i in range(30)
+    )
+    bracketed = "".join(
+        f"[2024-03-01T10:00:{i:02d}.000Z] {'WARN' if i % 5 == 4 else 'INFO'} "
+        f"cache miss ratio {i / 30:.2f}\n"
+        for i in range(30)
+    )
+    access = "".join(
+        f'10.0.0.{i} - - [01/Mar/2024:10:00:{i:02d} +0000] "GET /api/v1/items/{i} HTTP/1.1" '
+        f'200 {512 + i} "-" "curl/8.4.0"\n'
+        for i in range(30)
+    )
+    syslog = "".join(
+        f"Mar  1 10:00:{i:02d} web-1 sshd[{1200 + i}]: Accepted publickey for deploy "
+        f"from 10.0.0.{i} port {50000 + i} ssh2\n"
+        for i in range(25)
+    )
+    logfmt = "".join(
+        f'time="2024-03-01T10:00:{i:02d}Z" level=info msg="request served" path=/items/{i}\n'
+        for i in range(25)
+    )
+    return [
+        service,
+        bracketed,
+        access,
+        syslog,
+        logfmt,
+        _dedent(
+            """
+            Traceback (most recent call last):
+              File "/srv/app/main.py", line 42, in <module>
+                run()
+              File "/srv/app/main.py", line 37, in run
+                result = handler(payload)
+              File "/srv/app/handlers.py", line 12, in handler
+                return payload["id"]
+            KeyError: 'id'
+            """
+        ),
+        _dedent(
+            """
+            Exception in thread "main" java.lang.NullPointerException: user is null
+                at com.example.shop.UserService.find(UserService.java:88)
+                at com.example.shop.OrderController.create(OrderController.java:41)
+                at java.base/java.lang.Thread.run(Thread.java:833)
+            """
+        ),
+        "ERROR: connection refused on port 5432",
+        "DEBUG starting worker thread 4",
+    ]
+
+
+def _yaml() -> list[str]:
+    return [
+        _dedent(
+            """
+            apiVersion: apps/v1
+            kind: Deployment
+            metadata:
+              name: web
+              labels:
+                app: web
+            spec:
+              replicas: 3
+              template:
+                spec:
+                  containers:
+                    - name: web
+                      image: nginx:1.25
+                      ports:
+                        - containerPort: 80
+            """
+        ),
+        _dedent(
+            """
+            version: "3.9"
+            services:
+              db:
+                image: postgres:16
+                environment:
+                  POSTGRES_PASSWORD: example
+              app:
+                build: .
+                depends_on:
+                  - db
+            """
+        ),
+        _dedent(
+            """
+            name: CI
+            on:
+              push:
+                branches: [main]
+            jobs:
+              test:
+                runs-on: ubuntu-latest
+                steps:
+                  - uses: actions/checkout@v4
+                  - run: pip install -e .
+                  - run: pytest -q
+            """
+        ),
+        _dedent(
+            """
+            # Application settings
+            server:
+              host: 0.0.0.0
+              port: 8080
+            logging:
+              level: info
+              format: json
+            features:
+              - search
+              - export
+            """
+        ),
+        "---\nkey: value\nlist:\n  - 1\n  - 2\n",
+        "host: localhost\nport: 5432",
+        'name: "John"\nage: 30',
+    ]
+
+
+def _text() -> list[str]:
+    return [
+        _dedent(
+            """
+            Hi team,
+
+            Summary: the release is delayed by a week.
+            The migration scripts need another review before we can run them in
+            production, and two of the dashboards still point at the old cluster.
+            I'll send an update on Friday.
+
+            Thanks,
+            Dana
+            """
+        ),
+        _dedent(
+            """
+            # context-diet
+
+            Deterministic syntactic context compression for LLMs.
+
+            ## Installation
+
+            Install it with pip and pass your own token counter. The library has no
+            required dependencies beyond the standard library.
+
+            - Select the strategy with `strategy=`, or let it be detected.
+            - Set a budget in tokens.
+            """
+        ),
+        _dedent(
+            """
+            id,name,email,signup_date
+            1,Ada,ada@example.com,2024-01-02
+            2,Grace,grace@example.com,2024-01-05
+            3,Linus,linus@example.com,2024-02-11
+            """
+        ),
+        _dedent(
+            """
+            Note: this document describes the on-call rotation.
+            Each engineer is on call for one week at a time, starting on Monday.
+            Handover happens at the weekly sync, where open incidents are reviewed.
+            Escalations go to the team lead first, then to the duty manager.
+            """
+        ),
+        _dedent(
+            """
+            The quick brown fox jumps over the lazy dog. Update the index when the
+            file changes. Select the rows you want to keep, delete from the list the
+            ones you don't, and import the rest into the spreadsheet afterwards.
+            """
+        ),
+        "Just a normal sentence",
+        "The quick brown fox jumps over the lazy dog.",
+    ]
+
+
+def build_corpus() -> list[tuple[str, str]]:
+    """Every sample of the corpus, with the strategy it should be routed to."""
+    groups = {
+        "jsonl": _json_lines(),
+        "json": _json_documents(),
+        "python": _python(),
+        "sql": _sql(),
+        "log": _logs(),
+        "yaml": _yaml(),
+        "text": _text(),
+    }
+    return [(expected, sample) for expected, samples in groups.items() for sample in samples]
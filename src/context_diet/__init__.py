@@ -4,7 +4,7 @@ context-diet: Deterministic syntactic context compression for LLMs.
 
 import context_diet.strategies
 
-from .distiller import distill
+from .distiller import distill, distill_file
 
 __version__ = "0.1.0"
-__all__ = ["distill"]
+__all__ = ["distill", "distill_file"]
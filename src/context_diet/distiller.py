@@ -2,16 +2,28 @@
 Core orchestration layer for the context-diet framework.
 """
 
+import itertools
 import logging
+import os
 import warnings
-from collections.abc import Callable
-from typing import Any
+from collections.abc import Callable, Iterator
+from typing import IO, Any, TypeGuard
 
-from .interfaces import ContextBudgetExceededError
+from .interfaces import DietStrategy, MalformedContentError
 from .registry import StrategyRegistry
-from .sniffer import detect_strategy
+from .sniffer import rank_strategies
+from .streaming import (
+    DEFAULT_CHUNK_SIZE,
+    MAGIC_SIZE,
+    Source,
+    is_compressed,
+    iter_files,
+    iter_text,
+)
 from .token_utils import default_token_heuristic
 
+logger = logging.getLogger(__name__)
+
 
 def distill(
     content: str,
@@ -28,7 +40,10 @@ def distill(
     Args:
         content: The raw input payload string.
         budget: The strict numerical token limit (default: 2000).
-        strategy: The dispatch target directive, defaulting to "auto".
+        strategy: The dispatch target directive, defaulting to "auto". Auto-detection
+            ranks the likely strategies (see ``sniffer.rank_strategies``) and falls back
+            on the next one when a strategy cannot parse the content
+            (``MalformedContentError``); any other error is raised at once.
         token_counter: An optional callable to count tokens; defaults to a safe heuristic.
         filename: Optional context filename to bypass regex sniffing.
         extension: Optional explicit file extension to bypass regex sniffing.
@@ -49,19 +64,186 @@ def distill(
         )
         token_counter = default_token_heuristic
 
-    auto_detected = False
-    if strategy == "auto":
-        strategy = detect_strategy(content, filename=filename, extension=extension)
-        auto_detected = True
+    candidates = _candidates(content, strategy, filename, extension)
+    return _first_parsed(
+        candidates, lambda instance: instance.compress(content, budget, token_counter, **kwargs)
+    )
+
+
+def _candidates(
+    sample: str, strategy: str, filename: str | None, extension: str | None
+) -> list[str]:
+    """The strategies to try in turn: the ranked guesses for ``"auto"``, else ``strategy``."""
+    if strategy != "auto":
+        return [strategy]
+    return [name for name, _ in rank_strategies(sample, filename=filename, extension=extension)]
+
+
+def _first_parsed(candidates: list[str], compress: Callable[[DietStrategy], str]) -> str:
+    """
+    Runs ``compress`` with each candidate strategy in turn until one can parse the
+    content; the first ``MalformedContentError`` is raised if none can. Any other error,
+    such as a parsed payload that cannot fit the budget, is raised at once.
+    """
+    first_error: MalformedContentError | None = None
+    for candidate in candidates:
+        try:
+            return compress(StrategyRegistry.get_strategy(candidate)())
+        except MalformedContentError as e:
+            if first_error is None:
+                first_error = e
+            logger.debug(
+                "Strategy %r cannot parse the content (%s); trying the next.", candidate, e
+            )
+    assert first_error is not None
+    raise first_error
+
+
+def distill_file(
+    source: Source | list[str | os.PathLike[str]] | tuple[str | os.PathLike[str], ...],
+    budget: int = 2000,
+    strategy: str = "auto",
+    token_counter: Callable[[str], int] | None = None,
+    filename: str | None = None,
+    extension: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs: Any,
+) -> str:
+    """
+    Compresses a file or byte stream without first reading it into one string.
+
+    Paths and seekable binary file objects are handed to the strategy's
+    ``compress_file``, which may seek (``log`` tails and time windows read only the
+    bytes they keep). Any other source is decoded incrementally into line-aligned
+    chunks for ``compress_stream``, as are gzip, bzip2 and xz files, which are
+    decompressed only as far as the strategy reads. A list or tuple of paths is read
+    as one stream, in order (see ``context_diet.streaming.iter_files``). Strategies
+    with a bounded-memory streaming path (currently ``sql``, ``log`` and ``jsonl``)
+    read only as much as they need; the others receive the joined text, exactly as
+    ``distill`` would.
+
+    Args:
+        source: A path, a list or tuple of paths (e.g. rotated logs, oldest first), a
+            binary/text file object, or an iterable of ``bytes``/``str``.
+        budget: The strict numerical token limit (default: 2000).
+        strategy: The dispatch target directive, defaulting to "auto". Auto-detection
+            uses the path's extension when there is one (of the last path in a list),
+            else the first chunk, and falls back like ``distill`` does (see
+            ``_distill_chunks`` for streams that cannot be rewound).
+        token_counter: An optional callable to count tokens; defaults to a safe heuristic.
+        filename: Optional context filename, for sources that are not paths.
+        extension: Optional explicit file extension to bypass regex sniffing.
+        chunk_size: Bytes read from a file object per chunk.
+        **kwargs: Extension parameters for strategy-specific tuning.
+
+    Returns:
+        The structurally compressed string that fits the budget.
+    """
+    if budget <= 0:
+        return ""
+
+    if token_counter is None:
+        warnings.warn(
+            "Relying on the default default_token_heuristic is dangerous for strict API limits. "
+            "Please provide an authentic tokenizer function (like tiktoken) via the `token_counter` argument.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        token_counter = default_token_heuristic
+
+    if isinstance(source, (str, os.PathLike)):
+        if filename is None:
+            filename = os.fspath(source)
+        with open(source, "rb") as handle:
+            return _distill_handle(
+                handle, budget, strategy, token_counter, filename, extension, chunk_size, **kwargs
+            )
 
-    strategy_class = StrategyRegistry.get_strategy(strategy)
-    strategy_instance = strategy_class()
+    if _is_seekable_binary(source):
+        return _distill_handle(
+            source, budget, strategy, token_counter, filename, extension, chunk_size, **kwargs
+        )
 
-    import json
+    if isinstance(source, (list, tuple)):
+        if filename is None and source:
+            # The live file names the format best (``app.log`` after ``app.log.1.gz``)
+            filename = os.fspath(source[-1])
+        chunks = iter_files(source, chunk_size)
+    else:
+        chunks = iter_text(source, chunk_size)
+    return _distill_chunks(chunks, budget, strategy, token_counter, filename, extension, **kwargs)
 
-    import libcst as cst
 
+def _distill_chunks(
+    chunks: Iterator[str],
+    budget: int,
+    strategy: str,
+    token_counter: Callable[[str], int],
+    filename: str | None,
+    extension: str | None,
+    **kwargs: Any,
+) -> str:
+    """
+    Dispatches line-aligned text chunks to the strategy's ``compress_stream``.
+
+    A stream cannot be replayed, so the fallback of ``distill`` only goes as far as it
+    can: once a candidate that streams in bounded memory starts reading, its result is
+    final. The others join the stream anyway, so it is joined once and handed to each
+    in turn, exactly as ``distill`` would.
+    """
+    first = next(chunks, "")
+    candidates = _candidates(first, strategy, filename, extension)
+    chunks = itertools.chain([first], chunks)
+    content: str | None = None
+
+    def compress(instance: DietStrategy) -> str:
+        nonlocal content
+        if content is None and type(instance).compress_stream is not DietStrategy.compress_stream:
+            return instance.compress_stream(chunks, budget, token_counter, **kwargs)
+        if content is None:
+            content = "".join(chunks)
+        return instance.compress(content, budget, token_counter, **kwargs)
+
+    return _first_parsed(candidates, compress)
+
+
+def _is_seekable_binary(source: object) -> TypeGuard[IO[bytes]]:
+    """Whether ``source`` is a file object that ``compress_file`` can seek around in."""
+    if not hasattr(source, "seekable") or not hasattr(source, "read"):
+        return False
     try:
-        return strategy_instance.compress(content, budget, token_counter, **kwargs)
-    except Exception as e:
-        raise e
+        return bool(source.seekable()) and isinstance(source.read(0), bytes)
+    except (OSError, ValueError):
+        return False
+
+
+def _distill_handle(
+    handle: IO[bytes],
+    budget: int,
+    strategy: str,
+    token_counter: Callable[[str], int],
+    filename: str | None,
+    extension: str | None,
+    chunk_size: int,
+    **kwargs: Any,
+) -> str:
+    """Dispatches a seekable binary file to the strategy's ``compress_file``."""
+    start = handle.tell()
+    head = handle.read(chunk_size if strategy == "auto" else MAGIC_SIZE)
+    handle.seek(start)
+    if is_compressed(head):
+        # Decompressed text cannot be seeked around in, so it is streamed
+        chunks = iter_text(handle, chunk_size)
+        return _distill_chunks(
+            chunks, budget, strategy, token_counter, filename, extension, **kwargs
+        )
+
+    first = next(iter_text(iter([head]), chunk_size), "") if strategy == "auto" else ""
+    candidates = _candidates(first, strategy, filename, extension)
+
+    def compress(instance: DietStrategy) -> str:
+        # Every candidate reads the file from where the caller left it
+        handle.seek(start)
+        return instance.compress_file(handle, budget, token_counter, chunk_size, **kwargs)
+
+    return _first_parsed(candidates, compress)
@@ -2,7 +2,10 @@
 Core API and strategy interfaces for context-diet.
 """
 
-from typing import Any, Protocol
+from collections.abc import Iterable
+from typing import IO, Any, Protocol
+
+from .streaming import DEFAULT_CHUNK_SIZE, iter_text
 
 
 class TokenCounter(Protocol):
@@ -40,6 +43,52 @@ class DietStrategy:
         """
         raise NotImplementedError("Subclasses must implement compress()")
 
+    def compress_stream(
+        self, chunks: Iterable[str], budget: int, token_counter: TokenCounter, **kwargs: Any
+    ) -> str:
+        """
+        Compresses content supplied as an iterable of newline-terminated text chunks.
+
+        Strategies that can work in bounded memory override this; the default joins the
+        chunks and delegates to ``compress``.
+
+        Args:
+            chunks: The raw input payload, e.g. from ``context_diet.streaming.iter_text``.
+            budget: The maximum allowable token limit.
+            token_counter: A callable adhering to the TokenCounter protocol.
+            **kwargs: Extension parameters for specific strategy implementations.
+
+        Returns:
+            The syntactically compressed string.
+        """
+        return self.compress("".join(chunks), budget, token_counter, **kwargs)
+
+    def compress_file(
+        self,
+        handle: IO[bytes],
+        budget: int,
+        token_counter: TokenCounter,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Compresses a seekable binary file, starting from its current position.
+
+        Strategies that can skip parts of a file by seeking override this; the default
+        streams the file through ``compress_stream``.
+
+        Args:
+            handle: A seekable file object opened in binary mode.
+            budget: The maximum allowable token limit.
+            token_counter: A callable adhering to the TokenCounter protocol.
+            chunk_size: Bytes read per chunk when streaming.
+            **kwargs: Extension parameters for specific strategy implementations.
+
+        Returns:
+            The syntactically compressed string.
+        """
+        return self.compress_stream(iter_text(handle, chunk_size), budget, token_counter, **kwargs)
+
 
 class ContextBudgetExceededError(Exception):
     """
@@ -48,3 +97,13 @@ class ContextBudgetExceededError(Exception):
     """
 
     pass
+
+
+class MalformedContentError(ContextBudgetExceededError):
+    """
+    Raised when a strategy cannot parse its payload at all, as opposed to parsing it and
+    finding no way to fit it in the budget. Auto-detection then tries the next likely
+    strategy.
+    """
+
+    pass
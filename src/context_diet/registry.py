@@ -4,6 +4,7 @@ Provides the centralized registry for context optimization routines.
 
 from .interfaces import DietStrategy
 from .strategies.json_diet import JsonDietStrategy
+from .strategies.json_log_diet import JsonLogDietStrategy
 from .strategies.log_diet import LogDietStrategy
 from .strategies.plain_text import PlainTextDietStrategy
 from .strategies.python_ast import PythonAstDietStrategy
@@ -24,6 +25,8 @@ class StrategyRegistry:
         "python": PythonAstDietStrategy,
         "py": PythonAstDietStrategy,
         "json": JsonDietStrategy,
+        "jsonl": JsonLogDietStrategy,
+        "ndjson": JsonLogDietStrategy,
         "yaml": YamlDietStrategy,
         "yml": YamlDietStrategy,
         "sql": SqlDietStrategy,
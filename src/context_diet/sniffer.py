@@ -2,11 +2,16 @@
 ContentSniffer implementation for automated strategy detection.
 """
 
+import json
+import os
 import re
+from collections import Counter
 
 EXTENSION_MAP = {
     ".py": "python",
     ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
     ".sql": "sql",
     ".yml": "yaml",
     ".yaml": "yaml",
@@ -16,20 +21,216 @@ EXTENSION_MAP = {
     ".csv": "text",
 }
 
+# Strategies the sniffer tells apart, in the order that breaks a tie
+SNIFFED_STRATEGIES = ("jsonl", "json", "python", "sql", "log", "yaml", "text")
 
-def detect_strategy(
-    content: str, filename: str | None = None, extension: str | None = None
-) -> str:
+# Characters sniffed from each window of the content: its head, and any middle and tail
+# windows asked for
+SNIFF_SIZE = 1 << 16
+
+# Suffixes of rotated and compressed copies (``app.log.1``, ``app.log-20240101.gz``),
+# which hide the extension of the format itself
+_COPY_SUFFIX = re.compile(r"(?:[.-]\d+)?(?:\.(?:gz|bz2|xz))?$", re.IGNORECASE)
+
+_NON_SPACE = re.compile(r"\S")
+
+# One item of a select list: a column, qualified name or function call, maybe aliased
+_SELECTED = r"(?:[\w.\"`]+(?:\([^()\n]*\))?|\*)(?:\s+AS\s+[\w\"`]+)?"
+
+# Line signatures, tried in this order at the start of each line of the sample, past its
+# indentation: the group name, the strategy a line bearing it speaks for, and how much.
+# Signatures that seldom start a line of any other format weigh the most; a line that
+# bears none of them speaks for plain text.
+_LINE_SIGNATURES = (
+    # One JSON object per line, confirmed by parsing the first two
+    ("record", "jsonl", 2.0, r"\{.*\}[ \t]*$"),
+    (
+        "stamp",
+        "log",
+        2.0,
+        r"\[?(?:\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{2,4})(?!\d)"
+        r"|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) [ \d]\d \d{2}:\d{2}:\d{2}"
+        # An access log's client address
+        r"|\d{1,3}(?:\.\d{1,3}){3} ",
+    ),
+    (
+        "level",
+        "log",
+        1.5,
+        r"(?:TRACE|DEBUG|INFO|NOTICE|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b"
+        r"|\[(?i:trace|debug|info|notice|warn|warning|error|critical|fatal)\]"
+        r"|(?:time|ts|level|lvl)=\S|Traceback \(most recent call last\)",
+    ),
+    ("frame", "log", 1.0, r'File "[^"\n]+", line \d+|at [\w$.]+\(|\w+(?:Error|Exception): '),
+    (
+        "statement",
+        "python",
+        3.0,
+        r"(?:from [\w.]+ )?import [\w.]+|(?:async )?def \w+\s*\(|class \w+\s*[(:]"
+        r"|@[\w.]+|if __name__ ==",
+    ),
+    # Python keeps its SQL, among others, between triple quotes, and closes them on a line
+    # of their own
+    ("docstring", "python", 3.0, r"[rbfuRBFU]{0,2}(?:\"{3}|'{3})"),
+    (
+        "body",
+        "python",
+        1.0,
+        r"(?:return|raise|yield|elif|except|with|assert|pass|self\.)\b|else:|try:",
+    ),
+    # A statement keyword only counts with the SQL that must follow it (a select list, a
+    # table name and its VALUES, a SET ending in a semicolon...), which a sentence seldom
+    # supplies
+    (
+        "query",
+        "sql",
+        2.0,
+        r"(?i:SELECT\s+(?:DISTINCT\s+)?(?:\*"
+        # Columns, qualified names and calls, each maybe aliased, up to the FROM or the end
+        # of the line
+        rf"|{_SELECTED}(?:\s*,\s*{_SELECTED})*\s*(?:,[ \t]*$|;|$|FROM\b))"
+        r"|INSERT\s+INTO\s+[\w.\"`]+\s*(?:\(|VALUES\b|SELECT\b|$)"
+        r"|UPDATE\s+[\w.\"`]+\s+SET\s+[\w.\"`]+\s*="
+        r"|DELETE\s+FROM\s+[\w.\"`]+\s*(?:$|;|WHERE\b)|ALTER\s+TABLE"
+        r"|CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:UNIQUE\s+)?INDEX|TABLE|VIEW|SCHEMA|DATABASE"
+        r"|SEQUENCE|FUNCTION|TRIGGER|TYPE)\b|DROP\s+(?:TABLE|INDEX|VIEW|SCHEMA|DATABASE)\b"
+        r"|(?:BEGIN|COMMIT|ROLLBACK)(?:\s+(?:TRANSACTION|WORK))?;"
+        r"|SET\s+(?:[\w@.]+\s*(?:=|TO\b)|NAMES\b)[^;\n]*;"
+        r"|LOCK\s+TABLES\s+[\w.\"`]+\s+(?:READ|WRITE)\b|UNLOCK\s+TABLES\s*;|USE\s+\S+;"
+        r"|GRANT\s+[\w, ]+?\s+ON\s+[\w.\"`*]+\s+TO\b"
+        r"|COPY\s+[\w.\"]+\s*(?:\([^)\n]*\)\s*)?(?:FROM|TO)\s+(?:STDIN\b|STDOUT\b|E?')"
+        r"|WITH\s+\w+\s+AS\s*\()",
+    ),
+    # Only counted when some line of the sample opens a SQL statement
+    (
+        "clause",
+        "sql",
+        1.0,
+        r"(?i:(?:FROM|(?:LEFT |RIGHT |INNER |OUTER |CROSS )?JOIN)\s+[\w.\"`]+"
+        r"(?:\s+(?:AS\s+)?\w+)?\s*(?:$|[,;(]|ON\b|WHERE\b)"
+        r"|(?:WHERE|AND|OR)\s+[\w.\"`()]+\s*(?:[=<>!]|(?:NOT\s+)?(?:IN|LIKE|IS|BETWEEN)\b)"
+        r"|(?:GROUP|ORDER)\s+BY\b|LIMIT\s+\d|VALUES\s*\(|UNION(?:\s+ALL)?\s*$)"
+        r"|--(?: |$)|/\*",
+    ),
+    # Only counted when the content opens like a JSON document
+    ("member", "json", 1.0, r'"[^"\n]*"[ \t]*:|[\]}],?[ \t]*$|[\[{][ \t]*$'),
+    # YAML isn't as easily uniquely distinguishable from normal config data, but this
+    # matches keys well, and a few lines of prose outweigh one
+    ("key", "yaml", 0.5, r"(?:- )?[\w.-]+:(?: |$)|---[ \t]*$"),
+    ("other", "text", 0.5, r"\S"),
+)
+_SIGNATURE_SCAN = re.compile(
+    r"^[ \t]*(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, _, _, pattern in _LINE_SIGNATURES)
+    + ")",
+    re.MULTILINE,
+)
+_SIGNATURE_WEIGHTS = {name: (strategy, weight) for name, strategy, weight, _ in _LINE_SIGNATURES}
+
+# What opening like a JSON document weighs, and parsing as one, per line of the sample
+_JSON_OPENING = 1.5
+_JSON_PARSED = 2.0
+
+
+def _is_json_lines(content: str) -> bool:
     """
-    Detects the optimal parsing strategy explicitly by extension, falling back to structural signature.
+    Whether the first two lines of ``content`` are each a whole JSON object. A second
+    line that runs past a sample of ``SNIFF_SIZE`` characters only has to open one.
+    """
+    first_end = content.find("\n")
+    if first_end < 0:
+        return False
+    second_end = content.find("\n", first_end + 1)
+    lines = [content[:first_end]]
+    if second_end >= 0 or len(content) < SNIFF_SIZE:
+        lines.append(content[first_end + 1 : second_end if second_end >= 0 else None])
+    elif not content[first_end + 1 :].lstrip().startswith("{"):
+        return False
+    for line in lines:
+        line = line.strip()
+        if not (line.startswith("{") and line.endswith("}")):
+            return False
+        try:
+            json.loads(line)
+        except ValueError:
+            return False
+    return True
+
 
-    If no specialized structure is identified, defaults to plain text.
+def _samples(content: str, start: int, windows: int) -> list[str]:
     """
-    import os
+    The head of ``content`` from ``start`` and, if it goes on past the head, up to
+    ``windows - 1`` more windows spread evenly up to its end, each ``SNIFF_SIZE``
+    characters at most and starting at a whole line.
+    """
+    samples = [content[start : start + SNIFF_SIZE]]
+    last = len(content) - SNIFF_SIZE
+    if last <= start:
+        return samples
+    for window in range(1, windows):
+        offset = start + (last - start) * window // (windows - 1)
+        line = content.find("\n", offset, offset + SNIFF_SIZE) + 1
+        if line:
+            samples.append(content[line : offset + SNIFF_SIZE])
+    return samples
+
+
+def _scores(content: str, start: int, windows: int) -> dict[str, float]:
+    """Weighs the evidence for each strategy in the samples of ``content`` from ``start``."""
+    samples = _samples(content, start, windows)
+    found = Counter(
+        match.lastgroup for sample in samples for match in _SIGNATURE_SCAN.finditer(sample)
+    )
+
+    # Lines that look like JSON only speak for it if the content opens like JSON
+    head = samples[0]
+    opens_json = head.startswith(("{", "["))
+    if found["record"] and not (head.startswith("{") and _is_json_lines(head)):
+        found["member" if opens_json else "other"] += found.pop("record")
+    if not opens_json:
+        found["other"] += found.pop("member", 0)
+    # A FROM, WHERE or ORDER BY on its own starts many a sentence too
+    if not found["query"]:
+        found["other"] += found.pop("clause", 0)
+
+    scores = dict.fromkeys(SNIFFED_STRATEGIES, 0.0)
+    for name, lines in found.items():
+        strategy, weight = _SIGNATURE_WEIGHTS[name]  # type: ignore[index]
+        scores[strategy] += weight * lines
+    if opens_json and not scores["jsonl"]:
+        scores["json"] += _JSON_OPENING
+        if len(content) - start <= SNIFF_SIZE:
+            try:
+                json.loads(head)
+            except ValueError:
+                pass
+            else:
+                scores["json"] += _JSON_PARSED * sum(found.values())
+    return scores
+
+
+def rank_strategies(
+    content: str, filename: str | None = None, extension: str | None = None, windows: int = 1
+) -> list[tuple[str, float]]:
+    """
+    Ranks the strategies that could compress ``content``, most likely first, each with
+    its confidence; the confidences add up to 1.
+
+    A known extension (``extension``, else that of ``filename``) decides alone.
+    Otherwise a single scan of the sample ``detect_strategy`` describes scores every
+    format at once: each line counts for the format whose signature starts it (an
+    ``import``, a timestamp, a ``SELECT``, a ``key:``...), or else for plain text,
+    weighted by how seldom that signature starts a line of any other format. Content is
+    only JSON if it opens like a JSON document, and only JSON Lines if its first two
+    lines parse as objects; a SQL clause (``FROM``, ``ORDER BY``...) only counts once a
+    line opens a whole statement. Strategies with no line in their favour are left out.
+    """
+    if windows < 1:
+        raise ValueError(f"windows must be at least 1, got {windows}.")
 
     # 1. Deterministic Extension Matching
     if not extension and filename:
-        _, ext = os.path.splitext(filename)
+        _, ext = os.path.splitext(_COPY_SUFFIX.sub("", filename, count=1))
         extension = ext.lower()
 
     if extension:
@@ -37,40 +238,35 @@ def detect_strategy(
             extension = "." + extension
         mapped_strategy = EXTENSION_MAP.get(extension)
         if mapped_strategy:
-            return mapped_strategy
+            return [(mapped_strategy, 1.0)]
 
     # 2. Heuristic Structural Sniffing
-    content_stripped = content.lstrip()
-    if not content_stripped:
-        return "text"
-
-    # JSON Heuristic
-    if content_stripped.startswith("{") or content_stripped.startswith("["):
-        return "json"
-
-    # Python AST Heuristic
-    if re.search(r"^(import |from .* import |def |class )", content, flags=re.MULTILINE):
-        return "python"
-
-    # SQL Heuristic
-    if re.search(
-        r"^(SELECT|INSERT|UPDATE|DELETE|CREATE TABLE|ALTER TABLE)\b",
-        content_stripped,
-        flags=re.IGNORECASE,
-    ):
-        return "sql"
-
-    # Log Heuristic (Looking for timestamps or log levels at start of lines)
-    if re.search(
-        r"^\s*(?:\d{2,4}[-/]\d{2}[-/]\d{2}|\[?\d{4}-\d{2}-\d{2}|INFO|ERROR|WARN|DEBUG|CRITICAL|Traceback)\b",
-        content_stripped,
-        flags=re.IGNORECASE | re.MULTILINE,
-    ):
-        return "log"
-
-    # YAML Heuristic
-    if re.search(r"^[\w-]+:\s*([#\n]|.*)", content_stripped, flags=re.MULTILINE):
-        # YAML isn't as easily uniquely distinguishable from normal config data, but this matches keys well.
-        return "yaml"
-
-    return "text"
+    first = _NON_SPACE.search(content)
+    if first is None:
+        return [("text", 1.0)]
+    scores = _scores(content, first.start(), windows)
+    total = sum(scores.values())
+    # ``sorted`` is stable, so ties keep the order of ``SNIFFED_STRATEGIES``
+    ranked = sorted(
+        (strategy for strategy in SNIFFED_STRATEGIES if scores[strategy]),
+        key=lambda strategy: -scores[strategy],
+    )
+    return [(strategy, scores[strategy] / total) for strategy in ranked]
+
+
+def detect_strategy(
+    content: str, filename: str | None = None, extension: str | None = None, windows: int = 1
+) -> str:
+    """
+    Detects the optimal parsing strategy explicitly by extension, falling back to structural signature.
+
+    Only a bounded sample of the content is sniffed, so detection takes the same time
+    however large it is: its first ``SNIFF_SIZE`` characters past leading whitespace
+    and, for ``windows`` above 1, as many windows again spread evenly up to its end (2
+    adds the tail, 3 the middle and the tail). Which format opens the content is decided
+    by the head alone.
+
+    Returns the first of ``rank_strategies``. If no specialized structure is identified,
+    defaults to plain text.
+    """
+    return rank_strategies(content, filename, extension, windows)[0][0]
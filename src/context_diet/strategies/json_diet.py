@@ -42,7 +42,7 @@ class JsonDietStrategy(DietStrategy):
         Parses a massive JSON array iteratively.
         Maintains O(max(object_size)) space complexity rather than O(array_size).
         Uses pointer arithmetic to prevent O(N^2) memory trashing from string slicing.
-        
+
         Note: This manual state machine is built strictly for standard compliant JSON.
         It explicitly does not support json5, comments, or trailing commas.
         """
@@ -109,9 +109,9 @@ class JsonDietStrategy(DietStrategy):
 
             except json.JSONDecodeError:
                 # If we hit an error here, the literal array is malformed.
-                from ..interfaces import ContextBudgetExceededError
+                from ..interfaces import MalformedContentError
 
-                raise ContextBudgetExceededError("Malformed JSON array cannot be compressed.")
+                raise MalformedContentError("Malformed JSON array cannot be compressed.")
 
         # If we broke out of the loop from reaching the end of the buffer but didn't close it
         if not output.endswith("]"):
@@ -129,9 +129,9 @@ class JsonDietStrategy(DietStrategy):
         try:
             data = json.loads(content)
         except json.JSONDecodeError:
-            from ..interfaces import ContextBudgetExceededError
+            from ..interfaces import MalformedContentError
 
-            raise ContextBudgetExceededError("Malformed JSON object cannot be compressed.")
+            raise MalformedContentError("Malformed JSON object cannot be compressed.")
 
         current_max_depth = kwargs.get("max_depth", 10)
         minified = json.dumps(data, separators=(",", ":"))
@@ -0,0 +1,250 @@
+"""
+Structured log compression for logs written one JSON object per line (JSON Lines).
+"""
+
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any
+
+from context_diet.interfaces import ContextBudgetExceededError, DietStrategy
+from context_diet.streaming import chunk_text
+
+# Keys tried in order for each projected field; dotted keys reach into nested objects
+DEFAULT_FIELDS: dict[str, tuple[str, ...]] = {
+    "timestamp": ("timestamp", "@timestamp", "time", "ts", "asctime"),
+    "level": ("level", "severity", "levelname", "lvl", "log.level"),
+    "message": ("message", "msg", "event", "@message"),
+    "exception": (
+        "exception",
+        "exc_info",
+        "stack_trace",
+        "stacktrace",
+        "traceback",
+        "error",
+        "err",
+    ),
+}
+
+# Level names of error records, compared case-insensitively
+ERROR_LEVELS = frozenset(
+    {"error", "err", "fatal", "critical", "crit", "alert", "emerg", "emergency", "panic"}
+)
+# Numeric levels from this one up are errors, as in bunyan and pino (50 error, 60 fatal)
+ERROR_LEVEL_NUMBER = 50
+
+_decode = json.JSONDecoder().decode
+
+
+def _resolve_fields(overrides: Mapping[str, str | Sequence[str]] | None) -> dict[str, list[str]]:
+    fields = {role: list(keys) for role, keys in DEFAULT_FIELDS.items()}
+    for role, keys in (overrides or {}).items():
+        if role not in fields:
+            raise ValueError(f"Unknown JSON log field {role!r}; expected one of {tuple(fields)}.")
+        fields[role] = [keys] if isinstance(keys, str) else list(keys)
+    return fields
+
+
+def _error_hint(fields: Mapping[str, Sequence[str]]) -> re.Pattern[str]:
+    """
+    A search of lower-cased text that finds something in every line of an error record,
+    and in few others: a quoted error level name or exception key, or a level key set to
+    a number from 50 up.
+
+    Lines it finds nothing in are not parsed once only error records can be selected.
+    """
+
+    def names(role: str) -> str:
+        return "|".join(re.escape(key.rpartition(".")[2].lower()) for key in fields[role])
+
+    words = "|".join(sorted(ERROR_LEVELS))
+    return re.compile(
+        rf'"(?:(?:{words}|{names("exception")})"'
+        rf'|(?:{names("level")})"\s*:\s*(?:[5-9]\d|[1-9]\d\d+)\b)'
+    )
+
+
+def _lookup(record: dict[str, Any], keys: Sequence[str]) -> Any:
+    for key in keys:
+        if key in record:
+            return record[key]
+        if "." in key:
+            node: Any = record
+            for part in key.split("."):
+                if not isinstance(node, dict) or part not in node:
+                    break
+                node = node[part]
+            else:
+                return node
+    return None
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _project(line: str, fields: Mapping[str, Sequence[str]]) -> tuple[str, bool]:
+    """
+    Renders one log line as ``timestamp level message`` with the exception on the lines
+    below, and tells whether it is an error record. Lines that are not JSON objects, or
+    have none of the fields, are kept as they are.
+    """
+    stripped = line.strip()
+    if not stripped.startswith("{"):
+        return stripped, False
+    try:
+        record = _decode(stripped)
+    except ValueError:
+        return stripped, False
+    if not isinstance(record, dict):
+        return stripped, False
+
+    level = _lookup(record, fields["level"])
+    exception = _lookup(record, fields["exception"])
+    head = " ".join(
+        _text(value)
+        for value in (
+            _lookup(record, fields["timestamp"]),
+            level,
+            _lookup(record, fields["message"]),
+        )
+        if value is not None and value != ""
+    )
+    text = "\n".join(_text(value) for value in (head, exception) if value)
+    if isinstance(level, str):
+        high_value = level.lower() in ERROR_LEVELS
+    else:
+        high_value = (
+            isinstance(level, (int, float))
+            and not isinstance(level, bool)
+            and level >= ERROR_LEVEL_NUMBER
+        )
+    return text or stripped, high_value or bool(exception)
+
+
+def _hinted_lines(chunk: str, hint: re.Pattern[str]) -> Iterator[str]:
+    """
+    The lines of ``chunk`` in which ``hint`` finds something, in order.
+
+    Searching a lower-cased copy is several times faster than a case-insensitive search.
+    """
+    if chunk.isascii():
+        found = hint.finditer(chunk.lower())
+    else:
+        # Lower-casing may change the length of non-ASCII text, and with it the offsets
+        found = re.finditer(hint.pattern, chunk, re.IGNORECASE)
+    for start in sorted({chunk.rfind("\n", 0, match.start()) + 1 for match in found}):
+        end = chunk.find("\n", start)
+        yield chunk[start:] if end < 0 else chunk[start:end]
+
+
+class JsonLogDietStrategy(DietStrategy):
+    """
+    Compresses JSON Lines logs by projecting each record onto its timestamp, level,
+    message and exception, and keeping error records first, like ``LogDietStrategy``.
+
+    Lines are streamed, and a line is only parsed while it can still reach the output:
+    once regular records have filled the budget, only lines in which a search of the
+    chunk finds a trace of an error (see ``_error_hint``) are decoded.
+    """
+
+    def compress(
+        self, content: str, budget: int, token_counter: Callable[[str], int], **kwargs: Any
+    ) -> str:
+        """
+        Keeps projected records within the budget: error records (an error level, or an
+        exception field) first, then regular records from the top.
+
+        Keyword Args:
+            fields (Mapping[str, str | Sequence[str]]): Keys to read the ``"timestamp"``,
+                ``"level"``, ``"message"`` and ``"exception"`` of a record from, tried
+                in order, for the roles that differ from ``DEFAULT_FIELDS``. A dotted
+                key such as ``"log.level"`` reaches into nested objects. Every other
+                key is dropped.
+        """
+        return self.compress_stream(chunk_text(content), budget, token_counter, **kwargs)
+
+    def compress_stream(
+        self,
+        chunks: Iterable[str],
+        budget: int,
+        token_counter: Callable[[str], int],
+        **kwargs: Any,
+    ) -> str:
+        """
+        Streaming counterpart of ``compress``, returning the same output.
+
+        ``chunks`` must be newline-terminated (see ``context_diet.streaming.iter_text``).
+        Only what can still reach the output is kept, and reading stops at the first
+        error record that no longer fits.
+        """
+        fields = _resolve_fields(kwargs.get("fields"))
+        hint = _error_hint(fields)
+
+        # The log is returned verbatim if it fits, as in ``LogDietStrategy``
+        whole: list[str] | None = []
+        whole_tokens = 0
+        errors: list[str] = []
+        error_tokens = 0
+        regular: list[tuple[str, int]] = []
+        regular_tokens = 0
+        wants_regular = True
+        done = False
+
+        for chunk in chunks:
+            # We encode and decode to force stripping of surrogate characters or anomalies
+            if not chunk.isascii():
+                chunk = chunk.encode("utf-8", errors="ignore").decode("utf-8")
+            if whole is not None:
+                whole_tokens += token_counter(chunk)
+                if whole_tokens <= budget:
+                    whole.append(chunk)
+                else:
+                    whole = None
+            if done:
+                if whole is None:
+                    break
+                continue
+
+            lines: Iterable[str]
+            if wants_regular:
+                lines = chunk.split("\n")
+            else:
+                lines = _hinted_lines(chunk, hint)
+
+            for line in lines:
+                if not line or line.isspace():
+                    continue
+                text, high_value = _project(line, fields)
+                if not high_value and not wants_regular:
+                    continue
+                item_tokens = token_counter(text) + 1  # +1 for newline injection
+                if high_value:
+                    if error_tokens + item_tokens > budget:
+                        done = True
+                        break
+                    errors.append(text)
+                    error_tokens += item_tokens
+                elif regular_tokens + item_tokens > budget:
+                    wants_regular = False
+                else:
+                    regular.append((text, item_tokens))
+                    regular_tokens += item_tokens
+
+        if whole is not None:
+            return "".join(whole)
+
+        output = errors
+        tokens_used = error_tokens
+        # Regular records pad the output only if every error record fitted
+        if not done:
+            for text, item_tokens in regular:
+                if tokens_used + item_tokens > budget:
+                    break
+                output.append(text)
+                tokens_used += item_tokens
+        if not output:
+            raise ContextBudgetExceededError("Single log record exceeds total token budget.")
+        return "\n".join(output)
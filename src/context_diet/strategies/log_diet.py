@@ -1,85 +1,1336 @@
+import hashlib
+import os
 import re
-from collections.abc import Callable
-from typing import Any
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import accumulate, chain
+from typing import IO, Any
 
-from context_diet.interfaces import DietStrategy
+from context_diet.interfaces import ContextBudgetExceededError, DietStrategy
+from context_diet.strategies.log_index import (
+    INDEX_SUFFIX,
+    LEVELS,
+    LogIndex,
+    head_digest,
+    stamp_key,
+)
+from context_diet.strategies.log_templates import LineShape, LineTally, TemplateMiner, line_shapes
+from context_diet.streaming import DEFAULT_CHUNK_SIZE, chunk_text, iter_text
+
+# Group log clusters using standard timestamp headers (YYYY-MM-DD or standard syslog format).
+# A block starts at a line that begins with:
+# 1. A date format like 2024-01-01 or 24/01/01
+# 2. A standard log level like INFO, ERROR, WARN, DEBUG
+# 3. An ISO8601 timestamp [2024- (or any other bracketed prefix)
+_BLOCK_HEADER = (
+    r"\d{2,4}[-/]\d{2}[-/]\d{2}|\[?\d{4}-\d{2}-\d{2}|(?:INFO|ERROR|WARN|DEBUG|CRITICAL)\b|\["
+)
+# \n(?=...) matches a newline ONLY IF a block header follows it
+_BLOCK_SPLIT = re.compile(rf"\n(?={_BLOCK_HEADER})", re.IGNORECASE)
+_BLOCK_START = re.compile(_BLOCK_HEADER, re.IGNORECASE)
+# Every alternative lies within one line, so a block can be classified piece by piece
+_HIGH_VALUE_MARKERS = (
+    "Traceback (most recent call last):",
+    "Error:",
+    "Exception:",
+    "Fatal",
+    "fatal",
+)
+_HIGH_VALUE = re.compile("|".join(map(re.escape, _HIGH_VALUE_MARKERS)))
+
+# A line-leading ISO8601 date and time, the only timestamps ``mode="window"`` understands
+_TIMESTAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})", re.MULTILINE)
+
+# Terminal escape sequences: CSI (colors, cursor and erase commands), OSC (window titles,
+# hyperlinks) up to its terminator, and the shorter escapes such as character set
+# selection. None is taken to span lines, so that a log can be cleaned line by line as
+# well as chunk by chunk
+_TERMINAL_ESCAPE = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b\n]*(?:\x07|\x1b\\)?|[ -/]*[0-~])"
+)
+# A line that a carriage return rewinds for overwriting, as progress bars redraw in place;
+# anchored at line starts so that lines without one are scanned once
+_OVERWRITTEN_LINE = re.compile(r"^[^\n\r]*\r[^\n]*", re.MULTILINE)
+# A timestamp that a logger or CI runner wrote ahead of a redrawn line, with its separator
+_LINE_STAMP = re.compile(r"\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}\S*[ \t]*")
+
+# Fields read from a header line for the sidecar index: the timestamp leading it, as
+# ``_TIMESTAMP`` reads it, and the first level name in it, the block's severity
+_HEADER_FIELDS = (
+    r"(?-i:(\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}))?"
+    r"(?:[^\n]*?\b(TRACE|DEBUG|INFO|NOTICE|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b)?"
+)
+_FIRST_HEADER = re.compile(_HEADER_FIELDS, re.IGNORECASE)
+# A block boundary as ``_BLOCK_SPLIT`` finds it, followed by the header's fields; lazily
+# scanning only header lines for a level name costs next to nothing over the split
+_NEXT_HEADER = re.compile(rf"\n(?={_BLOCK_HEADER}){_HEADER_FIELDS}", re.IGNORECASE)
+_LEVEL_CODES = {
+    name: LEVELS.index(level)
+    for level, names in (
+        ("debug", ("trace", "debug")),
+        ("info", ("info", "notice")),
+        ("warning", ("warn", "warning")),
+        ("error", ("error",)),
+        ("critical", ("critical", "fatal")),
+    )
+    for name in names
+}
+
+MODES = ("errors", "head", "tail", "window", "templates")
+
+# Bytes read per step when scanning a file backwards for ``mode="tail"``
+TAIL_READ_SIZE = 1 << 16
+
+# Characters of log handed to a worker process at a time when ``workers > 1``
+PARALLEL_STRETCH_SIZE = 4 << 20
+
+# Modes whose selection can be split across worker processes
+PARALLEL_MODES = ("errors", "window", "templates")
+
+# Modes that ``compress_file`` can select through a sidecar index, when given ``index``
+INDEXED_MODES = ("errors", "window")
+# Bytes of regular blocks first read through the index, doubled with every read
+INDEXED_READ_SIZE = 1 << 16
+
+# Tokens of raw text an error block may reach before it is folded, when ``fold=True``
+FOLDED_BLOCK_LIMIT = 1 << 18
+# Longest run of lines, e.g. the frames of a mutual recursion, collapsed when it repeats
+FOLDED_PERIOD = 16
+
+# A Python traceback frame: file, line number and function
+_FRAME = re.compile(r'\s*File "([^"]*)", line (\d+), in (.*)')
+
+
+def _overwritten(match: re.Match[str]) -> str:
+    """
+    The text a terminal shows for a line whose carriage returns rewind it, behind the
+    timestamp leading the line if there is one: the program redrawing the line never
+    wrote it, and blocks and windows are told apart by it.
+    """
+    segments = match[0].split("\r")
+    stamp = _LINE_STAMP.match(segments[0])
+    prefix = ""
+    if stamp is not None:
+        prefix = stamp[0]
+        segments[0] = segments[0][stamp.end() :]
+    visible = segments[-1]
+    # Earlier writes show wherever no later, shorter one covered them
+    for segment in reversed(segments[:-1]):
+        if len(segment) > len(visible):
+            visible += segment[len(visible) :]
+    return prefix + visible
+
+
+def _clean_terminal(text: str) -> str:
+    """
+    Strips terminal escape sequences from ``text`` and resolves each carriage-return
+    overwrite to the line a terminal would end up showing. Both are single linear passes,
+    skipped by a search for the control character when it does not occur.
+    """
+    if "\x1b" in text:
+        text = _TERMINAL_ESCAPE.sub("", text)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+        if "\r" in text:
+            text = _OVERWRITTEN_LINE.sub(_overwritten, text)
+    return text
+
+
+def _cleaned(chunks: Iterable[str]) -> Iterator[str]:
+    for chunk in chunks:
+        # We encode and decode to force stripping of surrogate characters or anomalies
+        if not chunk.isascii():
+            chunk = chunk.encode("utf-8", errors="ignore").decode("utf-8")
+        yield _clean_terminal(chunk)
+
+
+class _BlockSplitter:
+    """
+    Assembles log blocks from line-aligned chunks and hands each to ``_admit``.
+
+    Text of the open block is dropped as soon as it alone exceeds the budget (it is
+    re-counted at doubling lengths, which bounds both the text held and the counting
+    cost); only its classification is still tracked, and it is admitted as ``None``.
+    Subclasses decide what to keep and set ``done`` once no later input can change
+    their ``result``, or clear ``wants_regular`` once only high-value blocks can.
+
+    Without regular blocks to collect, only the blocks in which a literal search of the
+    chunk finds a high-value marker (and the two that may span chunks) are assembled and
+    classified; the rest are merely counted, which skips the per-block work for most of
+    a large log.
+    """
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        self.budget = budget
+        self.token_counter = token_counter
+        self.done = False
+        self.wants_regular = True
+        # Whether this selection is over one stretch of log, to be absorbed by another
+        self.part = False
+        # Blocks seen so far, including the open one
+        self.blocks = 0
+        # Tokens the open block may reach before its text is dropped
+        self._open_limit = budget
+        self._open: list[str] | None = None
+        self._open_chars = 0
+        self._open_high = False
+        self._check_at = 0
+
+    def feed(self, chunk: str) -> None:
+        pieces = _BLOCK_SPLIT.split(chunk)
+        if self._open is not None and _BLOCK_START.match(chunk):
+            # The previous chunk's final newline is the boundary; it belongs to no block
+            self._close(drop_newline=True)
+        kept: Iterable[int] = range(len(pieces))
+        if len(pieces) > 2 and not self.wants_regular:
+            # The first and last pieces may join blocks that span chunks
+            kept = sorted({0, len(pieces) - 1, *_marker_pieces(chunk, pieces)})
+        previous = -1
+        for i in kept:
+            piece = pieces[i]
+            if i or self._open is None:
+                if i:
+                    self._close(drop_newline=False)
+                # Blocks skipped since the previous piece are counted all the same
+                self.blocks += i - previous
+                if self.done:
+                    return
+                self._open = []
+                self._open_chars = 0
+                self._open_high = False
+                self._check_at = self._open_limit
+            self._extend(piece)
+            previous = i
+
+    def finish(self) -> None:
+        if self._open is not None:
+            self._close(drop_newline=False)
+
+    def result(self) -> str:
+        raise NotImplementedError
+
+    def absorb(self, part: Any) -> None:
+        """Continues with the selection ``part`` made over the next stretch of log."""
+        raise NotImplementedError
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Parts come back from worker processes; the parent has its own counter
+        state = self.__dict__.copy()
+        state["token_counter"] = None
+        return state
+
+    def _admit(self, block: str | None, item_tokens: int, high_value: bool) -> None:
+        raise NotImplementedError
+
+    def _condense(self, block: str) -> str | None:
+        """The text a closed block is selected as, or None if it is too large to be."""
+        return block
+
+    def _extend(self, piece: str) -> None:
+        assert self._open is not None
+        self._open_high = self._open_high or _HIGH_VALUE.search(piece) is not None
+        if self._open_chars < 0:
+            return
+        self._open.append(piece)
+        self._open_chars += len(piece)
+        if self._open_chars > self._check_at:
+            if self.token_counter("".join(self._open)) > self._open_limit:
+                self._open = []
+                self._open_chars = -1
+            else:
+                self._check_at *= 2
+
+    def _close(self, drop_newline: bool) -> None:
+        assert self._open is not None
+        block = None
+        item_tokens = self.budget + 1
+        # A block that cannot be selected is not worth counting
+        if self._open_chars >= 0 and (self._open_high or self.wants_regular):
+            block = "".join(self._open)
+            if drop_newline:
+                block = block[:-1]
+            block = self._condense(block)
+        if block is not None:
+            item_tokens = self.token_counter(block) + 1  # +1 for newline injection
+        self._open = None
+        self._admit(block, item_tokens, self._open_high)
+
+
+def _marker_positions(chunk: str) -> Iterator[int]:
+    """
+    Offsets of the high-value markers in ``chunk``, marker by marker.
+
+    Searching for each literal with ``str.find`` is several times faster than scanning a
+    large chunk with the alternation, which has no literal prefix to skip ahead with.
+    """
+    for marker in _HIGH_VALUE_MARKERS:
+        pos = chunk.find(marker)
+        while pos >= 0:
+            yield pos
+            pos = chunk.find(marker, pos + len(marker))
+
+
+def _marker_pieces(chunk: str, pieces: list[str]) -> set[int]:
+    """Indexes of the ``pieces`` (``chunk`` split at block starts) holding a marker."""
+    ends = list(accumulate(map(len, pieces)))
+    # Piece i ends at ends[i] + i in the chunk, as each split consumed one newline
+    return {
+        bisect_right(range(len(ends)), pos, key=lambda i: ends[i] + i)
+        for pos in _marker_positions(chunk)
+    }
+
+
+def _joined(blocks: Iterable[str]) -> str:
+    blocks = list(blocks)
+    output = "\n".join(blocks)
+    if not blocks:
+        # Not even the first block fits
+        raise ContextBudgetExceededError("Single log block exceeds total token budget.")
+    return output.strip()
+
+
+class _ErrorFirstSelector(_BlockSplitter):
+    """
+    ``mode="errors"``: high-value blocks in file order, then regular blocks in file order.
+
+    Selection stops at the first block that does not fit, so only a prefix of each kind
+    can ever be emitted: error blocks are kept while they fit the budget together and
+    regular blocks while they fit on their own. The first error block that does not fit
+    fixes the output.
+
+    In a ``part``, every block that could still be selected is also recorded in
+    ``events``, so that it can be replayed into the selector of the stretches before
+    (see ``absorb``): whatever it rejected locally would be rejected after them.
+    """
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        super().__init__(budget, token_counter)
+        self.errors: list[str] = []
+        self.error_tokens = 0
+        self.regular: list[tuple[str, int]] = []
+        self.regular_tokens = 0
+        self.events: list[tuple[str | None, int, bool]] = []
+
+    def absorb(self, part: "_ErrorFirstSelector") -> None:
+        self.blocks += part.blocks
+        for event in part.events:
+            if self.done:
+                break
+            self._admit(*event)
+
+    def _admit(self, block: str | None, item_tokens: int, high_value: bool) -> None:
+        if self.part and (high_value or self.wants_regular):
+            self.events.append((block, item_tokens, high_value))
+        if high_value:
+            if block is None or self.error_tokens + item_tokens > self.budget:
+                self.done = True
+            else:
+                self.errors.append(block)
+                self.error_tokens += item_tokens
+        elif self.wants_regular:
+            if block is None or self.regular_tokens + item_tokens > self.budget:
+                self.wants_regular = False
+            else:
+                self.regular.append((block, item_tokens))
+                self.regular_tokens += item_tokens
+
+    def result(self) -> str:
+        output = list(self.errors)
+        tokens_used = self.error_tokens
+        # Regular context pads the output only if every error block fitted
+        if not self.done:
+            for block, item_tokens in self.regular:
+                if tokens_used + item_tokens > self.budget:
+                    break
+                output.append(block)
+                tokens_used += item_tokens
+        return _joined(output)
+
+
+class _Trace:
+    """The occurrences of one traceback fingerprint: their count and last timestamp."""
+
+    __slots__ = ("count", "last")
+
+    def __init__(self, last: str | None) -> None:
+        self.count = 1
+        self.last = last
+
+
+def _block_stamp(block: str) -> str | None:
+    match = _TIMESTAMP.match(block)
+    return None if match is None else f"{match[1]} {match[2]}"
+
+
+def _fingerprint(block: str) -> bytes | None:
+    """
+    Digest of the frames (file, line, function) and exception types of the tracebacks in
+    ``block``, or None if it holds none. Messages are left out, as they usually carry
+    ids and values that differ between occurrences of one failure.
+    """
+    if "Traceback (most recent call last):" not in block:
+        return None
+    parts: list[object] = []
+    in_trace = False
+    for line in block.split("\n"):
+        if line.startswith("Traceback (most recent call last):"):
+            in_trace = True
+        elif in_trace and (frame := _FRAME.match(line)) is not None:
+            parts.append(frame.groups())
+        elif in_trace and line and not line[0].isspace():
+            # The exception line closes the traceback; chained ones open another
+            parts.append(line.partition(":")[0])
+            in_trace = False
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).digest()
+
+
+def _collapse_repeats(block: str) -> str:
+    """
+    Collapses indented runs of up to ``FOLDED_PERIOD`` lines repeated three or more times
+    in a row, such as the frames of a deep recursion, into one copy and a note in the
+    words Python itself uses for repeated frames.
+    """
+    lines = block.split("\n")
+    if len(lines) < 3:
+        return block
+    output: list[str] = []
+    i = 0
+    while i < len(lines):
+        best_period = best_repeats = 0
+        for period in range(1, FOLDED_PERIOD + 1):
+            unit = lines[i : i + period]
+            if len(unit) < period or not all(line[:1].isspace() for line in unit):
+                break
+            repeats = 1
+            while lines[i + repeats * period : i + (repeats + 1) * period] == unit:
+                repeats += 1
+            if repeats >= 3 and repeats * period > best_repeats * best_period:
+                best_period, best_repeats = period, repeats
+        if not best_repeats:
+            output.append(lines[i])
+            i += 1
+            continue
+        output.extend(lines[i : i + best_period])
+        indent = lines[i][: len(lines[i]) - len(lines[i].lstrip())]
+        noun = "line" if best_period == 1 else f"{best_period} lines"
+        output.append(f"{indent}[Previous {noun} repeated {best_repeats - 1} more times]")
+        i += best_period * best_repeats
+    return "\n".join(output)
+
+
+class _FoldingSelector(_ErrorFirstSelector):
+    """
+    ``fold=True``: error-first selection in which each distinct traceback is kept once.
+
+    Tracebacks are told apart by ``_fingerprint``; later occurrences only add to the count
+    and time range appended to the first line of the one kept. Repeated runs of frames are
+    collapsed (see ``_collapse_repeats``) before blocks are counted, so an error block may
+    hold up to ``FOLDED_BLOCK_LIMIT`` tokens of raw text. The whole log is read, as counts
+    are only known at its end; once an unseen traceback no longer fits, only the
+    occurrences of those kept are still counted.
+
+    A ``part`` records only the first occurrence of each traceback in ``events``; the
+    later ones are tallied in ``repeats`` by fingerprint, with their count and last
+    timestamp, and added to the traces kept once the events are replayed.
+    """
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        super().__init__(budget, token_counter)
+        self._open_limit = max(budget, FOLDED_BLOCK_LIMIT)
+        self.traces: dict[bytes, _Trace] = {}
+        self.folded: list[_Trace | None] = []
+        # Whether an error block no longer fitted
+        self.full = False
+        # The tracebacks a part has recorded, and their occurrences since, if any
+        self.repeats: dict[bytes, _Trace | None] = {}
+
+    def absorb(self, part: "_ErrorFirstSelector") -> None:
+        assert isinstance(part, _FoldingSelector)
+        super().absorb(part)
+        for key, seen in part.repeats.items():
+            trace = self.traces.get(key)
+            if seen is not None and trace is not None:
+                trace.count += seen.count
+                trace.last = seen.last or trace.last
+
+    def _condense(self, block: str) -> str | None:
+        if self.token_counter(block) > self._open_limit:
+            return None
+        return _collapse_repeats(block)
+
+    def _admit(self, block: str | None, item_tokens: int, high_value: bool) -> None:
+        if not high_value:
+            super()._admit(block, item_tokens, high_value)
+            return
+        key = None if block is None else _fingerprint(block)
+        if self.part:
+            self._record(block, item_tokens, key)
+        trace = None if key is None else self.traces.get(key)
+        if trace is not None:
+            assert block is not None
+            trace.count += 1
+            trace.last = _block_stamp(block) or trace.last
+        elif self.full:
+            return
+        elif block is None or self.error_tokens + item_tokens > self.budget:
+            self.full = True
+            self.wants_regular = False
+        else:
+            self.errors.append(block)
+            self.error_tokens += item_tokens
+            if key is not None:
+                trace = self.traces[key] = _Trace(_block_stamp(block))
+            self.folded.append(trace)
+
+    def _record(self, block: str | None, item_tokens: int, key: bytes | None) -> None:
+        if key is None or key not in self.repeats:
+            self.events.append((block, item_tokens, True))
+            if key is not None:
+                self.repeats[key] = None
+            return
+        assert block is not None
+        seen = self.repeats[key]
+        if seen is None:
+            self.repeats[key] = _Trace(_block_stamp(block))
+        else:
+            seen.count += 1
+            seen.last = _block_stamp(block) or seen.last
+
+    def result(self) -> str:
+        output: list[str] = []
+        tokens_used = 0
+        for block, trace in zip(self.errors, self.folded, strict=True):
+            if trace is not None and trace.count > 1:
+                first_line, newline, rest = block.partition("\n")
+                first = _block_stamp(block)
+                last = f", last {trace.last}" if trace.last and trace.last != first else ""
+                block = f"{first_line} [x{trace.count}{last}]{newline}{rest}"
+            item_tokens = self.token_counter(block) + 1
+            if tokens_used + item_tokens > self.budget:
+                # The counts lengthened the blocks past the budget
+                return _joined(output)
+            output.append(block)
+            tokens_used += item_tokens
+        # Regular context pads the output only if every error block fitted
+        if not self.full:
+            for block, item_tokens in self.regular:
+                if tokens_used + item_tokens > self.budget:
+                    break
+                output.append(block)
+                tokens_used += item_tokens
+        return _joined(output)
+
+
+class _HeadSelector(_BlockSplitter):
+    """``mode="head"``: the leading blocks that fit, stopping at the first that does not."""
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        super().__init__(budget, token_counter)
+        self.kept: list[str] = []
+        self.tokens_used = 0
+
+    def _admit(self, block: str | None, item_tokens: int, high_value: bool) -> None:
+        if block is None or self.tokens_used + item_tokens > self.budget:
+            self.done = True
+        else:
+            self.kept.append(block)
+            self.tokens_used += item_tokens
+
+    def result(self) -> str:
+        return _joined(self.kept)
+
+
+class _TailSelector(_BlockSplitter):
+    """``mode="tail"``: the trailing blocks that fit, as a ring buffer of O(budget) text."""
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        super().__init__(budget, token_counter)
+        self.kept: deque[tuple[str, int]] = deque()
+        self.tokens_used = 0
+
+    def _admit(self, block: str | None, item_tokens: int, high_value: bool) -> None:
+        if block is None:
+            # Nothing before an oversized block can be part of a contiguous tail
+            self.kept.clear()
+            self.tokens_used = 0
+            return
+        self.kept.append((block, item_tokens))
+        self.tokens_used += item_tokens
+        while self.tokens_used > self.budget:
+            self.tokens_used -= self.kept.popleft()[1]
+
+    def result(self) -> str:
+        return _joined(block for block, _ in self.kept)
+
+
+class _TemplateSelector(_BlockSplitter):
+    """
+    ``mode="templates"``: every line mined into a template (see ``TemplateMiner``), and
+    each template emitted once with its count and first/last timestamps.
+
+    Works line by line rather than on assembled blocks, so no block text is held. A
+    template counts as high-value if any of its lines sat in a high-value block; those
+    templates are packed first, then the rest in order of first appearance, skipping any
+    that do not fit. The output lists the packed templates in order of first appearance.
+    """
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        super().__init__(budget, token_counter)
+        self.tallies = [LineTally()]
+        self._open_shapes: set[LineShape] = set()
+
+    def feed(self, chunk: str) -> None:
+        # Offsets of the lines with high-value markers
+        high_starts = {chunk.rfind("\n", 0, pos) + 1 for pos in _marker_positions(chunk)}
+        add = self.tallies[-1].add
+        start = 0
+        for line, shape in zip(chunk.split("\n"), line_shapes(chunk), strict=True):
+            line_start, start = start, start + len(line) + 1
+            if not line or line.isspace():
+                continue
+            if not self.blocks or _BLOCK_START.match(line):
+                if self._open_high:
+                    self.finish()
+                else:
+                    self._open_shapes.clear()
+                self.blocks += 1
+            self._open_shapes.add(add(line, shape))
+            if line_start in high_starts:
+                self._open_high = True
+
+    def finish(self) -> None:
+        if self._open_high:
+            for entry in self._open_shapes:
+                entry.high = True
+            self._open_high = False
+        self._open_shapes.clear()
+
+    def absorb(self, part: "_TemplateSelector") -> None:
+        self.blocks += part.blocks
+        self.tallies.extend(part.tallies)
+
+    def result(self) -> str:
+        miner = TemplateMiner()
+        for tally in self.tallies:
+            miner.add_tally(tally)
+        ranked = sorted(miner.templates, key=lambda t: (not t.high, t.order))
+        kept: list[tuple[int, str]] = []
+        tokens_used = 0
+        for template in ranked:
+            if tokens_used >= self.budget:
+                break
+            line = template.render()
+            item_tokens = self.token_counter(line) + 1  # +1 for newline injection
+            if tokens_used + item_tokens <= self.budget:
+                kept.append((template.order, line))
+                tokens_used += item_tokens
+        kept.sort()
+        return _joined(line for _, line in kept)
+
+
+_SELECTORS: dict[str, type[_BlockSplitter]] = {
+    "errors": _ErrorFirstSelector,
+    "head": _HeadSelector,
+    "tail": _TailSelector,
+    "window": _ErrorFirstSelector,
+    "templates": _TemplateSelector,
+}
+
+
+class _Verbatim:
+    """
+    Keeps what the verbatim return and the plain-text fallback need from the chunks of a
+    log: the chunks while they fit the budget, and the first ``budget * 5`` characters.
+    """
+
+    def __init__(self, budget: int, token_counter: Callable[[str], int]) -> None:
+        self.budget = budget
+        self.token_counter = token_counter
+        # Like the default heuristic, the token counter is taken never to charge the parts
+        # of a text more than the whole, so the copy can be dropped once its chunks alone
+        # cost more than the budget
+        self.whole: list[str] | None = []
+        self.whole_tokens = 0
+        self.head: list[str] = []
+        self.head_room = budget * 5
+
+    def track(self, chunks: Iterable[str]) -> Iterator[str]:
+        for chunk in chunks:
+            if self.whole is not None:
+                self.whole_tokens += self.token_counter(chunk)
+                if self.whole_tokens <= self.budget:
+                    self.whole.append(chunk)
+                else:
+                    self.whole = None
+            if self.head_room > 0:
+                self.head.append(chunk[: self.head_room])
+                self.head_room -= len(self.head[-1])
+            yield chunk
+
+
+def _last_block_start(text: str) -> int:
+    """Offset of the last line of ``text`` that opens a block, or 0 if none past the first."""
+    # The final newline ends the last line rather than starting another
+    end = len(text) - 1
+    while True:
+        start = text.rfind("\n", 0, end) + 1
+        if not start or _BLOCK_START.match(text, start):
+            return start
+        end = start - 1
+
+
+def _stretches(chunks: Iterable[str], size: int) -> Iterator[str]:
+    """
+    Regroups line-aligned chunks into stretches of about ``size`` characters that each
+    end right before a block starts, so that no block straddles two stretches.
+
+    The boundary is found as the split finds it: a newline followed by a block header.
+    That newline belongs to no block and is dropped; the last stretch keeps its ending.
+    A block longer than ``size`` is held until it ends.
+    """
+    pending: list[str] = []
+    pending_size = 0
+    cut_at = size
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < cut_at:
+            continue
+        text = "".join(pending)
+        cut = _last_block_start(text)
+        if cut:
+            yield text[: cut - 1]
+            pending = [text[cut:]]
+            pending_size = len(pending[0])
+            cut_at = size
+        else:
+            # Look again once the block has doubled, not on every chunk
+            pending = [text]
+            cut_at = pending_size * 2
+    text = "".join(pending)
+    if text:
+        yield text
+
+
+def _select_stretch(
+    kind: type[_BlockSplitter], text: str, budget: int, token_counter: Callable[[str], int]
+) -> _BlockSplitter:
+    """Worker process entry point: the selection a ``kind`` of selector makes over one stretch."""
+    selector = kind(budget, token_counter)
+    selector.part = True
+    selector.feed(text)
+    if not selector.done:
+        selector.finish()
+    return selector
+
+
+def _select_parallel(
+    stretches: Iterator[str],
+    kind: type[_BlockSplitter],
+    budget: int,
+    token_counter: Callable[[str], int],
+    workers: int,
+) -> _BlockSplitter:
+    """
+    Runs the selection over stretches in a process pool and absorbs the parts in log
+    order, which gives the serial selection exactly. At most ``2 * workers`` stretches
+    are in flight, and none is submitted once the selection is settled.
+    """
+    selector = kind(budget, token_counter)
+    first = next(stretches, None)
+    second = next(stretches, None)
+    if first is None or second is None:
+        # A single stretch is not worth a pool
+        if first is not None:
+            selector.feed(first)
+            if not selector.done:
+                selector.finish()
+        return selector
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future[_BlockSplitter]] = deque()
+        for text in chain((first, second), stretches):
+            pending.append(pool.submit(_select_stretch, kind, text, budget, token_counter))
+            if len(pending) > 2 * workers:
+                selector.absorb(pending.popleft().result())
+                if selector.done:
+                    break
+        while pending and not selector.done:
+            selector.absorb(pending.popleft().result())
+        for future in pending:
+            future.cancel()
+        if pending:
+            # Settled early. Each stretch opens with a block, so the count is past one
+            # whichever stretch it settled in, as the serial count would be
+            selector.blocks += 1
+    return selector
+
+
+def _time_key(value: str | datetime) -> str:
+    """Normalizes a ``since``/``until`` bound to the ``YYYY-MM-DD HH:MM:SS`` sort key."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _last_stamp(chunk: str) -> str | None:
+    """Sort key of the last timestamped line in ``chunk``, searching from its end."""
+    size = 4096
+    while True:
+        # Start on a line boundary so that a mid-line date is never taken for a header
+        start = 0 if size >= len(chunk) else chunk.rfind("\n", 0, len(chunk) - size) + 1
+        found = deque(_TIMESTAMP.finditer(chunk, start), maxlen=1)
+        if found or start == 0:
+            return f"{found[0].group(1)} {found[0].group(2)}" if found else None
+        size *= 16
+
+
+def _first_at_or_after(chunk: str, key: str) -> int:
+    """Offset of the first line in ``chunk`` stamped ``key`` or later (known to exist)."""
+    for match in _TIMESTAMP.finditer(chunk):
+        if f"{match.group(1)} {match.group(2)}" >= key:
+            return match.start()
+    raise AssertionError("no line is stamped at or after the key")
+
+
+def _window(chunks: Iterable[str], since: str | None, until: str | None) -> Iterator[str]:
+    """
+    Narrows line-aligned chunks to the lines from the first one stamped ``since`` or later
+    up to (excluding) the first one stamped ``until`` or later.
+
+    Lines without a timestamp belong to the block above them, so the window's edges are
+    always timestamped lines. The log is taken to be in chronological order: a chunk
+    whose last timestamp is before a bound is passed over without scanning its lines.
+    """
+    for chunk in chunks:
+        if since is not None:
+            last = _last_stamp(chunk)
+            if last is None or last < since:
+                continue
+            chunk = chunk[_first_at_or_after(chunk, since) :]
+            since = None
+        if until is not None:
+            last = _last_stamp(chunk)
+            if last is not None and last >= until:
+                end = _first_at_or_after(chunk, until)
+                if end:
+                    yield chunk[:end]
+                return
+        yield chunk
+
+
+def _level_floor(mode: str, level: str | None) -> int | None:
+    """Code in ``LEVELS`` of the lowest severity kept for ``level``, or None to keep all."""
+    if level is None:
+        return None
+    if mode not in INDEXED_MODES:
+        raise ValueError("level applies to the 'errors' and 'window' log modes.")
+    if level.lower() not in LEVELS[1:]:
+        raise ValueError(f"Unknown log level {level!r}; expected one of {LEVELS[1:]}.")
+    return LEVELS.index(level.lower())
+
+
+def _leveled(chunks: Iterable[str], floor: int) -> Iterator[str]:
+    """
+    Narrows cleaned, line-aligned chunks to the blocks whose severity has code ``floor``
+    or higher, read from the first level name in the header line as the sidecar index
+    records it (see ``_index_chunk``). A block without a level name is dropped.
+    """
+    kept: bool | None = None
+    for chunk in chunks:
+        heads = [(match.start() + 1, match[2]) for match in _NEXT_HEADER.finditer(chunk)]
+        # Whatever precedes the first header is the first block
+        if kept is None or _BLOCK_START.match(chunk):
+            first = _FIRST_HEADER.match(chunk)
+            assert first is not None
+            heads.insert(0, (0, first[2]))
+        pieces = []
+        start = 0
+        for head, level in heads:
+            if kept and head > start:
+                pieces.append(chunk[start:head])
+            kept = level is not None and _LEVEL_CODES[level.lower()] >= floor
+            start = head
+        if kept:
+            pieces.append(chunk[start:])
+        if pieces:
+            yield "".join(pieces)
+
+
+def _seek_since(handle: IO[bytes], since: str) -> int:
+    """
+    Binary-searches the byte offset of the first line stamped ``since`` or later.
+
+    Each probe seeks to an offset, skips to the next line start and reads lines until one
+    carries a timestamp, so a search over a multi-gigabyte log reads a few dozen short
+    runs of lines. The handle's current position is taken as the start of the log.
+    """
+    base = handle.tell()
+    end = handle.seek(0, os.SEEK_END)
+
+    def stamp_after(offset: int) -> tuple[int, str | None]:
+        # Seeking one byte back lands on the newline ending the previous line, if any
+        handle.seek(offset - 1 if offset > base else base)
+        if offset > base:
+            handle.readline()
+        while line := handle.readline():
+            match = _TIMESTAMP.match(_clean_terminal(line.decode("utf-8", errors="ignore")))
+            if match:
+                return handle.tell() - len(line), f"{match[1]} {match[2]}"
+        return end, None
+
+    lo, hi = base, end
+    while lo < hi:
+        mid = (lo + hi) // 2
+        line_start, stamp = stamp_after(mid)
+        if stamp is not None and stamp < since:
+            # Every offset up to this line probes the same timestamp
+            lo = line_start + 1
+        else:
+            hi = mid
+    return stamp_after(lo)[0]
+
+
+def _read_tail(
+    handle: IO[bytes], budget: int, token_counter: Callable[[str], int], read_size: int
+) -> str:
+    """
+    ``mode="tail"`` on a seekable binary file, reading backwards from its end.
+
+    Lines are grouped into blocks exactly as the forward split does (a block starts at a
+    header line), newest first, until a block no longer fits. Reading stops there, or as
+    soon as the block being assembled alone exceeds the budget, so only the tail's bytes
+    plus one read step are ever held. Splitting the raw bytes at newlines is safe for
+    UTF-8, whose multi-byte sequences never contain that byte.
+    """
+    base = handle.tell()
+    pos = handle.seek(0, os.SEEK_END)
+    kept: list[str] = []
+    tokens_used = 0
+    # Lines of the block being assembled, newest first
+    group: list[str] = []
+    group_chars = 0
+    check_at = budget
+    carry = b""
+
+    def close_group() -> bool:
+        nonlocal tokens_used, group_chars, check_at
+        block = "\n".join(reversed(group))
+        item_tokens = token_counter(block) + 1  # +1 for newline injection
+        if tokens_used + item_tokens > budget:
+            return False
+        kept.append(block)
+        tokens_used += item_tokens
+        group.clear()
+        group_chars = 0
+        check_at = budget
+        return True
+
+    while pos > base:
+        size = min(read_size, pos - base)
+        pos -= size
+        handle.seek(pos)
+        lines = (handle.read(size) + carry).split(b"\n")
+        # The first line may continue before this step, unless the start was reached
+        carry = lines.pop(0) if pos > base else b""
+        for raw in reversed(lines):
+            line = _clean_terminal(raw.decode("utf-8", errors="ignore"))
+            group.append(line)
+            group_chars += len(line) + 1
+            if _BLOCK_START.match(line):
+                if not close_group():
+                    return _joined(reversed(kept))
+            elif group_chars > check_at:
+                if token_counter("\n".join(reversed(group))) > budget:
+                    return _joined(reversed(kept))
+                check_at *= 2
+
+    # Whatever precedes the first header is the log's first block
+    if group:
+        close_group()
+    return _joined(reversed(kept))
+
+
+def _index_chunk(raw: bytes, at: int, index: LogIndex, stamp: int) -> int:
+    """
+    Indexes the blocks starting in ``raw``, the line-aligned bytes at offset ``at`` of the
+    log, and returns the timestamp the last of them falls under (``stamp`` before them).
+
+    Lines are cleaned and split into blocks exactly as ``compress_stream`` does; a block
+    open before the chunk is flagged if a marker turns up before the chunk's first header.
+    """
+    line_starts: dict[int, int] | None = None
+    if raw.isascii() and b"\x1b" not in raw and b"\r" not in raw:
+        text = raw.decode("ascii")
+    else:
+        raw_lines = raw.split(b"\n")
+        lines = [_clean_terminal(line.decode("utf-8", errors="ignore")) for line in raw_lines]
+        text = "\n".join(lines)
+        # Byte offset of each line start, by its offset in the cleaned text
+        line_starts = dict(
+            zip(
+                accumulate((len(line) + 1 for line in lines), initial=0),
+                accumulate((len(line) + 1 for line in raw_lines), initial=0),
+                strict=True,
+            )
+        )
+
+    # Header line starts, with the timestamp leading the line and the level name in it
+    found = [(match.start() + 1, match[1], match[2]) for match in _NEXT_HEADER.finditer(text)]
+    # Whatever precedes the first header is the log's first block
+    if at == 0 or _BLOCK_START.match(text):
+        first = _FIRST_HEADER.match(text)
+        assert first is not None
+        found.insert(0, (0, first[1], first[2]))
+    heads = [head for head, _, _ in found]
+    marked = {bisect_right(heads, pos) - 1 for pos in _marker_positions(text)}
+    if -1 in marked:
+        index.high[-1] = 1
+    if not heads:
+        return stamp
+
+    # Each distinct timestamp is converted once
+    distinct = {stamped for _, stamped, _ in found if stamped}
+    keys = {stamped: stamp_key(stamped) for stamped in distinct}
+    stamps = []
+    for _, stamped, _ in found:
+        if stamped:
+            stamp = keys[stamped]
+        stamps.append(stamp)
+    levels = [_LEVEL_CODES[level.lower()] if level else 0 for _, _, level in found]
+
+    high = bytearray(len(heads))
+    for block in marked:
+        if block >= 0:
+            high[block] = 1
+    if line_starts is not None:
+        heads = [line_starts[head] for head in heads]
+    index.extend([at + head for head in heads], stamps, levels, high)
+    return stamp
+
+
+def _index_log(handle: IO[bytes], index: LogIndex, chunk_size: int) -> bool:
+    """
+    Brings ``index`` up to date with the log read from the handle's current position, and
+    tells whether it changed.
+
+    A log that only grew since it was indexed is indexed from its last block on, which
+    may have grown too; one that shrank or whose head changed, as a rotated or rewritten
+    log does, is indexed afresh.
+    """
+    base = handle.tell()
+    size = handle.seek(0, os.SEEK_END) - base
+    handle.seek(base)
+    if size < index.size or head_digest(handle, index.size) != index.head:
+        index.truncate(0)
+        index.size = 0
+    elif size == index.size:
+        return False
+
+    start = stamp = 0
+    if len(index):
+        start = index.offsets[-1]
+        stamp = index.stamps[-2] if len(index) > 1 else 0
+        index.truncate(len(index) - 1)
+    handle.seek(base + start)
+    at = start
+    while raw := handle.read(chunk_size):
+        if not raw.endswith(b"\n"):
+            raw += handle.readline()
+        stamp = _index_chunk(raw, at, index, stamp)
+        at += len(raw)
+    handle.seek(base)
+    index.size = at
+    index.head = head_digest(handle, at)
+    return True
+
+
+def _indexed_text(
+    handle: IO[bytes],
+    index: LogIndex,
+    runs: Iterable[range],
+    chunk_size: int,
+    regular_wanted: Callable[[], bool],
+) -> Iterator[str]:
+    """
+    Text of the indexed log's blocks in ``runs`` (of consecutive blocks), read in reads of
+    whole blocks that start at ``INDEXED_READ_SIZE`` bytes and double up to
+    ``chunk_size``, as a small budget is often settled by the first few blocks. Once
+    ``regular_wanted()`` turns false, only high-value blocks are read, seeking from one to
+    the next over the regular blocks between them.
+    """
+    base = handle.tell()
+    size = min(INDEXED_READ_SIZE, chunk_size)
+    # A regular block passed over since the last read
+    skipped: int | None = None
+    for run in runs:
+        block, stop = run.start, run.stop
+        while block < stop:
+            if regular_wanted():
+                end = bisect_left(index.offsets, index.offsets[block] + size, block + 1, stop)
+                size = min(size * 2, chunk_size)
+            else:
+                found = index.next_high_value(block, stop)
+                if found == stop:
+                    skipped = block
+                    break
+                block, end = found, found + 1
+            handle.seek(base + index.offsets[block])
+            raw = handle.read(index.end(end - 1) - index.offsets[block])
+            yield raw.decode("utf-8", errors="ignore")
+            skipped = None
+            block = end
+    if skipped is not None:
+        # A stream would close the last block read at this one's header line; the regular
+        # block it opens is only counted
+        handle.seek(base + index.offsets[skipped])
+        yield handle.readline().decode("utf-8", errors="ignore")
+
+
+def _index_path(handle: IO[bytes], index: str | os.PathLike[str] | bool) -> str:
+    if isinstance(index, bool):
+        name = getattr(handle, "name", None)
+        if not isinstance(name, str):
+            raise ValueError("index=True needs a log file with a path; pass the index's path.")
+        return name + INDEX_SUFFIX
+    return os.fspath(index)
+
+
+def _selector_kind(mode: str, fold: bool) -> type[_BlockSplitter]:
+    if mode not in _SELECTORS:
+        raise ValueError(f"Unknown log mode {mode!r}; expected one of {MODES}.")
+    kind = _SELECTORS[mode]
+    if fold:
+        if kind is not _ErrorFirstSelector:
+            raise ValueError("fold applies to the 'errors' and 'window' log modes.")
+        kind = _FoldingSelector
+    return kind
+
+
+def _select(selector: _BlockSplitter, verbatim: _Verbatim, tracked: Iterable[str]) -> None:
+    for chunk in tracked:
+        if not selector.done:
+            selector.feed(chunk)
+        if selector.done and verbatim.whole is None:
+            # Settled, and too long to be returned verbatim
+            break
+    else:
+        if not selector.done:
+            selector.finish()
+
+
+def _settled(
+    selector: _BlockSplitter,
+    verbatim: _Verbatim,
+    budget: int,
+    token_counter: Callable[[str], int],
+    **kwargs: Any,
+) -> str:
+    mode = kwargs.get("mode", "errors")
+    # The log is returned verbatim if it fits
+    if verbatim.whole is not None:
+        content = "".join(verbatim.whole)
+        # Re-enforce budget after the raw string is memory safe
+        if token_counter(content) <= budget:
+            return content
+
+    # We don't want to split if the file is just one giant block of text that doesn't
+    # look like logs, so without any log headers we just fall back immediately. A tail
+    # has no use for the head, so there the lone block is simply too large; templates
+    # are mined line by line and need no headers.
+    if selector.blocks <= 1 and mode not in ("tail", "templates"):
+        from context_diet.strategies.plain_text import PlainTextDietStrategy
+
+        head = "".join(verbatim.head)
+        return PlainTextDietStrategy().compress(head, budget, token_counter, **kwargs)
+
+    # Priorities: Inject errors first, then pad with regular context if budget allows
+    # This guarantees that the stack trace is not truncated or lost by 'tail -n' approximations
+    return selector.result()
 
 
 class LogDietStrategy(DietStrategy):
     """
     Compresses application logs by maintaining the continuity of multi-line Python stack traces
     and aggressively stripping non-UTF-8 binary pollution to protect terminal endpoints.
+
+    Terminal output captured in CI logs is cleaned first: color and cursor escape sequences
+    are dropped, and a line redrawn with carriage returns, as progress bars are, is reduced
+    to its final state (see ``_clean_terminal``).
     """
 
     def compress(
         self, content: str, budget: int, token_counter: Callable[[str], int], **kwargs: Any
     ) -> str:
+        """
+        Keeps whole log blocks (a header line plus its continuation lines) within the budget.
+
+        Keyword Args:
+            mode (str): Which blocks to keep when the log does not fit (default:
+                ``"errors"``). ``"errors"`` puts blocks with tracebacks, errors and fatal
+                messages first, then pads with regular blocks from the top. ``"head"`` and
+                ``"tail"`` keep the leading or trailing blocks that fit. ``"window"``
+                distills, error-first, only the blocks stamped from ``since`` up to
+                ``until``. ``"templates"`` collapses lines that differ only in numbers and
+                identifiers into one ``first .. last [xCOUNT] template`` line each.
+            since (str | datetime | None): Inclusive window start for ``mode="window"``.
+            until (str | datetime | None): Exclusive window end for ``mode="window"``.
+                Bounds are ISO8601 and compared, to the second, with the wall-clock
+                ``YYYY-MM-DD HH:MM:SS`` (or ``T`` separated) stamp leading a line; time
+                zones are not converted and lines without such a stamp belong to the block
+                above them. The log must be in chronological order.
+            fold (bool): In the ``"errors"`` and ``"window"`` modes, keep each distinct
+                traceback (same exception types and frames, whatever the message) once,
+                with ``[xCOUNT, last YYYY-MM-DD HH:MM:SS]`` appended to its first line,
+                and collapse runs of repeated frames (default: False). The whole log is
+                then read.
+            level (str | None): In the ``"errors"`` and ``"window"`` modes, keep only
+                blocks of this severity or higher: ``"debug"``, ``"info"``,
+                ``"warning"``, ``"error"`` or ``"critical"`` (default: None, all blocks).
+                A block's severity is the first level name on its header line (``WARN``
+                is a warning, ``FATAL`` critical, ``TRACE`` debug and ``NOTICE`` info);
+                blocks without one are dropped.
+            workers (int): Processes used to select blocks in the ``"errors"``,
+                ``"window"`` and ``"templates"`` modes (default: 1). The log is cut into
+                stretches of ``PARALLEL_STRETCH_SIZE`` characters at block boundaries and
+                the output is identical to a serial run. ``token_counter`` must be
+                picklable, and a block is held whole however large it is.
+        """
         # Phase 1: Binary / UTF-8 safety stripping
         # Standardize to utf-8 string, dropping any corrupted byte pollution natively
         if isinstance(content, bytes):
             content = content.decode("utf-8", errors="ignore")
-        else:
-            # We encode and decode to force stripping of surrogate characters or anomalies
-            content = content.encode("utf-8", errors="ignore").decode("utf-8")
 
-        # Re-enforce budget after the raw string is memory safe
-        if token_counter(content) <= budget:
-            return content
+        # Phase 2: Block selection, fed slice by slice so that no full list of blocks (or
+        # re-encoded copy of the log) is ever materialized
+        return self.compress_stream(chunk_text(content), budget, token_counter, **kwargs)
 
-        # Phase 2: Error-Grep Mode using PCRE Lookaheads
-        # Group log clusters using standard timestamp headers (YYYY-MM-DD or standard syslog format)
-        # We split by looking AHEAD for a line that starts with a timestamp or log level
-
-        # Regex explanation:
-        # \n(?=...) matches a newline ONLY IF what follows is:
-        # 1. A date format like 2024-01-01 or 24/01/01
-        # 2. A standard log level like INFO, ERROR, WARN, DEBUG
-        # 3. An ISO8601 timestamp [2024-
-        split_pattern = re.compile(
-            r"\n(?=\d{2,4}[-/]\d{2}[-/]\d{2}|\[?\d{4}-\d{2}-\d{2}|(?:INFO|ERROR|WARN|DEBUG|CRITICAL)\b|\[)",
-            re.IGNORECASE,
-        )
+    def compress_stream(
+        self,
+        chunks: Iterable[str],
+        budget: int,
+        token_counter: Callable[[str], int],
+        **kwargs: Any,
+    ) -> str:
+        """
+        Streaming counterpart of ``compress``, returning the same output.
 
-        # We don't want to split if the file is just one giant block of text that doesn't look like logs
-        # So if we don't find any log headers, we just fall back immediately
-        log_blocks = split_pattern.split(content)
+        ``chunks`` must be newline-terminated (see ``context_diet.streaming.iter_text``).
+        Blocks are assembled on the fly and only what can still reach the output is kept
+        (see ``_BlockSplitter`` and its selectors), plus the head that the plain-text
+        fallback would slice. Reading stops as soon as the output is settled: after the
+        first error block that no longer fits, the head, or the window's end. A tail
+        needs the whole stream; ``compress_file`` reads it backwards instead.
+        """
+        mode = kwargs.get("mode", "errors")
+        kind = _selector_kind(mode, kwargs.get("fold", False))
+        chunks = _cleaned(chunks)
+        if mode == "window":
+            since, until = kwargs.get("since"), kwargs.get("until")
+            chunks = _window(
+                chunks,
+                None if since is None else _time_key(since),
+                None if until is None else _time_key(until),
+            )
+        floor = _level_floor(mode, kwargs.get("level"))
+        if floor is not None:
+            chunks = _leveled(chunks, floor)
 
-        if len(log_blocks) <= 1:
-            from context_diet.strategies.plain_text import PlainTextDietStrategy
+        verbatim = _Verbatim(budget, token_counter)
+        tracked = verbatim.track(chunks)
+        workers = kwargs.get("workers", 1)
+        if workers > 1 and mode in PARALLEL_MODES:
+            stretches = _stretches(tracked, PARALLEL_STRETCH_SIZE)
+            selector = _select_parallel(stretches, kind, budget, token_counter, workers)
+            # The selection may have settled early; the verbatim copy needs the rest
+            for _ in tracked:
+                if verbatim.whole is None:
+                    break
+        else:
+            selector = kind(budget, token_counter)
+            _select(selector, verbatim, tracked)
+        return _settled(selector, verbatim, budget, token_counter, **kwargs)
 
-            return PlainTextDietStrategy().compress(content, budget, token_counter, **kwargs)
+    def compress_file(
+        self,
+        handle: IO[bytes],
+        budget: int,
+        token_counter: Callable[[str], int],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Compresses a seekable binary log from its current position, seeking where it helps.
 
-        # Compile specific high-value blocks (Errors/Exceptions) first
-        high_value_blocks = []
-        regular_blocks = []
+        ``mode="tail"`` reads backwards from the end of the file and ``mode="window"``
+        binary-searches the byte offset of ``since`` before streaming forward, so both
+        read kilobytes of a multi-gigabyte log rather than all of it. The other modes
+        stream the file through ``compress_stream``.
 
-        for block in log_blocks:
-            if re.search(
-                r"(Traceback \(most recent call last\):|Error:|Exception:|[Ff]atal)", block
-            ):
-                high_value_blocks.append(block)
-            else:
-                regular_blocks.append(block)
+        Keyword Args:
+            index (str | os.PathLike | bool): Sidecar index of the log's blocks (see
+                ``log_index.LogIndex``) for the ``"errors"`` and ``"window"`` modes: its
+                path, or True for the log's path plus ``INDEX_SUFFIX``. It is created,
+                or brought up to date with what was appended to the log, before blocks
+                are selected through it: the window is found by bisection, and once
+                regular blocks are no longer wanted only high-value blocks are read. Blocks
+                below ``level`` are passed over by the severities the index records,
+                without being read. The output is that of ``compress_stream``; selection
+                runs in this process.
+        """
+        mode = kwargs.get("mode", "errors")
+        if kwargs.get("index") and mode in INDEXED_MODES:
+            return self._compress_indexed(handle, budget, token_counter, chunk_size, **kwargs)
+        # ``compress_stream`` rejects ``fold`` and ``level`` for a tail
+        if mode == "tail" and not kwargs.get("fold", False) and kwargs.get("level") is None:
+            start = handle.tell()
+            # Like the plain-text fallback, a token is taken to span at most five characters
+            # (and a character at least one byte), so a larger file can never be returned
+            # verbatim and block-wise selection from the end gives the streaming output
+            if handle.seek(0, os.SEEK_END) - start > budget * 5:
+                handle.seek(start)
+                return _read_tail(handle, budget, token_counter, TAIL_READ_SIZE)
+            handle.seek(start)
+        if mode == "window" and kwargs.get("since") is not None:
+            handle.seek(_seek_since(handle, _time_key(kwargs["since"])))
+        return self.compress_stream(iter_text(handle, chunk_size), budget, token_counter, **kwargs)
 
-        output = ""
-        tokens_used = 0
-
-        # Priorities: Inject errors first, then pad with regular context if budget allows
-        # This guarantees that the stack trace is not truncated or lost by 'tail -n' approximations
-        for block in high_value_blocks + regular_blocks:
-            item_tokens = token_counter(block) + 1  # +1 for newline injection
+    def _compress_indexed(
+        self,
+        handle: IO[bytes],
+        budget: int,
+        token_counter: Callable[[str], int],
+        chunk_size: int,
+        **kwargs: Any,
+    ) -> str:
+        mode = kwargs.get("mode", "errors")
+        kind = _selector_kind(mode, kwargs.get("fold", False))
+        floor = _level_floor(mode, kwargs.get("level"))
+        path = _index_path(handle, kwargs["index"])
+        index = LogIndex.load(path) or LogIndex()
+        if _index_log(handle, index, chunk_size):
+            index.save(path)
 
-            if tokens_used + item_tokens > budget:
-                if tokens_used == 0:
-                    # Not even the first error fits
-                    from context_diet.interfaces import ContextBudgetExceededError
+        since = until = None
+        if mode == "window":
+            since, until = kwargs.get("since"), kwargs.get("until")
+        runs = index.runs(
+            None if since is None else _time_key(since),
+            None if until is None else _time_key(until),
+            None if floor is None else LEVELS[floor],
+        )
 
-                    raise ContextBudgetExceededError(
-                        "Single log block exceeds total token budget."
-                    )
-                break
+        selector = kind(budget, token_counter)
+        verbatim = _Verbatim(budget, token_counter)
 
-            output += block + "\n"
-            tokens_used += item_tokens
+        def regular_wanted() -> bool:
+            # Regular blocks matter while they may be selected, returned verbatim or
+            # sliced by the plain-text fallback
+            return selector.wants_regular or verbatim.whole is not None or selector.blocks <= 1
 
-        return output.strip()
+        text = _indexed_text(handle, index, runs, chunk_size, regular_wanted)
+        _select(selector, verbatim, verbatim.track(_cleaned(text)))
+        return _settled(selector, verbatim, budget, token_counter, **kwargs)
@@ -0,0 +1,179 @@
+"""
+Persistent block index of a log file, kept in a sidecar file next to it.
+
+Each block of the log (a header line and its continuation lines, as ``LogDietStrategy``
+splits it) is recorded by its byte offset, the timestamp it falls under, its severity and
+whether it is high-value. The four columns are ``array.array``s written back to back
+after a fixed header, 18 bytes a block, so an index of millions of blocks loads in a few
+reads and is searched with ``bisect`` and ``array.index`` rather than Python loops.
+"""
+
+import hashlib
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import IO
+
+# Appended to the log's path for ``index=True``
+INDEX_SUFFIX = ".dietidx"
+
+# Severities by their code in ``LogIndex.levels``; 0 is a block without a level name
+LEVELS = ("", "debug", "info", "warning", "error", "critical")
+
+# Bytes at the start of the log whose digest tells a grown log from a replaced one
+HEAD_SIZE = 4096
+
+_MAGIC = b"CDLI"
+_VERSION = 1
+# Magic, version, block count, bytes of log indexed, digest of its head
+_HEADER = struct.Struct("<4sB3xQQ16s")
+
+_SEPARATORS = str.maketrans("", "", "[-:T ")
+
+# A run of blocks at or above a severity, once ``levels`` is translated to 1s and 0s
+_KEPT_RUN = re.compile(b"\x01+")
+
+
+def stamp_key(stamp: str) -> int:
+    """
+    ``YYYY-MM-DD HH:MM:SS`` (or ``[YYYY-MM-DDTHH:MM:SS``) as the integer
+    ``YYYYMMDDHHMMSS``, which sorts the same.
+    """
+    return int(stamp.translate(_SEPARATORS))
+
+
+def head_digest(handle: IO[bytes], size: int) -> bytes:
+    """Digest of the first ``size`` bytes (at most ``HEAD_SIZE``) from the handle's position."""
+    start = handle.tell()
+    head = handle.read(min(size, HEAD_SIZE))
+    handle.seek(start)
+    return hashlib.blake2b(head, digest_size=16).digest()
+
+
+class LogIndex:
+    """
+    Block offsets (relative to where the log starts), timestamps, severities and
+    high-value flags of a log, in file order.
+
+    ``stamps`` holds, for each block, the ``stamp_key`` of the last timestamped block at
+    or before it (0 before the first), so that it is sorted whenever the log is in
+    chronological order and a bound can be bisected.
+    """
+
+    def __init__(self) -> None:
+        self.offsets = array("Q")
+        self.stamps = array("Q")
+        self.levels = array("B")
+        self.high = array("B")
+        # Bytes of log covered, and the digest of its head
+        self.size = 0
+        self.head = b""
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> "LogIndex | None":
+        """The index saved at ``path``, or None if there is none or it is unreadable."""
+        index = cls()
+        try:
+            with open(path, "rb") as handle:
+                magic, version, blocks, index.size, index.head = _HEADER.unpack(
+                    handle.read(_HEADER.size)
+                )
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                for column in index._columns():
+                    column.fromfile(handle, blocks)
+        except (OSError, EOFError, struct.error):
+            return None
+        if sys.byteorder == "big":
+            for column in index._columns():
+                column.byteswap()
+        return index
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Writes the index to ``path``, replacing any previous one in a single rename."""
+        partial = f"{os.fspath(path)}.{os.getpid()}.tmp"
+        with open(partial, "wb") as handle:
+            handle.write(_HEADER.pack(_MAGIC, _VERSION, len(self), self.size, self.head))
+            for column in self._columns():
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(handle)
+        os.replace(partial, path)
+
+    def extend(
+        self,
+        offsets: Iterable[int],
+        stamps: Iterable[int],
+        levels: Iterable[int],
+        high: Iterable[int],
+    ) -> None:
+        self.offsets.extend(offsets)
+        self.stamps.extend(stamps)
+        self.levels.extend(levels)
+        self.high.extend(high)
+
+    def truncate(self, blocks: int) -> None:
+        """Drops the entries from block ``blocks`` on."""
+        for column in self._columns():
+            del column[blocks:]
+
+    def end(self, block: int) -> int:
+        """Byte offset just past ``block``."""
+        return self.offsets[block + 1] if block + 1 < len(self) else self.size
+
+    def at_or_after(self, stamp: str, lo: int = 0) -> int:
+        """First block, from ``lo``, falling under ``stamp`` (``YYYY-MM-DD HH:MM:SS``) or later."""
+        return bisect_left(self.stamps, stamp_key(stamp), lo)
+
+    def next_high_value(self, block: int, stop: int) -> int:
+        """First high-value block from ``block`` up to ``stop`` (excluded), else ``stop``."""
+        try:
+            return self.high.index(1, block, stop)
+        except ValueError:
+            return stop
+
+    def span(self, since: str | None = None, until: str | None = None) -> range:
+        """
+        Blocks from the first stamped ``since`` or later up to (excluding) the first
+        stamped ``until`` or later, both ``YYYY-MM-DD HH:MM:SS``, as ``mode="window"``
+        narrows a chronological log.
+        """
+        first = 0 if since is None else self.at_or_after(since)
+        last = len(self) if until is None else self.at_or_after(until, first)
+        return range(first, last)
+
+    def blocks(
+        self, since: str | None = None, until: str | None = None, level: str | None = None
+    ) -> list[int]:
+        """Blocks of ``span(since, until)`` of severity ``level`` (one of ``LEVELS``) or higher."""
+        span = self.span(since, until)
+        if level is None:
+            return list(span)
+        floor = LEVELS.index(level)
+        return [block for block in span if self.levels[block] >= floor]
+
+    def runs(
+        self, since: str | None = None, until: str | None = None, level: str | None = None
+    ) -> list[range]:
+        """``blocks(since, until, level)`` as runs of consecutive blocks, in file order."""
+        span = self.span(since, until)
+        if level is None:
+            return [span] if span else []
+        floor = LEVELS.index(level)
+        kept = bytes(code >= floor for code in range(256))
+        mask = self.levels[span.start : span.stop].tobytes().translate(kept)
+        return [
+            range(span.start + run.start(), span.start + run.end())
+            for run in _KEPT_RUN.finditer(mask)
+        ]
+
+    def _columns(self) -> "tuple[array[int], ...]":
+        return (self.offsets, self.stamps, self.levels, self.high)
@@ -0,0 +1,265 @@
+"""
+Streaming log template mining, in the style of the Drain parser.
+
+Lines that differ only in identifiers, counters and addresses are clustered under one
+template (``GET /health <*> in <*>``) so that a million health checks cost one line of
+context instead of a budget's worth of blocks.
+
+Mining is split in two: a ``LineTally`` counts the distinct line shapes of a stretch of
+log, which is all the per-line work, and a ``TemplateMiner`` clusters the shapes of one
+or more tallies in log order. Tallies of consecutive stretches can thus be taken in
+parallel and mined to the same templates as a single tally of the whole log.
+"""
+
+import re
+from typing import Any
+
+# Leading date with optional time, fraction and offset, the same prefixes that open a block
+_STAMP = re.compile(
+    r"\[?(\d{2,4}[-/]\d{2}[-/]\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?)\]?[ \t]*"
+)
+# Any whitespace-delimited token with a digit in it is taken to be a variable: ids, counts,
+# durations, addresses and hashes all qualify, while keywords and paths rarely do. The
+# brackets, quotes and punctuation around it stay (`line 10,` gives `line <*>,`)
+_VARIABLE = re.compile(r"(?<!\S)([(\[{<\"']*)\S*?\d\S*?([,.;:!?)\]}>\"']*)(?!\S)")
+
+WILDCARD = "<*>"
+_MASK = rf"\1{WILDCARD}\2"
+
+# Lines are grouped by their shape, the line with every ASCII digit replaced by 0 and then
+# every opaque run (a hex id, a UUID, a long alphanumeric) of 8 or more word characters
+# and hyphens holding a digit filled with 0s. Two lines of one shape differ only in digit
+# values and opaque runs, which sit in tokens the masking turns into wildcards whole, so
+# they share a template. Runs that open a line, bracketed or not, are left alone, and
+# with them the timestamp, so the lines of a shape share its span too.
+_DIGITS = str.maketrans("123456789", "000000000")
+# A run and the character before it: opening with a character class lets the search skip
+# from separator to separator, several times faster than a lookbehind would
+_OPAQUE_RUN = re.compile(r"[^\w-](?<!^\[)(?=[a-zA-Z_-]*+0)[\w-]{8,}+", re.ASCII)
+
+
+def _opaque_zeros(match: re.Match[str]) -> str:
+    return match[0][0] + "0" * (len(match[0]) - 1)
+
+
+def line_shapes(text: str) -> list[str]:
+    """
+    Digit-masked lines of ``text`` (split at ``"\\n"``) for ``LineTally.add``, which
+    finishes their shapes.
+
+    Translating a whole chunk at once is an order of magnitude faster than line by line.
+    """
+    return text.translate(_DIGITS).split("\n")
+
+
+class LineShape:
+    """The lines of one shape within a tally: a count, the first line and timestamps."""
+
+    __slots__ = (
+        "line",
+        "body",
+        "stamp",
+        "count",
+        "high",
+        "carried",
+        "carried_last",
+        "first",
+        "first_at",
+        "last",
+        "last_at",
+    )
+
+    def __init__(self, line: str, body: int, stamp: tuple[int, int] | None) -> None:
+        self.line = line
+        # Offset of the text after the timestamp, and the timestamp's span, in every line
+        self.body = body
+        self.stamp = stamp
+        self.count = 0
+        self.high = False
+        # Line numbers of the first and last line seen before the tally's first timestamp
+        self.carried: int | None = None
+        self.carried_last = 0
+        # First and last timestamp (and line number) seen after it
+        self.first: str | None = None
+        self.first_at = 0
+        self.last: str | None = None
+        self.last_at = 0
+
+
+class LineTally:
+    """
+    The distinct line shapes of a stretch of log, in order of first appearance.
+
+    Lines without a timestamp of their own carry the last one seen. Before the first
+    timestamp of the stretch that is whatever the previous stretch ended on, which is
+    only known when the tally is mined, so those lines are recorded apart.
+    """
+
+    def __init__(self) -> None:
+        self.shapes: dict[str, LineShape] = {}
+        self.lines = 0
+        self.stamped = False
+        self.stamp: str | None = None
+
+    def add(self, line: str, shape: str | None = None) -> LineShape:
+        """Adds one line; ``shape`` may come from ``line_shapes``."""
+        if shape is None:
+            shape = line.translate(_DIGITS)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            # Opaque runs are only filled on a miss: a shape is its own fill
+            shape = _OPAQUE_RUN.sub(_opaque_zeros, shape)
+            entry = self.shapes.get(shape)
+        if entry is None:
+            match = _STAMP.match(line)
+            if match is None:
+                entry = LineShape(line, 0, None)
+            else:
+                entry = LineShape(line, match.end(), match.span(1))
+            self.shapes[shape] = entry
+        entry.count += 1
+        if entry.stamp is not None:
+            self.stamp = line[entry.stamp[0] : entry.stamp[1]]
+            self.stamped = True
+        if not self.stamped:
+            if entry.carried is None:
+                entry.carried = self.lines
+            entry.carried_last = self.lines
+        elif self.stamp is not None:
+            if entry.first is None:
+                entry.first, entry.first_at = self.stamp, self.lines
+            entry.last, entry.last_at = self.stamp, self.lines
+        self.lines += 1
+        return entry
+
+
+class LogTemplate:
+    """A cluster of lines sharing one template, with its count and first/last timestamps."""
+
+    __slots__ = (
+        "tokens",
+        "count",
+        "high",
+        "first",
+        "first_at",
+        "last",
+        "last_at",
+        "example",
+        "order",
+    )
+
+    def __init__(self, tokens: list[str], example: str, order: int) -> None:
+        self.tokens = tokens
+        self.count = 0
+        # Whether any of its lines sat in a high-value block
+        self.high = False
+        self.first: str | None = None
+        self.first_at = 0
+        self.last: str | None = None
+        self.last_at = 0
+        # The first line verbatim, emitted instead of the template if it never repeats
+        self.example = example
+        self.order = order
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def render(self) -> str:
+        if self.count == 1:
+            return self.example
+        if self.first is None:
+            return f"[x{self.count}] {self.template}"
+        if self.first == self.last:
+            return f"{self.first} [x{self.count}] {self.template}"
+        return f"{self.first} .. {self.last} [x{self.count}] {self.template}"
+
+    def _seen(self, stamp: str, at: int) -> None:
+        if self.first is None or at < self.first_at:
+            self.first, self.first_at = stamp, at
+        if self.last is None or at > self.last_at:
+            self.last, self.last_at = stamp, at
+
+
+class TemplateMiner:
+    """
+    Clusters the line shapes of consecutive tallies into templates.
+
+    As in Drain, masked lines are routed through a fixed-depth prefix tree (token count,
+    then the first ``depth - 2`` tokens) to a short list of candidate templates, and join
+    the most similar one if at least ``similarity`` of their tokens agree; the positions
+    where they differ become wildcards. A node with ``max_children`` children routes any
+    further tokens to its wildcard child, which bounds the tree on high-cardinality
+    prefixes. Each shape goes through the tree once, at its first appearance, which is
+    when a line-by-line Drain would first see it; later lines of the shape are only
+    counted. Shapes are remembered for the life of the miner.
+    """
+
+    def __init__(self, depth: int = 4, similarity: float = 0.4, max_children: int = 100) -> None:
+        if depth < 3:
+            raise ValueError("Template tree depth must be at least 3.")
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        # Templates in order of first appearance
+        self.templates: list[LogTemplate] = []
+        # Token count, then one level per routing token; a leaf maps None to its templates
+        self._root: dict[int, dict[Any, Any]] = {}
+        self._known: dict[str, LogTemplate] = {}
+        self._lines = 0
+        self._stamp: str | None = None
+
+    def add_tally(self, tally: LineTally) -> None:
+        """Mines the shapes of ``tally``, the stretch of log after the previous tally's."""
+        for shape, entry in tally.shapes.items():
+            template = self._known.get(shape)
+            if template is None:
+                tokens = _VARIABLE.sub(_MASK, entry.line[entry.body :]).split()
+                template = self._known[shape] = self._match(tokens, entry.line)
+            template.count += entry.count
+            template.high = template.high or entry.high
+            if entry.carried is not None and self._stamp is not None:
+                template._seen(self._stamp, self._lines + entry.carried)
+                template._seen(self._stamp, self._lines + entry.carried_last)
+            if entry.first is not None and entry.last is not None:
+                template._seen(entry.first, self._lines + entry.first_at)
+                template._seen(entry.last, self._lines + entry.last_at)
+        self._lines += tally.lines
+        if tally.stamped:
+            self._stamp = tally.stamp
+
+    def _match(self, tokens: list[str], line: str) -> LogTemplate:
+        node = self._root.setdefault(len(tokens), {})
+        for token in tokens[: self.depth - 2]:
+            child = node.get(token)
+            if child is None:
+                if token != WILDCARD and len(node) >= self.max_children:
+                    token = WILDCARD
+                child = node.setdefault(token, {})
+            node = child
+        leaf: list[LogTemplate] = node.setdefault(None, [])
+
+        best = None
+        best_key = (self.similarity, -1)
+        for cluster in leaf:
+            same = wildcards = 0
+            for ours, theirs in zip(cluster.tokens, tokens, strict=True):
+                if ours == WILDCARD:
+                    wildcards += 1
+                elif ours == theirs:
+                    same += 1
+            # Ties go to the more general template, as in Drain
+            key = (same / len(tokens) if tokens else 1.0, wildcards)
+            if key >= best_key:
+                best, best_key = cluster, key
+
+        if best is None:
+            best = LogTemplate(tokens, line, len(self.templates))
+            self.templates.append(best)
+            leaf.append(best)
+            return best
+        best.tokens = [
+            ours if ours == theirs else WILDCARD
+            for ours, theirs in zip(best.tokens, tokens, strict=True)
+        ]
+        return best
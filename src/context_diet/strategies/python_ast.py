@@ -2,11 +2,22 @@
 Python Abstract Syntax Tree (AST) deterministic compressor.
 """
 
+import io
+import tokenize
 from typing import Any
 
 import libcst as cst
 
-from ..interfaces import ContextBudgetExceededError, DietStrategy, TokenCounter
+from ..interfaces import (
+    ContextBudgetExceededError,
+    DietStrategy,
+    MalformedContentError,
+    TokenCounter,
+)
+
+# Inputs above this many characters skip LibCST entirely. A full concrete syntax tree for
+# multi-megabyte generated sources (protobuf stubs, migrations) costs gigabytes of memory.
+STREAM_THRESHOLD_CHARS = 1_000_000
 
 
 class _ScrubSkeletonTransformer(cst.CSTTransformer):
@@ -75,6 +86,142 @@ class _ScrubSkeletonTransformer(cst.CSTTransformer):
             return updated_node.with_changes(body=new_body)
 
 
+def _stream_skeleton(content: str, focus_on: str | None = None) -> str:
+    """
+    Single-pass skeletonizer built on the stdlib ``tokenize`` module.
+
+    Mirrors the LibCST skeleton (module/class docstrings dropped, every function body
+    except ``focus_on`` replaced with ``...``) without materializing a syntax tree. Only
+    the physical lines of the current logical line are buffered, so working memory is
+    O(nesting depth) on top of the emitted skeleton.
+    """
+    reader = io.StringIO(content)
+    pending: list[str] = []
+
+    def readline() -> str:
+        line = reader.readline()
+        if line:
+            pending.append(line)
+        return line
+
+    output: list[str] = []
+    line_tokens: list[tokenize.TokenInfo] = []
+    depth = 0
+    # While set, logical lines nested deeper than this indentation level are dropped
+    skip_above: int | None = None
+    skip_col = 0
+    trailing: list[str] = []
+    awaiting_body = False
+    docstring_depth: int | None = 0
+    # Where a dropped docstring of a class or function stood, while nothing else has
+    # followed it in that body: should the body end there, ``pass`` takes its place
+    bare_body: tuple[int, str] | None = None
+
+    for tok in tokenize.generate_tokens(readline):
+        if tok.type == tokenize.INDENT:
+            depth += 1
+            if awaiting_body:
+                output.append(tok.string + "...\n")
+                skip_above = depth - 1
+                awaiting_body = False
+            continue
+
+        if tok.type == tokenize.DEDENT:
+            depth -= 1
+            if bare_body is not None:
+                at, indent = bare_body
+                output[at] = indent + "pass\n"
+                bare_body = None
+            if skip_above is not None and depth <= skip_above:
+                skip_above = None
+                output.extend(trailing)
+                trailing.clear()
+            continue
+
+        if tok.type in (tokenize.NL, tokenize.COMMENT):
+            # Blank and comment-only lines; comments inside a logical line are irrelevant
+            if tok.type == tokenize.NL and not line_tokens:
+                if skip_above is None and not awaiting_body:
+                    output.extend(pending)
+                elif skip_above is not None:
+                    # tokenize only emits DEDENT at the next statement, so blank lines and
+                    # outdented comments after a body belong to whatever follows it
+                    line = pending[0]
+                    if not line.strip() or len(line) - len(line.lstrip()) <= skip_col:
+                        trailing.append(line)
+                    else:
+                        trailing.clear()
+                pending.clear()
+            continue
+
+        if tok.type == tokenize.ENDMARKER:
+            break
+
+        if tok.type != tokenize.NEWLINE:
+            line_tokens.append(tok)
+            continue
+
+        if skip_above is not None:
+            trailing.clear()
+        else:
+            is_docstring = (
+                depth == docstring_depth
+                and len(line_tokens) == 1
+                and line_tokens[0].type == tokenize.STRING
+            )
+            docstring_depth = None
+            bare_body = None
+
+            keyword_idx = 1 if line_tokens[0].string == "async" and len(line_tokens) > 1 else 0
+            keyword = line_tokens[keyword_idx].string
+
+            if is_docstring:
+                if depth:
+                    bare_body = (len(output), pending[0][: line_tokens[0].start[1]])
+                    output.append("")
+            elif keyword == "def" and line_tokens[keyword_idx].type == tokenize.NAME:
+                name = line_tokens[keyword_idx + 1].string
+                colon_idx = _find_header_colon(line_tokens, keyword_idx)
+                if focus_on and name == focus_on:
+                    docstring_depth = depth + 1
+                    output.extend(pending)
+                elif colon_idx == len(line_tokens) - 1:
+                    output.extend(pending)
+                    awaiting_body = True
+                    skip_col = line_tokens[0].start[1]
+                else:
+                    # One-liner `def f(): return x` - cut the line right after the colon
+                    colon = line_tokens[colon_idx]
+                    row = colon.end[0] - line_tokens[0].start[0]
+                    output.extend(pending[:row])
+                    output.append(pending[row][: colon.end[1]] + " ...\n")
+            else:
+                if keyword == "class":
+                    docstring_depth = depth + 1
+                output.extend(pending)
+
+        pending.clear()
+        line_tokens.clear()
+
+    return "".join(output)
+
+
+def _find_header_colon(line_tokens: list[tokenize.TokenInfo], start: int) -> int:
+    """Returns the index of the colon terminating a ``def`` header (outside any brackets)."""
+    nesting = 0
+    for idx in range(start, len(line_tokens)):
+        tok = line_tokens[idx]
+        if tok.type != tokenize.OP:
+            continue
+        if tok.string in "([{":
+            nesting += 1
+        elif tok.string in ")]}":
+            nesting -= 1
+        elif tok.string == ":" and nesting == 0:
+            return idx
+    return len(line_tokens) - 1
+
+
 class PythonAstDietStrategy(DietStrategy):
     """
     Deterministically transforms Python source code into a structurally precise,
@@ -93,12 +240,31 @@ class PythonAstDietStrategy(DietStrategy):
                 Only works on top-level ``def`` and ``async def`` — does not support class
                 methods or arbitrary code regions. Behavior with nested functions or
                 decorators that rename the function is undefined. Subject to change.
+            stream_threshold (int): Character count above which LibCST is bypassed and the
+                ``tokenize``-based skeletonizer is used directly (default:
+                ``STREAM_THRESHOLD_CHARS``). The streaming engine skips Scrub Mode and always
+                emits the skeleton. Sources that exhaust the recursion limit inside LibCST
+                fall back to the same engine.
         """
         focus_on = kwargs.get("focus_on")
+        stream_threshold = kwargs.get("stream_threshold", STREAM_THRESHOLD_CHARS)
+
+        if len(content) > stream_threshold:
+            return self._compress_streaming(content, budget, token_counter, focus_on)
+
+        try:
+            return self._compress_cst(content, budget, token_counter, focus_on)
+        except RecursionError:
+            return self._compress_streaming(content, budget, token_counter, focus_on)
+
+    def _compress_cst(
+        self, content: str, budget: int, token_counter: TokenCounter, focus_on: str | None
+    ) -> str:
+        """Scrub, then skeletonize, using a full LibCST concrete syntax tree."""
         try:
             tree = cst.parse_module(content)
         except cst.ParserSyntaxError:
-            raise ContextBudgetExceededError("SyntaxError: content is not valid Python.")
+            raise MalformedContentError("SyntaxError: content is not valid Python.")
 
         # Pass 1: "Scrub Mode" - Remove all docstrings/metadata
         scrub_transformer = _ScrubSkeletonTransformer(skeletonize=False, focus_on=focus_on)
@@ -120,3 +286,19 @@ class PythonAstDietStrategy(DietStrategy):
             )
 
         return skeleton_content
+
+    def _compress_streaming(
+        self, content: str, budget: int, token_counter: TokenCounter, focus_on: str | None
+    ) -> str:
+        """Skeleton Mode in a single ``tokenize`` pass, for sources too large for LibCST."""
+        try:
+            skeleton_content = _stream_skeleton(content, focus_on=focus_on)
+        except (tokenize.TokenError, SyntaxError):
+            raise MalformedContentError("SyntaxError: content is not valid Python.") from None
+
+        if token_counter(skeleton_content) > budget:
+            raise ContextBudgetExceededError(
+                f"Minimum Python skeleton exceeds budget ({budget} tokens)."
+            )
+
+        return skeleton_content
@@ -1,9 +1,606 @@
+import hashlib
+import itertools
 import re
-from collections.abc import Callable
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
 from context_diet.interfaces import DietStrategy
 
+# Statement kinds (leading keywords) that Tier 1 hands to sqlglot
+_DDL_KEYWORDS = frozenset({"CREATE", "ALTER", "DROP"})
+
+# Fewest characters of uncached DDL worth the start-up cost of a process pool. sqlglot
+# renders about 160 kB of DDL a second, and a worker takes about 0.13 s to fork and warm
+# up, or 0.65 s to spawn as macOS and Windows do, so two spawned workers only pay off
+# past some 210 kB (see ``break_even`` in benchmarks/bench_sql.py)
+PARALLEL_MIN_DDL_CHARS = 256_000
+# Rendered Tier 1 DDL per (statement digest, dialect), shared by all strategy instances so
+# that re-distilling an unchanged schema never parses a statement twice
+RENDER_CACHE_SIZE = 16_384
+_RENDER_CACHE: OrderedDict[tuple[bytes, Any], tuple[str, ...]] = OrderedDict()
+_RENDER_CACHE_LOCK = threading.Lock()
+
+# Schema objects Tier 2 keeps, per leading keyword (CREATE statements come first)
+_REGEX_DDL_OBJECTS = {"CREATE": ("TABLE", "VIEW", "INDEX"), "ALTER": ("TABLE", "VIEW")}
+
+# Everything the scanner must step over or count: statement ends, parentheses, quotes,
+# comments and dollar-quoted bodies. A dollar tag must not continue an identifier
+# (`a$b$` is a name in PostgreSQL).
+_SQL_TOKENS = re.compile(r"[;()'\"`]|--|/\*|(?<![\w$])\$(?:[A-Za-z_]\w*)?\$")
+# What may end a quoted run: the quote itself, or a backslash escape in strings that honour
+# one (standard SQL only doubles the quote, so `'C:\'` is a whole string there)
+_QUOTE_END = {"'": re.compile("'"), '"': re.compile('"'), "`": re.compile("`")}
+_ESCAPED_STRING_END = re.compile(r"['\\]")
+# PostgreSQL's escape string prefix, `E'...'`, which must not end an identifier
+_ESCAPE_PREFIX = re.compile(r"(?<![\w$])[Ee]")
+# sqlglot dialects whose strings take backslash escapes everywhere
+_BACKSLASH_DIALECTS = frozenset(
+    {"bigquery", "clickhouse", "databricks", "doris", "hive", "mysql", "spark", "starrocks"}
+)
+_WHITESPACE = re.compile(r"\s*")
+# A pg_dump `COPY ... FROM stdin;` is followed by raw data rows up to a `\.` line
+_COPY_FROM_STDIN = re.compile(r"\bFROM\s+STDIN\b", re.IGNORECASE)
+_COPY_END = re.compile(r"^\\\.\r?$", re.MULTILINE)
+_KEYWORD = re.compile(r"[A-Za-z]+")
+# Comments ahead of a statement's first keyword, which sqlglot renders as ``/* ... */``
+_LEADING_COMMENTS = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/)*", re.DOTALL)
+# An identifier, plain or quoted in any dialect's style, optionally schema-qualified
+_IDENTIFIER = r'(?:"[^"]*"|`[^`]*`|\[[^\]]*\]|[\w$]+)'
+_NAME = rf"{_IDENTIFIER}(?:\s*\.\s*{_IDENTIFIER})*"
+_CREATE_TABLE = re.compile(
+    r"\s*CREATE\s+(?:OR\s+REPLACE\s+|GLOBAL\s+|LOCAL\s+|TEMP\s+|TEMPORARY\s+|"
+    rf"UNLOGGED\s+)*TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({_NAME})\s*\(",
+    re.IGNORECASE,
+)
+_CREATE_INDEX = re.compile(
+    rf"\s*CREATE\s+(?:UNIQUE\s+)?INDEX\b[^;]*?\bON\s+(?:ONLY\s+)?({_NAME})", re.IGNORECASE
+)
+_ALTER_TABLE = re.compile(
+    rf"\s*ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?({_NAME})", re.IGNORECASE
+)
+_KEY_CLAUSE = re.compile(
+    r"PRIMARY\s+KEY\s*\(([^)]*)\)|FOREIGN\s+KEY\s*\(([^)]*)\)\s*"
+    rf"REFERENCES\s+({_NAME})\s*(?:\(([^)]*)\))?",
+    re.IGNORECASE,
+)
+_TABLE_CONSTRAINT = re.compile(
+    rf"(?:CONSTRAINT\s+{_IDENTIFIER}\s*)?(?:PRIMARY|FOREIGN|UNIQUE|CHECK|EXCLUDE|"
+    r"FULLTEXT|SPATIAL|INDEX|KEY)\b",
+    re.IGNORECASE,
+)
+# A column definition: its name, then its type up to the first column constraint
+_COLUMN = re.compile(
+    rf"({_IDENTIFIER})\s*(.*?)\s*(?=\b(?:NOT\s+NULL|NULL|DEFAULT|PRIMARY\s+KEY|REFERENCES|"
+    r"UNIQUE|CHECK|CONSTRAINT|COLLATE|GENERATED|AUTO_INCREMENT|AUTOINCREMENT|IDENTITY|"
+    r"COMMENT)\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_INLINE_PRIMARY_KEY = re.compile(r"\bPRIMARY\s+KEY\b", re.IGNORECASE)
+_INLINE_REFERENCE = re.compile(rf"\bREFERENCES\s+({_NAME})\s*(?:\(([^)]*)\))?", re.IGNORECASE)
+_COLUMN_LIST_TOKENS = re.compile(r"[(),'\"`]")
+_QUALIFYING_DOT = re.compile(r"\s*\.\s*")
+_UNQUOTE = str.maketrans("", "", '"`[]')
+# Modifiers between CREATE/ALTER and the object type; each alternative starts with a
+# distinct word, so a failed match cannot backtrack
+_SCHEMA_OBJECT = re.compile(
+    r"(?:CREATE|ALTER)\s+(?:OR\s+REPLACE\s+|UNIQUE\s+|GLOBAL\s+|LOCAL\s+|TEMP\s+|"
+    r"TEMPORARY\s+|UNLOGGED\s+|MATERIALIZED\s+)*(TABLE|VIEW|INDEX)\b",
+    re.IGNORECASE,
+)
+
+
+class FocusTableError(ValueError):
+    """Raised when none of the ``focus_tables`` given to the SQL strategy is in the schema."""
+
+
+class _StatementScanner:
+    """
+    Resumable single-pass SQL statement scanner yielding ``(start, body, end, kind)`` spans.
+
+    ``buffer[start:end]`` is a statement including its leading comments and terminating
+    semicolon, ``body`` is where its first keyword starts and ``kind`` is that keyword
+    upper-cased (``""`` if it does not start with one). A semicolon ends a statement only
+    outside strings, quoted identifiers, comments, ``$tag$`` bodies and parentheses, and
+    the data rows following ``COPY ... FROM stdin;`` are skipped up to their ``\\.`` line.
+
+    Each delimiter is found with one regex search and its closing partner with one more,
+    so the scan is O(N) with no backtracking. An unterminated quote, block comment or
+    dollar tag is read as plain text instead of swallowing the rest of the input; after
+    the first such miss that delimiter class is never treated as an opener again, which
+    keeps adversarial input (thousands of stray quotes) linear as well.
+
+    A backslash escapes the next character only inside ``E'...'`` strings, or inside any
+    string with ``backslash_escapes`` (MySQL and similar dialects); elsewhere it is plain.
+
+    ``scan`` may be fed successive newline-terminated chunks (no delimiter can straddle a
+    boundary then) with ``final=False``. Open constructs and parenthesis depth carry over,
+    and only the text of statements whose kind is in ``retain`` is kept between chunks,
+    so memory is bounded by the largest retained statement plus one chunk. Spans index
+    ``buffer`` as it is during the ``scan`` call that yields them.
+    """
+
+    def __init__(
+        self, retain: frozenset[str] | None = None, backslash_escapes: bool = False
+    ) -> None:
+        self.retain = retain
+        self.backslash_escapes = backslash_escapes
+        self.buffer = ""
+        self.pos = self.start = self.body = self.depth = 0
+        self.kind: str | None = None
+        self.retaining = True
+        # Closing partner still being searched for, its delimiter class, and its opener
+        self.closer: str | None = None
+        self.group = ""
+        self.opened = -1
+        self.escaped = False
+        self.copy_data = False
+        self.unterminated: set[str] = set()
+
+    def scan(self, text: str, final: bool = True) -> Iterator[tuple[int, int, int, str]]:
+        if self.retaining:
+            shift = self.start
+            self.buffer = self.buffer[shift:] + text
+            self.pos -= shift
+            self.body -= shift
+            self.opened = self.opened - shift if self.opened >= 0 else -1
+            self.start = 0
+        else:
+            # The statement in progress is not retained: earlier chunks are simply dropped
+            self.buffer = text
+            self.pos = 0
+            self.opened = -1
+
+        buf = self.buffer
+        length = len(buf)
+
+        while True:
+            if self.closer is not None:
+                if self._close(buf, final):
+                    continue
+                if not final or self.opened < 0:
+                    break
+                self.unterminated.add(self.group)
+                self.closer = None
+                self.pos = self.opened + 1
+
+            if self.copy_data:
+                copy_end = _COPY_END.search(buf, self.pos)
+                if copy_end is None:
+                    self.pos = length
+                    break
+                self.pos = self.start = copy_end.end()
+                self.copy_data = False
+                self.retaining = True
+
+            if self.kind is None:
+                # Still ahead of the first keyword: skip whitespace, then classify unless a
+                # leading comment comes first (the comment is stepped over below)
+                self.pos = _WHITESPACE.match(buf, self.pos).end()  # type: ignore[union-attr]
+                if self.pos >= length:
+                    break
+                if not buf.startswith(("--", "/*"), self.pos):
+                    self.body = self.pos
+                    keyword = _KEYWORD.match(buf, self.pos)
+                    self.kind = keyword.group().upper() if keyword else ""
+                    self.retaining = (
+                        self.retain is None or self.kind in self.retain or self.kind == "COPY"
+                    )
+
+            match = _SQL_TOKENS.search(buf, self.pos)
+            if match is None:
+                self.pos = length
+                break
+            delimiter = match.group()
+            self.pos = match.end()
+
+            if delimiter == ";":
+                if self.depth == 0:
+                    yield self.start, self.body, self.pos, self.kind or ""
+                    if self.kind == "COPY" and _COPY_FROM_STDIN.search(buf, self.body, self.pos):
+                        self.copy_data = True
+                    self.start = self.pos
+                    self.kind = None
+                    self.retaining = not self.copy_data
+            elif delimiter == "(":
+                self.depth += 1
+            elif delimiter == ")":
+                self.depth = max(self.depth - 1, 0)
+            else:
+                group = "$" if delimiter[0] == "$" else delimiter
+                if group in self.unterminated:
+                    continue
+                self.closer = {"--": "\n", "/*": "*/"}.get(delimiter, delimiter)
+                self.group = group
+                self.opened = match.start()
+                self.escaped = delimiter == "'" and (
+                    self.backslash_escapes
+                    or (self.opened > 0 and _ESCAPE_PREFIX.match(buf, self.opened - 1) is not None)
+                )
+
+        if final and self.kind is not None:
+            yield self.start, self.body, length, self.kind
+            self.kind = None
+
+    def _close(self, buf: str, final: bool) -> bool:
+        """Moves past the pending closing partner; False if it is not in this chunk."""
+        closer = self.closer
+        if closer in _QUOTE_END:
+            # A doubled quote is an escape; in escape strings so is a backslash
+            pattern = _ESCAPED_STRING_END if self.escaped else _QUOTE_END[closer]
+            while True:
+                end = pattern.search(buf, self.pos)
+                if end is None:
+                    break
+                self.pos = end.end()
+                if end.group() == "\\":
+                    self.pos += 1
+                elif buf.startswith(closer, self.pos):
+                    self.pos += 1
+                else:
+                    self.closer = None
+                    return True
+        elif closer is not None:
+            end_idx = buf.find(closer, self.pos)
+            if end_idx != -1 or (final and closer == "\n"):
+                self.pos = len(buf) if end_idx == -1 else end_idx + len(closer)
+                self.closer = None
+                return True
+
+        self.pos = len(buf)
+        return False
+
+
+def _scan_statements(content: str, dialect: Any = None) -> Iterator[tuple[int, int, int, str]]:
+    """Scans a complete SQL script written in ``dialect``; see ``_StatementScanner``."""
+    return _StatementScanner(backslash_escapes=_backslash_escapes(dialect)).scan(content)
+
+
+def _backslash_escapes(dialect: Any) -> bool:
+    """Whether strings of the sqlglot ``dialect`` (a name or ``Dialect``) take backslash escapes."""
+    if isinstance(dialect, str):
+        # sqlglot accepts settings after the name: "mysql, normalization_strategy=..."
+        name = dialect.split(",", 1)[0]
+    else:
+        name = getattr(dialect, "__name__", type(dialect).__name__)
+    return name.strip().lower() in _BACKSLASH_DIALECTS
+
+
+def _regex_ddl(content: str, body: int, end: int, kind: str) -> str | None:
+    """Tier 2 rendering of one statement span: the stripped source of kept DDL, else None."""
+    if kind not in _REGEX_DDL_OBJECTS or content[end - 1] != ";":
+        return None
+    # Only the statement header is matched, never its body
+    header = _SCHEMA_OBJECT.match(content, body, end)
+    if not header or header.group(1).upper() not in _REGEX_DDL_OBJECTS[kind]:
+        return None
+    return content[body:end].strip()
+
+
+def _unquote(name: str) -> str:
+    """Drops identifier quoting and the whitespace around qualifying dots."""
+    return _QUALIFYING_DOT.sub(".", name.strip()).translate(_UNQUOTE)
+
+
+def _split_columns(statement: str, pos: int) -> list[str]:
+    """
+    Splits the parenthesized list opening just before ``pos`` at its top-level commas.
+
+    Nested parentheses (``DECIMAL(10, 2)``, ``CHECK (...)``) and quoted text are stepped
+    over; an unclosed list yields whatever was read.
+    """
+    items = []
+    depth = 0
+    start = pos
+    while match := _COLUMN_LIST_TOKENS.search(statement, pos):
+        delimiter = match.group()
+        pos = match.end()
+        if delimiter in "'\"`":
+            close = statement.find(delimiter, pos)
+            pos = len(statement) if close == -1 else close + 1
+        elif delimiter == "(":
+            depth += 1
+        elif depth:
+            depth -= delimiter == ")"
+        else:
+            items.append(statement[start : match.start()])
+            start = pos
+            if delimiter == ")":
+                return items
+    items.append(statement[start:])
+    return items
+
+
+def _reference(table: str, columns: str | None) -> str:
+    """Compact foreign key target: ``table.column``, ``table(a,b)`` or ``table``."""
+    names = [_unquote(c) for c in columns.split(",")] if columns else []
+    if len(names) == 1:
+        return f"{_unquote(table)}.{names[0]}"
+    return f"{_unquote(table)}({','.join(names)})" if names else _unquote(table)
+
+
+class _OutlineTable:
+    """One line of a compact schema outline: ``name(column:type marks, ...)``."""
+
+    def __init__(self, name: str) -> None:
+        self.name = _unquote(name)
+        # Column name -> [type, marks...]; insertion ordered
+        self.columns: dict[str, list[str]] = {}
+        # Composite keys, which belong to no single column
+        self.keys: list[str] = []
+        # Lower-cased names of the tables its foreign keys point at
+        self.references: list[str] = []
+
+    def add_key(self, columns: str, target: str | None, target_columns: str | None) -> None:
+        """Records a primary key (no ``target``) or a foreign key on ``columns``."""
+        names = [_unquote(c) for c in columns.split(",")]
+        reference = None if target is None else _reference(target, target_columns)
+        if target is not None:
+            self.references.append(_unquote(target).lower())
+        mark = "PK" if reference is None else f"-> {reference}"
+        if len(names) == 1 and names[0] in self.columns:
+            self.columns[names[0]].append(mark)
+        elif reference is None:
+            self.keys.append(f"PK({','.join(names)})")
+        else:
+            self.keys.append(f"FK({','.join(names)}) {mark}")
+
+    def render(self) -> str:
+        columns = [
+            f"{name}:{' '.join(spec)}" if spec[0] else " ".join([name, *spec[1:]])
+            for name, spec in self.columns.items()
+        ]
+        return f"{self.name}({', '.join(columns + self.keys)})"
+
+
+class _SchemaOutline:
+    """
+    Compact schema: per table its columns with types, primary keys and foreign key targets.
+
+    Storage clauses, defaults, checks, indexes and constraint names are left out, which
+    typically makes a table several times cheaper than its DDL. Statements are read as
+    text, so the raw statements of Tier 2 and the normalized output of Tier 1 share this
+    code; PRIMARY/FOREIGN KEY constraints added by a later ALTER TABLE are folded into the
+    table they alter. Other objects (views, indexes, functions) have no outline.
+
+    The foreign keys double as the edges of an undirected table graph for ``distances``.
+    """
+
+    def __init__(self) -> None:
+        self.tables: dict[str, _OutlineTable] = {}
+
+    def add(self, statement: str) -> _OutlineTable | None:
+        """Folds one DDL statement into the outline; returns the table it touched, if any."""
+        statement = statement[_LEADING_COMMENTS.match(statement).end() :]  # type: ignore[union-attr]
+        header = _CREATE_TABLE.match(statement)
+        if header:
+            table = _OutlineTable(header.group(1))
+            for item in _split_columns(statement, header.end()):
+                self._add_item(table, item.strip())
+            self.tables[table.name.lower()] = table
+            return table
+
+        header = _ALTER_TABLE.match(statement)
+        if header is None:
+            # An index adds nothing to the outline but still belongs to its table
+            header = _CREATE_INDEX.match(statement)
+            return self.tables.get(_unquote(header.group(1)).lower()) if header else None
+        altered = self.tables.get(_unquote(header.group(1)).lower())
+        if altered is not None:
+            for key in _KEY_CLAUSE.finditer(statement, header.end()):
+                self._add_key(altered, key)
+        return altered
+
+    @staticmethod
+    def _add_key(table: _OutlineTable, key: re.Match[str]) -> None:
+        primary, foreign, target, target_columns = key.groups()
+        if primary is not None:
+            table.add_key(primary, None, None)
+        else:
+            table.add_key(foreign, target, target_columns)
+
+    @classmethod
+    def _add_item(cls, table: _OutlineTable, item: str) -> None:
+        if _TABLE_CONSTRAINT.match(item):
+            key = _KEY_CLAUSE.search(item)
+            if key:
+                cls._add_key(table, key)
+            return
+        column = _COLUMN.match(item)
+        if not column:
+            return
+        spec = [" ".join(column.group(2).split())]
+        if _INLINE_PRIMARY_KEY.search(item, column.end(2)):
+            spec.append("PK")
+        reference = _INLINE_REFERENCE.search(item, column.end(2))
+        if reference:
+            spec.append(f"-> {_reference(*reference.groups())}")
+            table.references.append(_unquote(reference.group(1)).lower())
+        table.columns[_unquote(column.group(1))] = spec
+
+    def lines(self) -> list[str]:
+        return [table.render() for table in self.tables.values()]
+
+    def distances(self, focus_tables: Iterable[str]) -> dict[str, int]:
+        """
+        Foreign key hops from the nearest focus table, for every table reachable from one.
+
+        Names match case-insensitively and without quoting, either in full or by their
+        unqualified part (``orders`` matches ``public.orders``), both for the focus tables
+        and for foreign key targets written without a schema.
+        """
+        by_short_name: dict[str, list[str]] = {}
+        for key in self.tables:
+            by_short_name.setdefault(key.rpartition(".")[2], []).append(key)
+
+        def resolve(name: str) -> list[str]:
+            return [name] if name in self.tables else by_short_name.get(name, [])
+
+        neighbours: dict[str, set[str]] = {key: set() for key in self.tables}
+        for key, table in self.tables.items():
+            for target in table.references:
+                for other in resolve(target):
+                    neighbours[key].add(other)
+                    neighbours[other].add(key)
+
+        distance = {key: 0 for name in focus_tables for key in resolve(_unquote(name).lower())}
+        queue = deque(distance)
+        while queue:
+            key = queue.popleft()
+            for other in neighbours[key]:
+                if other not in distance:
+                    distance[other] = distance[key] + 1
+                    queue.append(other)
+        return distance
+
+
+def _fits(
+    items: Iterable[str], budget: int, token_counter: Callable[[str], int], extra: int
+) -> bool:
+    """Whether ``items`` (each costing ``extra`` tokens on top) fit in ``budget``."""
+    used = 0
+    for item in items:
+        used += token_counter(item) + extra
+        if used > budget:
+            return False
+    return True
+
+
+def _fit_schema(
+    statements: list[str],
+    budget: int,
+    token_counter: Callable[[str], int],
+    focus_tables: Iterable[str] | None = None,
+) -> list[str]:
+    """
+    Chooses the lines to emit for ``statements``, each costing one newline token on top.
+
+    Without ``focus_tables`` that is every statement in full if they fit, else the compact
+    outline; either may still overflow and is truncated by the caller. With them, only
+    tables reachable from the focus set over foreign keys are kept, along with their
+    ALTER TABLE and CREATE INDEX statements. The neighbourhood is emitted in full when it
+    fits; otherwise its outline lines are packed nearest table first, skipping any line
+    that no longer fits so that smaller, more distant tables can still use the rest of
+    the budget. Kept lines stay in schema order.
+    """
+    if not focus_tables:
+        if _fits(statements, budget, token_counter, 1):
+            return statements
+        outline = _SchemaOutline()
+        for statement in statements:
+            outline.add(statement)
+        return outline.lines() if outline.tables else statements
+
+    focus_tables = [focus_tables] if isinstance(focus_tables, str) else list(focus_tables)
+    outline = _SchemaOutline()
+    owners = []
+    for statement in statements:
+        table = outline.add(statement)
+        owners.append(None if table is None else table.name.lower())
+    distance = outline.distances(focus_tables)
+    if not distance:
+        raise FocusTableError(
+            f"None of the focus tables {list(focus_tables)} is defined in the SQL schema."
+        )
+
+    neighbourhood = [s for s, owner in zip(statements, owners, strict=True) if owner in distance]
+    if _fits(neighbourhood, budget, token_counter, 1):
+        return neighbourhood
+
+    rank = {key: i for i, key in enumerate(outline.tables)}
+    tokens_left = budget
+    packed = set()
+    for key in sorted(distance, key=lambda k: (distance[k], rank[k])):
+        line_tokens = token_counter(outline.tables[key].render()) + 1
+        if line_tokens <= tokens_left:
+            packed.add(key)
+            tokens_left -= line_tokens
+    return [table.render() for key, table in outline.tables.items() if key in packed]
+
+
+def _render_ddl(statement: str, dialect: Any) -> tuple[str, ...]:
+    """Parses one statement with sqlglot and renders its schema-definition expressions."""
+    import sqlglot
+    from sqlglot import exp
+
+    rendered = []
+    for e in sqlglot.parse(statement, read=dialect):
+        # We strictly whitelist schema-definition objects to isolate DDL
+        if isinstance(e, (exp.Create, exp.Alter, exp.Drop)):
+            rendered.append(e.sql(dialect=dialect))
+    return tuple(rendered)
+
+
+def _render_ddl_batch(
+    statements: list[str], dialect: Any
+) -> tuple[list[tuple[str, ...]], str | None]:
+    """
+    Process pool entry point rendering a batch of statements.
+
+    A failure is returned as its message rather than raised: sqlglot's errors carry
+    constructor arguments that do not survive pickling back to the parent.
+    """
+    try:
+        return [_render_ddl(statement, dialect) for statement in statements], None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def clear_render_cache() -> None:
+    """Drops every cached Tier 1 rendering, e.g. to release memory after a large schema."""
+    with _RENDER_CACHE_LOCK:
+        _RENDER_CACHE.clear()
+
+
+def _render_all(statements: list[str], dialect: Any, workers: int = 1) -> list[tuple[str, ...]]:
+    """
+    Renders DDL statements through the shared cache, parsing only the misses.
+
+    With ``workers > 1`` and at least ``PARALLEL_MIN_DDL_CHARS`` characters of misses,
+    the misses are split into batches (several per worker, so one slow batch does not
+    idle the others) and parsed in a process pool. Results keep the input order either
+    way.
+    """
+    # Surrounding whitespace depends on the neighbouring statements, not on this one
+    statements = [statement.strip() for statement in statements]
+    keys = [(hashlib.blake2b(s.encode(), digest_size=16).digest(), dialect) for s in statements]
+    results: list[tuple[str, ...] | None] = []
+    with _RENDER_CACHE_LOCK:
+        for key in keys:
+            cached = _RENDER_CACHE.get(key)
+            if cached is not None:
+                _RENDER_CACHE.move_to_end(key)
+            results.append(cached)
+
+    missing = [i for i, cached in enumerate(results) if cached is None]
+    if workers > 1 and sum(len(statements[i]) for i in missing) >= PARALLEL_MIN_DDL_CHARS:
+        batch_size = -(-len(missing) // (workers * 4))
+        batches = [missing[i : i + batch_size] for i in range(0, len(missing), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_render_ddl_batch, [statements[i] for i in batch], dialect)
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures, strict=True):
+                rendered, error = future.result()
+                if error is not None:
+                    raise ValueError(f"sqlglot failed in a parse worker: {error}")
+                for i, ddl in zip(batch, rendered, strict=True):
+                    results[i] = ddl
+    else:
+        for i in missing:
+            results[i] = _render_ddl(statements[i], dialect)
+
+    with _RENDER_CACHE_LOCK:
+        for i in missing:
+            _RENDER_CACHE[keys[i]] = results[i]  # type: ignore[assignment]
+        while len(_RENDER_CACHE) > RENDER_CACHE_SIZE:
+            _RENDER_CACHE.popitem(last=False)
+
+    return results  # type: ignore[return-value]
+
 
 class SqlDietStrategy(DietStrategy):
     """
@@ -14,12 +611,29 @@ class SqlDietStrategy(DietStrategy):
     def compress(
         self, content: str, budget: int, token_counter: Callable[[str], int], **kwargs: Any
     ) -> str:
+        """
+        Keeps the schema of ``content`` within ``budget``, degrading through the three tiers.
+
+        Keyword Args:
+            dialect (str | None): sqlglot dialect used to read and render Tier 1 DDL.
+            parse_workers (int): Processes used to parse DDL with sqlglot (default: 1).
+                The pool only starts when at least ``PARALLEL_MIN_DDL_CHARS`` characters
+                of DDL miss the render cache. On platforms that spawn workers, the calling
+                script needs an ``if __name__ == "__main__":`` guard.
+            focus_tables (list[str] | None): Tables the caller cares about. Only tables
+                reachable from them over foreign keys (in either direction) are kept,
+                nearest first when the budget is tight; see ``_fit_schema``. Raises
+                ``FocusTableError`` when none of them is defined, whichever tier runs.
+        """
         # Tier 1: Optimal Execution (Abstract Syntax Tree Generation via sqlglot)
         try:
             return self._parse_ast(content, budget, token_counter, **kwargs)
         except ImportError:
             # sqlglot is an optional extra context-diet[sql]
             pass
+        except FocusTableError:
+            # A focus table missing from the schema is the caller's mistake, not a tier's
+            raise
         except Exception as e:
             # Trapping any potential parsing failure from the AST module (e.g. unrecognizable dialect)
             import logging
@@ -30,6 +644,8 @@ class SqlDietStrategy(DietStrategy):
         # Tier 2: Degraded Fallback (Regex Pattern Extraction)
         try:
             return self._extract_ddl_regex(content, budget, token_counter, **kwargs)
+        except FocusTableError:
+            raise
         except Exception as e:
             import logging
 
@@ -43,35 +659,186 @@ class SqlDietStrategy(DietStrategy):
 
         return PlainTextDietStrategy().compress(content, budget, token_counter, **kwargs)
 
+    def compress_stream(
+        self,
+        chunks: Iterable[str],
+        budget: int,
+        token_counter: Callable[[str], int],
+        **kwargs: Any,
+    ) -> str:
+        """
+        Streaming counterpart of ``compress`` for dumps too large to hold in memory.
+
+        ``chunks`` must be newline-terminated (see ``context_diet.streaming.iter_text``).
+        Only the text of DDL statements is kept, one statement at a time, and ``COPY ...
+        FROM stdin`` payloads are skipped without being buffered. Each statement is
+        rendered by sqlglot when it is installed (a statement it rejects keeps its Tier 2
+        rendering instead of degrading the whole stream) and emitted in file order; the
+        Tier 2 path emits CREATE before ALTER statements like ``compress`` does. When the
+        DDL outgrows the budget, the schema switches to the compact outline as in
+        ``compress``. Reading stops as soon as the budget is spent. Without any DDL, the head
+        of the stream is sliced as in Tier 3.
+
+        With ``focus_tables`` the whole stream is read, since any later statement may add a
+        foreign key to the neighbourhood; only DDL text is kept meanwhile. As in ``compress``,
+        ``FocusTableError`` is raised when none of them is defined.
+        """
+        dialect = kwargs.get("dialect", None)
+        try:
+            import sqlglot  # noqa: F401
+
+            use_ast = True
+        except ImportError:
+            use_ast = False
+
+        scanner = _StatementScanner(_DDL_KEYWORDS, _backslash_escapes(dialect))
+        # Tier 3 never looks past budget * 5 characters, so neither does this buffer
+        head: list[str] = []
+        head_room = budget * 5
+        output: list[str] = []
+        alters: list[str] = []
+
+        def ddl_statements() -> Iterator[tuple[tuple[str, ...], str]]:
+            nonlocal head_room
+            for chunk, final in itertools.chain(((c, False) for c in chunks), [("", True)]):
+                if head_room > 0 and chunk:
+                    head.append(chunk[:head_room])
+                    head_room -= len(head[-1])
+                for start, body, end, kind in scanner.scan(chunk, final):
+                    if kind not in _DDL_KEYWORDS:
+                        continue
+                    buf = scanner.buffer
+                    rendered = None
+                    if use_ast:
+                        try:
+                            rendered = _render_all([buf[start:end]], dialect)[0]
+                        except Exception:
+                            rendered = None
+                    if rendered is None:
+                        regex_statement = _regex_ddl(buf, body, end, kind)
+                        rendered = () if regex_statement is None else (regex_statement,)
+                    yield rendered, kind
+
+        focus_tables = kwargs.get("focus_tables")
+        if focus_tables:
+            creates: list[str] = []
+            for rendered, kind in ddl_statements():
+                # Tier 2 keeps CREATE before ALTER statements, as everywhere else
+                target = alters if not use_ast and kind == "ALTER" else creates
+                target.extend(ddl if ddl.endswith(";") else ddl + ";" for ddl in rendered)
+            remaining = _fit_schema(creates + alters, budget, token_counter, focus_tables)
+        else:
+            remaining = self._stream_schema(
+                ddl_statements(), budget, token_counter, use_ast, output, alters
+            )
+
+        tokens_used = sum(token_counter(statement) + 1 for statement in output)
+        for statement in remaining:
+            item_tokens = token_counter(statement) + 1
+            if tokens_used + item_tokens > budget:
+                break
+            output.append(statement)
+            tokens_used += item_tokens
+
+        if not output:
+            from context_diet.strategies.plain_text import PlainTextDietStrategy
+
+            return PlainTextDietStrategy().compress("".join(head), budget, token_counter)
+
+        return "\n".join(output) + "\n"
+
+    @staticmethod
+    def _stream_schema(
+        statements: Iterator[tuple[tuple[str, ...], str]],
+        budget: int,
+        token_counter: Callable[[str], int],
+        use_ast: bool,
+        output: list[str],
+        alters: list[str],
+    ) -> list[str]:
+        """
+        Consumes rendered statements until the budget is spent, filling ``output`` in order.
+
+        Returns the lines still to be packed after ``output``: the held-back Tier 2 ALTERs
+        or, once the full DDL has overflowed, the compact outline (``output`` is then
+        cleared).
+        """
+        tokens_used = 0
+        alter_tokens = 0
+        # Once the full DDL overflows, the rest of the stream only feeds the compact outline
+        outline: _SchemaOutline | None = None
+        table_tokens: dict[str, int] = {}
+        outline_tokens = 0
+
+        def add_to_outline(statement: str) -> bool:
+            """Folds ``statement`` into the outline; False once the outline overflows."""
+            nonlocal outline_tokens
+            assert outline is not None
+            table = outline.add(statement)
+            if table is not None:
+                key = table.name.lower()
+                line_tokens = token_counter(table.render()) + 1
+                outline_tokens += line_tokens - table_tokens.get(key, 0)
+                table_tokens[key] = line_tokens
+            return outline_tokens <= budget
+
+        for statement, kind in ((ddl, kind) for rendered, kind in statements for ddl in rendered):
+            if not statement.endswith(";"):
+                statement += ";"
+            if outline is not None:
+                if not add_to_outline(statement):
+                    break
+            elif not use_ast and kind == "ALTER":
+                # Held back until every CREATE has been seen, but never beyond the budget
+                item_tokens = token_counter(statement) + 1  # +1 for newline
+                if alter_tokens + item_tokens <= budget:
+                    alters.append(statement)
+                    alter_tokens += item_tokens
+            elif tokens_used + (item_tokens := token_counter(statement) + 1) > budget:
+                outline = _SchemaOutline()
+                # The outline only grows, so the last fold tells whether it still fits
+                fits = [add_to_outline(seen) for seen in [*output, statement, *alters]]
+                if not fits[-1]:
+                    break
+            else:
+                output.append(statement)
+                tokens_used += item_tokens
+
+        if outline is None:
+            return alters
+        if not outline.tables:
+            return []
+        output.clear()
+        return outline.lines()
+
     def _parse_ast(
         self, content: str, budget: int, token_counter: Callable[[str], int], **kwargs: Any
     ) -> str:
         """Tier 1: Constructs a mathematically perfect AST using the optional sqlglot package."""
-        import sqlglot
-        from sqlglot import exp
-
-        # Parse the SQL into an expression tree, returning a list of valid expressions
+        # Only DDL statements are parsed; a data dump is overwhelmingly INSERT rows whose
+        # ASTs would be built just to be thrown away by the whitelist
         dialect = kwargs.get("dialect", None)
-        expressions = sqlglot.parse(content, read=dialect)
+        statements = [
+            content[start:end]
+            for start, _, end, kind in _scan_statements(content, dialect)
+            if kind in _DDL_KEYWORDS
+        ]
+        valid_ddl = [
+            # Always ensure the statment ends cleanly
+            ddl if ddl.endswith(";") else ddl + ";"
+            for rendered in _render_all(statements, dialect, kwargs.get("parse_workers", 1))
+            for ddl in rendered
+        ]
 
-        valid_ddl = []
-        for e in expressions:
-            if not e:
-                continue
-            # We strictly whitelist schema-definition objects to isolate DDL
-            if isinstance(e, (exp.Create, exp.Alter, exp.Drop)):
-                valid_ddl.append(e.sql(dialect=dialect))
+        # Rather than dropping tables, switch the whole schema to its compact outline
+        valid_ddl = _fit_schema(valid_ddl, budget, token_counter, kwargs.get("focus_tables"))
 
         # Now we compile the extracted DDl until we hit the budget boundary
         output = ""
         tokens_used = 0
 
         for statement in valid_ddl:
-            # Always ensure the statment ends cleanly
-            if not statement.endswith(";"):
-                statement += ";"
-
-            item_tokens = token_counter(statement)
+            item_tokens = token_counter(statement) + 1  # +1 for newline
 
             if tokens_used + item_tokens > budget:
                 if tokens_used == 0:
@@ -104,44 +871,37 @@ class SqlDietStrategy(DietStrategy):
         """
 
         # Pass 1: Destructive DML Stripping
-        # We must use re.DOTALL (re.S) so `.*?` consumes across multi-line insert rows until standard semicolon
-        content = re.sub(
-            r"(?i)^\s*(INSERT|UPDATE|DELETE|BEGIN|COMMIT|ROLLBACK)\s+.*?;",
-            "",
-            content,
-            flags=re.MULTILINE | re.DOTALL,
-        )
-
-        # Pass 2: DDL Structural Extraction
-        ddl_statements = []
-
-        # Find all CREATE statements
-        create_pattern = re.compile(
-            r"^\s*CREATE\s+(?:TABLE|VIEW|INDEX)\s+([\w\.]+)\s*\(.*?\)\s*;",
-            re.IGNORECASE | re.MULTILINE | re.DOTALL,
-        )
-        for match in create_pattern.finditer(content):
-            ddl_statements.append(match.group(0).strip())
+        # Statement spans come from the linear scanner, so DML is dropped by its kind and
+        # no pattern ever has to consume an INSERT body (or a semicolon inside a string).
+        creates = []
+        alters = []
+        for _, body, end, kind in _scan_statements(content, kwargs.get("dialect")):
+            # Pass 2: DDL Structural Extraction
+            statement = _regex_ddl(content, body, end, kind)
+            if statement is None:
+                continue
+            if kind == "CREATE":
+                creates.append(statement)
+            else:
+                alters.append(statement)
 
-        # Find all ALTER statements (foreign keys)
-        alter_pattern = re.compile(
-            r"^\s*ALTER\s+(?:TABLE|VIEW)\s+([\w\.]+)\s+.*?;",
-            re.IGNORECASE | re.MULTILINE | re.DOTALL,
-        )
-        for match in alter_pattern.finditer(content):
-            ddl_statements.append(match.group(0).strip())
+        ddl_statements = creates + alters
 
         if not ddl_statements:
             from context_diet.interfaces import ContextBudgetExceededError
 
             raise ContextBudgetExceededError("No viable SQL DDL schema detected via Regex.")
 
+        # Same compact fallback and focus selection as Tier 1, before any table is dropped
+        ddl_statements = _fit_schema(
+            ddl_statements, budget, token_counter, kwargs.get("focus_tables")
+        )
+
         # Pass 3: Budget Reassembly prioritizing CREATE structures
         output = ""
         tokens_used = 0
 
-        # DDL statements from Pass 2 are already natively clustered due to iteration order,
-        # so CREATE statements are naturally processed before ALTERs.
+        # CREATE statements are processed before ALTERs (foreign keys)
         for stmt in ddl_statements:
             item_tokens = token_counter(stmt) + 1  # +1 for newline
             if tokens_used + item_tokens > budget:
@@ -1,36 +1,518 @@
-from collections.abc import Callable
+import bisect
+import io
+import itertools
+import re
+import sys
+from collections import defaultdict
+from collections.abc import Callable, Iterator
 from typing import Any
 
 from context_diet.interfaces import DietStrategy
 
+# Deepest masking level considered when the comment-free document exceeds the budget
+MAX_PRUNE_DEPTH = 6
+# Fewest entries per sequence/mapping the breadth cap keeps before a level is given up
+MIN_BREADTH_ENTRIES = 5
+# Ceilings on what aliases may expand to within one document ("billion laughs" protection)
+MAX_ALIAS_NODES = 1_000_000
+MAX_ALIAS_BYTES = 64 * 1024 * 1024
+
+# Where a document of a stream starts: at its `---` marker or, after a `...` end marker,
+# at the directives (`%YAML 1.2`) that open it
+_DOCUMENT_START = re.compile(
+    r"^---(?=[ \t\r\n]|$)|^\.\.\.[ \t]*(?:#[^\n]*)?\r?\n(?:[ \t]*(?:#[^\n]*)?\r?\n)*(?=%)",
+    re.MULTILINE,
+)
+_TOMBSTONE_DOCUMENT = "---\n__context_diet_warning__: TRUNCATED\n"
+_NULL_SCALARS = ("", "~", "null", "Null", "NULL")
+_OMITTED_KEY = "__context_diet_warning__"
+
+# A block scalar header (`|`, `>-`, `|2+` ...) ending a line, optionally after a tag/anchor
+_BLOCK_SCALAR_HEADER = re.compile(r"(?:^[ \t]*|([:\-])[ \t]+)(?:[!&]\S*[ \t]+)*[|>][1-9+-]{0,2}$")
+_SEQUENCE_PREFIX = re.compile(r"(?:-[ \t]+)+")
+
+
+def _safe_yaml() -> Any:
+    """
+    Builds the plain-object YAML engine used for validation and pruning.
+
+    ``typ="safe"`` binds the libyaml ``CParser``/``CEmitter`` from ``ruamel.yaml.clib``
+    whenever it is installed and silently falls back to pure Python otherwise. The
+    round-trip (``rt``) engine is always pure Python, so it is only a fallback for comments.
+    """
+    from ruamel.yaml import YAML
+
+    yaml_safe = YAML(typ="safe")
+    yaml_safe.default_flow_style = False
+    # The safe representer sorts mapping keys by default; keep the source order instead
+    yaml_safe.representer.sort_base_mapping_type_on_output = False
+    return yaml_safe
+
+
+def _strip_comments(content: str) -> str:
+    """
+    Removes full-line and trailing comments from YAML source in one linear pass.
+
+    A ``#`` only opens a comment at the start of a line or after whitespace, outside quoted
+    scalars (which may span lines) and outside block scalar (``|``/``>``) content. Full-line
+    comments are dropped with their line; every other byte is returned unchanged.
+    """
+    output: list[str] = []
+    quote = ""
+    flow_depth = 0
+    # While >= 0, blank lines and lines indented deeper than this are block scalar content
+    block_parent_indent = -1
+
+    for line in io.StringIO(content):
+        body = line.rstrip("\r\n")
+        indent = len(body) - len(body.lstrip(" "))
+
+        if block_parent_indent >= 0:
+            if not body.strip() or indent > block_parent_indent:
+                output.append(line)
+                continue
+            block_parent_indent = -1
+
+        cut = len(body)
+        plain = False
+        i = 0
+        while i < len(body):
+            ch = body[i]
+            if quote:
+                if ch == "\\" and quote == '"':
+                    i += 1
+                elif ch == quote:
+                    if quote == "'" and body.startswith("''", i):
+                        i += 1
+                    else:
+                        quote = ""
+            elif ch == "#" and (i == 0 or body[i - 1] in " \t"):
+                cut = i
+                break
+            elif ch in " \t":
+                pass
+            elif plain and not (flow_depth and ch in ",[]{}"):
+                # Inside a plain scalar only `: ` (or a flow indicator) ends the scalar
+                if ch == ":" and (i + 1 == len(body) or body[i + 1] in " \t,]}"):
+                    plain = False
+            else:
+                plain = False
+                if ch in "'\"":
+                    quote = ch
+                elif ch in "[{":
+                    flow_depth += 1
+                elif ch in "]}":
+                    flow_depth = max(flow_depth - 1, 0)
+                elif ch in "&!*":
+                    # Anchors, tags and aliases run to the next whitespace
+                    while i + 1 < len(body) and body[i + 1] not in " \t":
+                        i += 1
+                elif not (ch in "-?:," and (i + 1 == len(body) or body[i + 1] in " \t")):
+                    plain = ch != ","
+            i += 1
+
+        if cut < len(body):
+            kept = body[:cut].rstrip(" \t")
+            if not kept:
+                continue
+            line = kept + line[len(body) :]
+        else:
+            kept = body
+
+        output.append(line)
+
+        if not quote and not flow_depth:
+            header = _BLOCK_SCALAR_HEADER.search(kept)
+            if header:
+                block_parent_indent = indent
+                sequence = _SEQUENCE_PREFIX.match(kept, indent)
+                if header.group(1) == ":" and sequence:
+                    # `- key: |` - the scalar belongs to the mapping opened after the dashes
+                    block_parent_indent = sequence.end()
+
+    return "".join(output)
+
+
+def _event_signatures(yaml_safe: Any, text: str) -> Iterator[tuple[Any, ...]]:
+    """Yields a comparable tuple per parser event; comments never produce events."""
+    for event in yaml_safe.parse(text):
+        yield (
+            type(event).__name__,
+            getattr(event, "value", None),
+            getattr(event, "tag", None),
+            getattr(event, "anchor", None),
+            getattr(event, "implicit", None),
+            getattr(event, "style", None),
+        )
+
+
+def _guard_aliases(
+    signatures: Iterator[tuple[Any, ...]], max_nodes: int, max_bytes: int
+) -> Iterator[tuple[Any, ...]]:
+    """
+    Passes event signatures through while tallying what their aliases expand to.
+
+    Every anchored node records its expanded (nodes, scalar bytes) size, and an alias adds
+    the size of its anchor, so nested aliases are accounted for without expanding anything.
+    Raises as soon as the alias expansion of the document crosses either ceiling.
+    """
+    from context_diet.interfaces import ContextBudgetExceededError
+
+    anchors: dict[str, tuple[int, int]] = {}
+    # [nodes, bytes, anchor] of every collection still open
+    open_nodes: list[list[Any]] = []
+    alias_nodes = alias_bytes = 0
+
+    for signature in signatures:
+        kind, value, _, anchor = signature[:4]
+        size: tuple[int, int] | None = None
+        if kind == "ScalarEvent":
+            size = (1, len(value))
+            if anchor is not None:
+                anchors[anchor] = size
+        elif kind == "AliasEvent":
+            # An alias to a still-open anchor (a recursive structure) is counted as one node
+            size = anchors.get(anchor, (1, 0))
+            alias_nodes += size[0]
+            alias_bytes += size[1]
+            if alias_nodes > max_nodes or alias_bytes > max_bytes:
+                raise ContextBudgetExceededError(
+                    f"YAML aliases expand beyond the size ceiling ({alias_nodes} nodes, "
+                    f"{alias_bytes} bytes)."
+                )
+        elif kind in ("MappingStartEvent", "SequenceStartEvent"):
+            open_nodes.append([1, 0, anchor])
+        elif kind in ("MappingEndEvent", "SequenceEndEvent"):
+            nodes, size_bytes, name = open_nodes.pop()
+            size = (nodes, size_bytes)
+            if name is not None:
+                anchors[name] = size
+
+        if size is not None and open_nodes:
+            open_nodes[-1][0] += size[0]
+            open_nodes[-1][1] += size[1]
+        yield signature
+
+
+def _iter_documents(content: str) -> Iterator[str]:
+    """
+    Lazily splits a YAML stream into per-document source slices.
+
+    ``---`` and ``...`` markers are only recognised at column 0, where they cannot occur
+    inside a block scalar, so a lexical scan is enough. Leading directives and comments
+    stay attached to the document that follows them, including directives after a ``...``
+    end marker; empty documents are skipped. Always yields at least once.
+    """
+    start = 0
+    emitted = False
+    for marker in _DOCUMENT_START.finditer(content):
+        boundary = marker.start() if marker.group().startswith("---") else marker.end()
+        if boundary == 0:
+            continue
+        chunk = content[start:boundary]
+        if _has_document_content(chunk):
+            yield chunk
+            emitted = True
+            start = boundary
+        elif chunk.startswith("---"):
+            start = boundary
+
+    tail = content[start:]
+    if not emitted or _has_document_content(tail):
+        yield tail
+
+
+def _has_document_content(chunk: str) -> bool:
+    """True if the slice holds anything besides markers, directives, comments or blanks."""
+    for line in io.StringIO(chunk):
+        stripped = line.strip()
+        if stripped.startswith("---"):
+            stripped = stripped[3:].strip()
+        if stripped and stripped != "..." and not stripped.startswith(("#", "%")):
+            return True
+    return False
+
+
+def _scalar_width(node: Any) -> int:
+    """Approximate emitted width of an inline scalar (or empty container)."""
+    if node is None:
+        return 4
+    if isinstance(node, bool):
+        return 4 if node else 5
+    if isinstance(node, (dict, list)):
+        return 2
+    return len(str(node))
+
+
+def _omitted_marker(count: int) -> str:
+    """Value of the marker entry that replaces the tail of a breadth-capped container."""
+    return f"TRUNCATED ({count} more {'entry' if count == 1 else 'entries'})"
+
+
+# Per-depth (ranks, cumulative chars) tables for normal and collapsed entries, plus per-depth
+# (rank, length, marker chars) for every container long enough to be capped
+_SizeProfile = tuple[
+    list[tuple[list[int], list[int]]],
+    list[tuple[list[int], list[int]]],
+    list[list[tuple[int, int, int]]],
+]
+
+
+def _cumulative(sizes: dict[int, int]) -> tuple[list[int], list[int]]:
+    """Turns a rank -> chars map into sorted ranks and running totals (leading zero)."""
+    ranks = sorted(sizes)
+    return ranks, list(itertools.accumulate((sizes[rank] for rank in ranks), initial=0))
+
+
+def _sum_below(table: tuple[list[int], list[int]], limit: int) -> int:
+    """Total chars of the entries whose rank is below ``limit``."""
+    ranks, totals = table
+    return totals[bisect.bisect_left(ranks, limit)]
+
+
+def _estimate_size(profile: _SizeProfile, max_depth: int, max_entries: int | None) -> int:
+    """Estimated dump size of ``_mask_deep_nodes(data, max_depth, max_entries=...)``."""
+    normal, collapsed, markers = profile
+    limit = sys.maxsize if max_entries is None else max_entries
+
+    total = sum(_sum_below(normal[depth], limit) for depth in range(1, max_depth))
+    total += _sum_below(collapsed[max_depth], limit)
+    for depth in range(max_depth):
+        total += sum(chars for rank, length, chars in markers[depth] if rank < limit < length)
+    return total
+
+
+def _search_breadth(profile: _SizeProfile, max_depth: int, char_budget: float) -> int | None:
+    """
+    Binary-searches the largest breadth cap whose estimate fits ``char_budget``.
+
+    Returns None when even ``MIN_BREADTH_ENTRIES`` entries per container do not fit, or
+    when no container at this level is long enough for a cap to matter.
+    """
+    markers = profile[2]
+    longest = max(
+        (length for depth in range(max_depth) for _, length, _ in markers[depth]), default=0
+    )
+    if _estimate_size(profile, max_depth, MIN_BREADTH_ENTRIES) > char_budget or not longest:
+        return None
+
+    low, high = MIN_BREADTH_ENTRIES, longest - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _estimate_size(profile, max_depth, mid) <= char_budget:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
 
 class YamlDietStrategy(DietStrategy):
     """
-    Compresses YAML by removing comments, then progressively pruning nested depth
-    until the result fits within the token budget.
+    Compresses YAML by removing comments, then progressively pruning nested depth (and,
+    within a level, the breadth of long sequences and mappings) until the result fits
+    within the token budget. Multi-document streams (``---``)
+    are budgeted document by document.
     """
 
     def compress(
         self, content: str, budget: int, token_counter: Callable[[str], int], **kwargs: Any
     ) -> str:
-        import io
+        """
+        Scrubs comments, then prunes depth/breadth until the YAML fits the budget.
 
-        from ruamel.yaml import YAML
+        Keyword Args:
+            max_alias_nodes (int): Ceiling on the number of nodes that aliases may expand to
+                within one document (default: ``MAX_ALIAS_NODES``).
+            max_alias_bytes (int): Ceiling on the scalar bytes that aliases may expand to
+                within one document (default: ``MAX_ALIAS_BYTES``).
+        """
+        yaml_safe = _safe_yaml()
+        alias_limits = (
+            kwargs.get("max_alias_nodes", MAX_ALIAS_NODES),
+            kwargs.get("max_alias_bytes", MAX_ALIAS_BYTES),
+        )
+
+        documents = _iter_documents(content)
+        first = next(documents)
+        second = next(documents, None)
+
+        if second is None:
+            text = self._scrub_document(first, yaml_safe, alias_limits)
+            if not text:
+                return ""
+            return self._fit_document(first, text, budget, token_counter, yaml_safe)
+
+        return self._compress_stream(
+            itertools.chain((first, second), documents),
+            budget,
+            token_counter,
+            yaml_safe,
+            alias_limits,
+        )
+
+    def _compress_stream(
+        self,
+        documents: Iterator[str],
+        budget: int,
+        token_counter: Callable[[str], int],
+        yaml_safe: Any,
+        alias_limits: tuple[int, int],
+    ) -> str:
+        """
+        Budgets a multi-document stream like the elements of a JSON array.
+
+        Documents are parsed one at a time in stream order and kept while a tombstone
+        document flagging truncation would still fit after them. Past that point the rest
+        of the stream is kept only if all of it fits without one; otherwise the output
+        ends with the tombstone, and the remainder of the stream is never parsed. A first
+        document that is too large on its own is pruned to leave room for the tombstone,
+        or given up for the tombstone alone.
+        """
+        reserved = token_counter(_TOMBSTONE_DOCUMENT) + 1
+        output: list[str] = []
+        tokens_used = 0
+
+        def fits(estimate: int, *tail: str) -> bool:
+            # The running estimate is an upper bound (+1 per piece for tokens merging
+            # across documents); only once it overflows is the output counted whole
+            return estimate <= budget or token_counter("".join(output) + "".join(tail)) <= budget
 
+        def piece(text: str, previous: str | None) -> str:
+            if previous is None:
+                pass
+            elif text.lstrip().startswith("%"):
+                # Directives may only follow a document end marker
+                if previous.rstrip().rsplit("\n", 1)[-1].rstrip() != "...":
+                    text = "...\n" + text
+            elif not text.startswith("---"):
+                text = "---\n" + text
+            return text if text.endswith("\n") else text + "\n"
+
+        scrubbed = (
+            (document, text)
+            for document in documents
+            if (text := self._scrub_document(document, yaml_safe, alias_limits))
+        )
+        for document, text in scrubbed:
+            text = piece(text, output[-1] if output else None)
+            item_tokens = token_counter(text) + 1
+            if fits(tokens_used + item_tokens + reserved, text, _TOMBSTONE_DOCUMENT):
+                output.append(text)
+                tokens_used += item_tokens
+                continue
+
+            # No room for the tombstone after this document: the rest must fit whole
+            rest, rest_tokens = [text], item_tokens
+            while fits(tokens_used + rest_tokens, *rest):
+                following = next(scrubbed, None)
+                if following is None:
+                    return "".join(output + rest)
+                rest.append(piece(following[1], rest[-1]))
+                rest_tokens += token_counter(rest[-1]) + 1
+            if output:
+                return "".join(output) + _TOMBSTONE_DOCUMENT
+            return self._fit_flagged(document, text, budget, token_counter, yaml_safe)
+
+        return "".join(output)
+
+    def _fit_flagged(
+        self,
+        content: str,
+        text: str,
+        budget: int,
+        token_counter: Callable[[str], int],
+        yaml_safe: Any,
+    ) -> str:
+        """
+        Fits the first document of a stream whose rest is dropped, followed by the
+        tombstone; if both do not fit, the tombstone alone.
+        """
         from context_diet.interfaces import ContextBudgetExceededError
 
+        reserved = token_counter(_TOMBSTONE_DOCUMENT) + 1
+        try:
+            fitted = self._fit_document(content, text, budget - reserved, token_counter, yaml_safe)
+        except ContextBudgetExceededError:
+            fitted = ""
+        if fitted and token_counter(fitted + _TOMBSTONE_DOCUMENT) <= budget:
+            return fitted + _TOMBSTONE_DOCUMENT
+
+        # Too tight for any document; the tombstone alone needs no separator
+        tombstone = _TOMBSTONE_DOCUMENT.removeprefix("---\n")
+        if token_counter(tombstone) > budget:
+            raise ContextBudgetExceededError(
+                f"Minimum valid YAML exceeds budget ({budget} tokens)."
+            )
+        return tombstone
+
+    def _scrub_document(self, content: str, yaml_safe: Any, alias_limits: tuple[int, int]) -> str:
+        """
+        Returns the comment-free text of a single YAML document (``""`` if it is empty).
+
+        Comments are removed lexically, keeping every other byte of the source. The parser
+        event stream (no node graph) validates the input, enforces the alias expansion
+        ceilings and proves that the stripped text parses identically; only if it does not
+        is a round-trip tree built instead.
+        """
+        from context_diet.interfaces import ContextBudgetExceededError, MalformedContentError
+
+        text = _strip_comments(content) if "#" in content else content
+        stripped_events = None if text is content else _event_signatures(_safe_yaml(), text)
+        diverged = False
+        event_count = 0
+        root: tuple[Any, ...] = ()
+
+        signatures = _guard_aliases(_event_signatures(yaml_safe, content), *alias_limits)
+        try:
+            for signature in signatures:
+                event_count += 1
+                if event_count == 3:
+                    root = signature
+                if stripped_events is not None and not diverged:
+                    diverged = next(stripped_events, None) != signature
+        except ContextBudgetExceededError:
+            raise
+        except Exception:
+            raise MalformedContentError("Malformed YAML cannot be compressed.") from None
+
+        if stripped_events is not None and not diverged:
+            diverged = next(stripped_events, None) is not None
+
+        # No document at all, or a single document whose root is a bare null scalar
+        if event_count == 2 or (
+            event_count == 5
+            and root[0] == "ScalarEvent"
+            and root[2] is None
+            and not root[5]
+            and root[1] in _NULL_SCALARS
+        ):
+            return ""
+
+        if diverged:
+            return self._scrub_round_trip(content)
+        return text
+
+    def _scrub_round_trip(self, content: str) -> str:
+        """Strips comments through a ruamel round-trip tree (slow, but structure-aware)."""
+        from ruamel.yaml import YAML
+
+        from context_diet.interfaces import MalformedContentError
+
         yaml_rt = YAML(typ="rt")
         yaml_rt.default_flow_style = False
 
         try:
             data = yaml_rt.load(content)
         except Exception:
-            raise ContextBudgetExceededError("Malformed YAML cannot be compressed.")
+            raise MalformedContentError("Malformed YAML cannot be compressed.")
 
-        if data is None:
-            return ""
+        visited: set[int] = set()
 
         def remove_comments(node: Any) -> None:
+            # Anchored nodes are shared by every alias; clean each of them only once
+            if id(node) in visited:
+                return
+            visited.add(id(node))
             if hasattr(node, "ca") and node.ca is not None:
                 if hasattr(node.ca, "items") and node.ca.items:
                     for k in list(node.ca.items.keys()):
@@ -50,34 +532,136 @@ class YamlDietStrategy(DietStrategy):
 
         buf = io.StringIO()
         yaml_rt.dump(data, buf)
-        scrubbed = buf.getvalue()
+        return buf.getvalue()
+
+    def _fit_document(
+        self,
+        content: str,
+        text: str,
+        budget: int,
+        token_counter: Callable[[str], int],
+        yaml_safe: Any,
+    ) -> str:
+        """Returns the scrubbed ``text`` if it fits, otherwise a depth-pruned dump of it."""
+        from context_diet.interfaces import MalformedContentError
 
-        if token_counter(scrubbed) <= budget:
-            return scrubbed
+        text_tokens = token_counter(text)
+        if text_tokens <= budget:
+            return text
 
-        # Comment stripping alone wasn't enough. Reload as plain Python objects
-        # (no round-trip metadata needed) and progressively prune depth.
-        yaml_safe = YAML(typ="safe")
+        # Comment stripping alone wasn't enough; only now is a plain-object tree built
         try:
-            plain_data = yaml_safe.load(scrubbed)
+            plain_data = yaml_safe.load(content)
         except Exception:
-            raise ContextBudgetExceededError("YAML cannot be compressed.")
+            raise MalformedContentError("YAML cannot be compressed.")
+
+        tokens_per_char = text_tokens / len(text)
+        return self._prune(plain_data, budget, token_counter, yaml_safe, tokens_per_char)
+
+    def _prune(
+        self,
+        data: Any,
+        budget: int,
+        token_counter: Callable[[str], int],
+        yaml_safe: Any,
+        tokens_per_char: float,
+    ) -> str:
+        """
+        Emits the deepest masking level that fits the budget, capping breadth if needed.
+
+        At each level the full breadth is preferred; otherwise every sequence and mapping
+        is cut to the largest K entries (at least ``MIN_BREADTH_ENTRIES``) that fits, with
+        an omitted-count marker. One traversal profiles the emitted size of every
+        (level, K) pair, so only the selected candidate is masked and dumped. The
+        token_counter has the final word: if the estimate was too optimistic, the next
+        shallower level is tried.
+        """
+        from context_diet.interfaces import ContextBudgetExceededError
 
-        yaml_plain = YAML()
-        yaml_plain.default_flow_style = False
+        profile = self._size_profile(data, MAX_PRUNE_DEPTH)
+        char_budget = budget / tokens_per_char
 
-        for max_depth in range(6, -1, -1):
-            pruned = self._mask_deep_nodes(plain_data, max_depth)
+        for max_depth in range(MAX_PRUNE_DEPTH, -1, -1):
+            max_entries = None
+            if max_depth > 0 and _estimate_size(profile, max_depth, None) > char_budget:
+                max_entries = _search_breadth(profile, max_depth, char_budget)
+                if max_entries is None:
+                    continue
+            pruned = self._mask_deep_nodes(data, max_depth, max_entries=max_entries)
             candidate_buf = io.StringIO()
-            yaml_plain.dump(pruned, candidate_buf)
+            yaml_safe.dump(pruned, candidate_buf)
             candidate = candidate_buf.getvalue()
             if token_counter(candidate) <= budget:
                 return candidate
 
         raise ContextBudgetExceededError(f"Minimum valid YAML exceeds budget ({budget} tokens).")
 
-    def _mask_deep_nodes(self, node: Any, max_depth: int, current_depth: int = 0) -> Any:
-        """Recursively collapse nodes deeper than max_depth into empty structures."""
+    def _size_profile(self, data: Any, levels: int) -> _SizeProfile:
+        """
+        Records the block-style emitted size of every entry of ``data`` in one traversal.
+
+        Entries are bucketed by depth and by *rank*, the largest entry index on their path
+        from the root: an entry survives a breadth cap of K exactly when its rank is
+        below K. Each entry is costed both as rendered normally and as collapsed to
+        ``'...'``/``{}``/``[]``, which is all ``_estimate_size`` needs for any level.
+        """
+        normal: list[defaultdict[int, int]] = [defaultdict(int) for _ in range(levels + 1)]
+        collapsed: list[defaultdict[int, int]] = [defaultdict(int) for _ in range(levels + 1)]
+        markers: list[list[tuple[int, int, int]]] = [[] for _ in range(levels)]
+
+        def visit(node: Any, depth: int, rank: int, column: int) -> None:
+            is_mapping = isinstance(node, dict)
+            if len(node) > MIN_BREADTH_ENTRIES:
+                marker = len(_OMITTED_KEY) + len(_omitted_marker(len(node))) + 3
+                markers[depth].append(
+                    (rank, len(node), column + marker + (0 if is_mapping else 2))
+                )
+
+            items = node.items() if is_mapping else ((None, item) for item in node)
+            for index, (key, value) in enumerate(items):
+                entry_rank = max(rank, index)
+                # "key: " or "- " ahead of an inline value
+                prefix = column + (len(str(key)) + 2 if is_mapping else 2)
+                collapsed_width = 5 if isinstance(value, str) else _scalar_width(value)
+                collapsed[depth + 1][entry_rank] += prefix + collapsed_width + 1
+                if depth + 1 >= levels:
+                    continue
+                if isinstance(value, (dict, list)) and value:
+                    # A nested block costs a "key:" line; under "- " the dash takes the
+                    # place of its first line's indentation. Nested mappings (and any
+                    # block under a dash) are indented by two, sequences under a key not.
+                    if is_mapping:
+                        normal[depth + 1][entry_rank] += column + len(str(key)) + 2
+                    indent = 2 if not is_mapping or isinstance(value, dict) else 0
+                    visit(value, depth + 1, entry_rank, column + indent)
+                else:
+                    normal[depth + 1][entry_rank] += prefix + _scalar_width(value) + 1
+
+        if isinstance(data, (dict, list)) and data:
+            visit(data, 0, 0, 0)
+
+        return (
+            [_cumulative(sizes) for sizes in normal],
+            [_cumulative(sizes) for sizes in collapsed],
+            markers,
+        )
+
+    def _mask_deep_nodes(
+        self,
+        node: Any,
+        max_depth: int,
+        current_depth: int = 0,
+        max_entries: int | None = None,
+        memo: dict[tuple[int, int], Any] | None = None,
+    ) -> Any:
+        """
+        Recursively collapse nodes deeper than max_depth into empty structures.
+
+        With ``max_entries``, longer sequences and mappings keep only their first entries
+        followed by an omitted-count marker. Containers shared through YAML aliases are
+        masked once per depth and stay shared, so the dump re-emits them as aliases
+        instead of expanding independent copies.
+        """
         if current_depth >= max_depth:
             if isinstance(node, dict):
                 return {}
@@ -87,12 +671,34 @@ class YamlDietStrategy(DietStrategy):
                 return "..."
             return node
 
+        if not isinstance(node, (dict, list)):
+            return node
+
+        if memo is None:
+            memo = {}
+        key = (id(node), current_depth)
+        if key in memo:
+            return memo[key]
+
+        truncated = max_entries is not None and len(node) > max_entries
+        masked: Any
         if isinstance(node, dict):
-            return {
-                k: self._mask_deep_nodes(v, max_depth, current_depth + 1)
-                for k, v in node.items()
-            }
-        if isinstance(node, list):
-            return [self._mask_deep_nodes(item, max_depth, current_depth + 1) for item in node]
-
-        return node
+            items = itertools.islice(node.items(), max_entries) if truncated else node.items()
+            masked = {}
+            memo[key] = masked
+            for k, v in items:
+                masked[k] = self._mask_deep_nodes(
+                    v, max_depth, current_depth + 1, max_entries, memo
+                )
+            if truncated:
+                masked[_OMITTED_KEY] = _omitted_marker(len(node) - len(masked))
+        else:
+            masked = []
+            memo[key] = masked
+            for item in node[:max_entries] if truncated else node:
+                masked.append(
+                    self._mask_deep_nodes(item, max_depth, current_depth + 1, max_entries, memo)
+                )
+            if truncated:
+                masked.append({_OMITTED_KEY: _omitted_marker(len(node) - len(masked))})
+        return masked
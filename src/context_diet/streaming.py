@@ -0,0 +1,161 @@
+"""
+Incremental readers that feed large inputs to the streaming strategy paths.
+"""
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from itertools import chain
+from typing import IO, Any
+
+# Bytes requested from a file object per read
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+Source = str | os.PathLike[str] | IO[Any] | Iterable[bytes] | Iterable[str]
+
+# Leading bytes of the compressed formats that are decompressed on the fly: gzip, bzip2
+# (with the magic of its first block or end of stream, as a text may well start "BZh9")
+# and xz, each with a reader that decompresses a binary file object incrementally
+_COMPRESSED: tuple[tuple[re.Pattern[bytes], Callable[[Any], io.BufferedIOBase]], ...] = (
+    (re.compile(rb"\x1f\x8b"), lambda raw: gzip.GzipFile(fileobj=raw)),
+    (re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)"), bz2.BZ2File),
+    (re.compile(rb"\xfd7zXZ\x00"), lzma.LZMAFile),
+)
+# Bytes needed to tell whether an input is compressed
+MAGIC_SIZE = 10
+
+
+def is_compressed(head: bytes) -> bool:
+    """Whether ``head``, the first ``MAGIC_SIZE`` bytes of an input, opens a compressed file."""
+    return any(magic.match(head) for magic, _ in _COMPRESSED)
+
+
+class _BlockReader(io.RawIOBase):
+    """A binary file object reading from an iterator of ``bytes`` blocks."""
+
+    def __init__(self, blocks: Iterator[bytes]) -> None:
+        self._blocks = blocks
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._pending:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._pending = memoryview(block)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _decompressed(blocks: Iterator[Any], chunk_size: int) -> Iterator[Any]:
+    """
+    Passes ``blocks`` through, decompressed if they open with the magic of a compressed
+    format. Decompression is incremental: only as much input is read as the consumer of
+    the output asks for.
+    """
+    head = next(blocks, None)
+    if head is None:
+        return
+    if isinstance(head, str):
+        yield head
+        yield from blocks
+        return
+    # Short reads may split the magic
+    while len(head) < MAGIC_SIZE:
+        more = next(blocks, None)
+        if more is None:
+            break
+        head += more
+    for magic, opener in _COMPRESSED:
+        if magic.match(head):
+            reader = opener(_BlockReader(chain([head], blocks)))
+            yield from iter(partial(reader.read, chunk_size), b"")
+            return
+    yield head
+    yield from blocks
+
+
+def iter_text(source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yields the text of ``source`` as chunks that each end on a line boundary.
+
+    ``source`` may be a filesystem path, a binary or text file object, or an iterable of
+    ``bytes``/``str`` blocks. Bytes that open with the magic of gzip, bzip2 or xz are
+    decompressed as they are read (see ``is_compressed``). Bytes are decoded as UTF-8
+    incrementally, dropping invalid sequences like the log strategy's cleanup does.
+    Cutting only after a newline means no token of interest to the strategies (quotes,
+    comment markers, timestamps) ever straddles two chunks; a line longer than
+    ``chunk_size`` is held until it ends.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            yield from iter_text(handle, chunk_size)
+        return
+
+    blocks: Iterable[bytes | str]
+    if hasattr(source, "read"):
+        blocks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        blocks = source
+    blocks = _decompressed(iter(blocks), chunk_size)
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pending: list[str] = []
+
+    for block in blocks:
+        text = block if isinstance(block, str) else decoder.decode(block)
+        cut = text.rfind("\n") + 1
+        if not cut:
+            pending.append(text)
+            continue
+        pending.append(text[:cut])
+        yield "".join(pending)
+        pending = [text[cut:]]
+
+    pending.append(decoder.decode(b"", final=True))
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+def iter_files(
+    paths: Iterable[str | os.PathLike[str]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Yields the text of ``paths`` one after the other as a single stream of chunks, as
+    rotated logs are read oldest first (``app.log.2.gz``, ``app.log.1``, ``app.log``).
+
+    Each file is read and decompressed by ``iter_text``. A file that does not end in a
+    newline is given one, so that its last line does not run into the next file's first.
+    """
+    pending: str | None = None
+    for path in paths:
+        for chunk in iter_text(path, chunk_size):
+            if pending is not None:
+                yield pending if pending.endswith("\n") else pending + "\n"
+            pending = chunk
+    if pending is not None:
+        yield pending
+
+
+def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yields line-aligned slices of an in-memory string, so that ``compress`` can share the
+    streaming path of a strategy without splitting the whole text up front.
+    """
+    start = 0
+    while start < len(text):
+        cut = text.find("\n", start + chunk_size - 1) + 1 or len(text)
+        yield text[start:cut]
+        start = cut
@@ -1,15 +1,18 @@
 """
 Integration tests for the distill() entrypoint: budget edge cases,
-strategy dispatch, filename/extension hints, and token counter wiring.
+strategy dispatch, filename/extension hints, and token counter wiring, plus
+distill_file() over paths and byte streams.
 """
 
+import gzip
 import json
+import lzma
 import warnings
 
 import pytest
 
-from context_diet import distill
-from context_diet.interfaces import ContextBudgetExceededError
+from context_diet import distill, distill_file
+from context_diet.interfaces import ContextBudgetExceededError, MalformedContentError
 from context_diet.token_utils import default_token_heuristic
 
 
@@ -139,3 +142,140 @@ def test_extension_with_dot_prefix():
         token_counter=default_token_heuristic,
     )
     assert json.loads(result)["x"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Falling back on the next sniffed strategy
+# ---------------------------------------------------------------------------
+
+_TRUNCATED_JSON = '{"service": "api",\n  "replicas": 3,\n  "note": "the closing brace went missing'
+
+
+def test_auto_falls_back_on_the_next_candidate_when_a_strategy_raises():
+    result = distill(_TRUNCATED_JSON, budget=10, token_counter=default_token_heuristic)
+    assert result.startswith('{"service": "api",')
+
+
+def test_auto_does_not_fall_back_when_parsed_content_exceeds_the_budget():
+    content = "".join(f"def handler_{i}(request):\n    return {i}\n" for i in range(50))
+    with pytest.raises(ContextBudgetExceededError, match="skeleton exceeds budget") as raised:
+        distill(content, budget=5, token_counter=default_token_heuristic)
+    assert not isinstance(raised.value, MalformedContentError)
+
+
+@pytest.mark.parametrize("as_stream", [False, True])
+def test_distill_file_falls_back_like_distill(tmp_path, as_stream):
+    data = tmp_path / "payload"
+    data.write_text(_TRUNCATED_JSON)
+    expected = distill(_TRUNCATED_JSON, budget=10, token_counter=default_token_heuristic)
+    if as_stream:
+        source = iter([data.read_bytes()])
+        result = distill_file(source, budget=10, token_counter=default_token_heuristic)
+    else:
+        with open(data, "rb") as handle:
+            result = distill_file(handle, budget=10, token_counter=default_token_heuristic)
+    assert result == expected
+
+
+def test_explicit_strategy_does_not_fall_back():
+    with pytest.raises(ContextBudgetExceededError, match="Malformed JSON object"):
+        distill(_TRUNCATED_JSON, budget=10, strategy="json", token_counter=default_token_heuristic)
+
+
+def test_known_extension_does_not_fall_back():
+    with pytest.raises(ContextBudgetExceededError, match="Malformed JSON object"):
+        distill(
+            _TRUNCATED_JSON, budget=10, extension="json", token_counter=default_token_heuristic
+        )
+
+
+# ---------------------------------------------------------------------------
+# distill_file: paths, file objects and byte iterators
+# ---------------------------------------------------------------------------
+
+
+def test_distill_file_streams_sql_dump_from_path(tmp_path):
+    dump = tmp_path / "dump.sql"
+    dump.write_text(
+        "CREATE TABLE users (id INT);\n"
+        "COPY users (id) FROM stdin;\n" + "1\n" * 1000 + "\\.\n"
+        "CREATE TABLE orders (id INT);\n"
+    )
+    result = distill_file(dump, budget=200, token_counter=default_token_heuristic)
+    assert "CREATE TABLE users" in result
+    assert "CREATE TABLE orders" in result
+    assert "COPY" not in result
+
+
+def test_distill_file_accepts_byte_iterators():
+    blocks = [b"CREATE TABLE caf\xc3", b"\xa9 (id INT);\nINSERT INTO x VALUES (1);\n"]
+    result = distill_file(
+        iter(blocks), budget=200, strategy="sql", token_counter=default_token_heuristic
+    )
+    assert "CREATE TABLE café" in result
+    assert "INSERT" not in result
+
+
+def test_distill_file_sniffs_non_path_sources(tmp_path):
+    data = tmp_path / "payload"
+    data.write_text(json.dumps({"items": [1, 2, 3]}))
+    with open(data, "rb") as handle:
+        result = distill_file(handle, budget=500, token_counter=default_token_heuristic)
+    assert json.loads(result)["items"] == [1, 2, 3]
+
+
+def test_distill_file_zero_budget_returns_empty(tmp_path):
+    data = tmp_path / "schema.sql"
+    data.write_text("CREATE TABLE t (id INT);\n")
+    assert distill_file(data, budget=0) == ""
+
+
+def test_distill_file_streams_logs_from_path(tmp_path):
+    log = tmp_path / "service.log"
+    log.write_text(
+        "2024-01-01 INFO ok\n" * 2000
+        + "2024-01-01 ERROR boom\nTraceback (most recent call last):\nValueError: bad\n"
+    )
+    result = distill_file(log, budget=50, token_counter=default_token_heuristic)
+    assert result.startswith("2024-01-01 ERROR boom")
+
+
+def test_distill_file_passes_seekable_files_to_compress_file(tmp_path):
+    log = tmp_path / "service.log"
+    log.write_text("".join(f"2024-01-01 INFO request {i}\n" for i in range(5000)))
+    result = distill_file(log, budget=40, token_counter=default_token_heuristic, mode="tail")
+    assert result.endswith("2024-01-01 INFO request 4999")
+
+
+def test_distill_file_decompresses_rotated_logs(tmp_path):
+    log = tmp_path / "service.log.1.gz"
+    log.write_bytes(
+        gzip.compress(
+            b"2024-01-01 INFO ok\n" * 2000
+            + b"2024-01-01 ERROR boom\nTraceback (most recent call last):\nValueError: bad\n"
+        )
+    )
+    result = distill_file(log, budget=50, token_counter=default_token_heuristic)
+    assert result.startswith("2024-01-01 ERROR boom")
+
+
+def test_distill_file_streams_compressed_tails(tmp_path):
+    log = tmp_path / "service.log.xz"
+    log.write_bytes(
+        lzma.compress("".join(f"2024-01-01 INFO request {i}\n" for i in range(5000)).encode())
+    )
+    result = distill_file(log, budget=40, token_counter=default_token_heuristic, mode="tail")
+    assert result.endswith("2024-01-01 INFO request 4999")
+
+
+def test_distill_file_reads_a_list_of_rotated_files_as_one_log(tmp_path):
+    older = tmp_path / "service.log.1.gz"
+    older.write_bytes(gzip.compress(b"2024-01-01 ERROR boom\nTraceback (most recent call last):"))
+    current = tmp_path / "service.log"
+    current.write_text("2024-01-02 INFO ok\n" * 2000)
+    result = distill_file([older, current], budget=30, token_counter=default_token_heuristic)
+    assert result.splitlines()[:3] == [
+        "2024-01-01 ERROR boom",
+        "Traceback (most recent call last):",
+        "2024-01-02 INFO ok",
+    ]
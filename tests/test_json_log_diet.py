@@ -0,0 +1,114 @@
+"""
+Unit tests for the JSON Lines log strategy.
+"""
+
+import json
+
+import pytest
+
+from context_diet.interfaces import ContextBudgetExceededError
+from context_diet.strategies.json_log_diet import JsonLogDietStrategy
+from context_diet.streaming import chunk_text
+from context_diet.token_utils import default_token_heuristic
+
+
+def _record(i: int) -> str:
+    record = {
+        "ts": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z",
+        "level": "info",
+        "msg": f"GET /items/{i} 200",
+        "request_id": f"req-{i:06d}",
+        "host": "web-1",
+        "labels": {"region": "eu-west-1", "pod": f"web-{i % 7}"},
+    }
+    if i % 100 == 42:
+        record["level"] = "error"
+        record["msg"] = f"charge {i} failed"
+        record["exception"] = "Traceback (most recent call last):\nValueError: card declined"
+    return json.dumps(record)
+
+
+_LOG = "".join(_record(i) + "\n" for i in range(1000))
+
+
+@pytest.fixture()
+def strategy():
+    return JsonLogDietStrategy()
+
+
+def test_small_log_is_returned_verbatim(strategy):
+    log = _record(1) + "\n"
+    assert strategy.compress(log, 1000, default_token_heuristic) == log
+
+
+def test_error_records_come_first_and_fields_are_projected(strategy):
+    result = strategy.compress(_LOG, 400, default_token_heuristic)
+    lines = result.splitlines()
+    assert lines[:3] == [
+        "2024-01-01T00:00:42Z error charge 42 failed",
+        "Traceback (most recent call last):",
+        "ValueError: card declined",
+    ]
+    assert "2024-01-01T00:00:00Z info GET /items/0 200" in lines
+    assert "request_id" not in result
+    assert default_token_heuristic(result) <= 400
+
+
+def test_regular_records_are_dropped_once_errors_fill_the_budget(strategy):
+    result = strategy.compress(_LOG, 150, default_token_heuristic)
+    assert result.count("failed") == 5
+    assert "GET /items" not in result
+
+
+def test_custom_and_nested_fields(strategy):
+    log = "".join(
+        json.dumps({"@t": f"t{i}", "log": {"level": "ERROR" if i == 3 else "INFO"}, "body": i})
+        + "\n"
+        for i in range(50)
+    )
+    fields = {"timestamp": "@t", "message": ["text", "body"]}
+    result = strategy.compress(log, 30, default_token_heuristic, fields=fields)
+    assert result.splitlines()[:2] == ["t3 ERROR 3", "t0 INFO 0"]
+
+
+def test_numeric_levels_from_50_are_errors(strategy):
+    log = "".join(
+        json.dumps({"time": i, "level": 50 if i == 7 else 30, "msg": f"m{i}"}) + "\n"
+        for i in range(100)
+    )
+    assert strategy.compress(log, 20, default_token_heuristic).startswith("7 50 m7\n")
+
+
+def test_numeric_levels_of_100_and_up_are_found_past_the_first_chunk(strategy):
+    # Past the first chunk, only the lines the error hint finds are parsed
+    levels = {1500: 50, 1700: 100, 1900: 500}
+    log = "".join(
+        json.dumps({"time": i, "level": levels.get(i, 30), "msg": f"m{i}"}) + "\n"
+        for i in range(2000)
+    )
+    result = strategy.compress_stream(chunk_text(log, 4096), 20, default_token_heuristic)
+    assert result.splitlines()[:3] == ["1500 50 m1500", "1700 100 m1700", "1900 500 m1900"]
+
+
+def test_lines_that_are_not_json_objects_are_kept_as_regular(strategy):
+    log = "not json at all\n" + _LOG
+    result = strategy.compress(log, 400, default_token_heuristic)
+    assert "not json at all" in result
+
+
+def test_unknown_field_role_raises(strategy):
+    with pytest.raises(ValueError, match="Unknown JSON log field"):
+        strategy.compress(_LOG, 100, default_token_heuristic, fields={"host": "host"})
+
+
+def test_single_oversized_record_raises(strategy):
+    with pytest.raises(ContextBudgetExceededError):
+        strategy.compress(_LOG, 5, default_token_heuristic)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 5000])
+@pytest.mark.parametrize("budget", [150, 400, 3000])
+def test_stream_matches_in_memory_output(strategy, chunk_size, budget):
+    chunks = chunk_text(_LOG, chunk_size)
+    streamed = strategy.compress_stream(chunks, budget, default_token_heuristic)
+    assert streamed == strategy.compress(_LOG, budget, default_token_heuristic)
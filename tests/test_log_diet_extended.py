@@ -1,12 +1,19 @@
 """
 Extended coverage for LogDietStrategy: pass-through, no-structure fallback,
-priority ordering, and single-block-too-large error.
+priority ordering, single-block-too-large error, and streaming.
 """
 
+import io
+
 import pytest
 
+from context_diet import distill, distill_file
 from context_diet.interfaces import ContextBudgetExceededError
+from context_diet.strategies import log_diet
 from context_diet.strategies.log_diet import LogDietStrategy
+from context_diet.strategies.log_index import INDEX_SUFFIX, LogIndex
+from context_diet.strategies.log_templates import LineTally, TemplateMiner
+from context_diet.streaming import chunk_text
 from context_diet.token_utils import default_token_heuristic
 
 
@@ -120,3 +127,618 @@ def test_string_input_with_surrogates_cleaned(strategy):
     result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
     assert "INFO ok" in result
     assert isinstance(result, str)
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+_SERVICE_LOG = "".join(
+    "2024-01-01 12:00:00 ERROR request failed\nTraceback (most recent call last):\n"
+    f'  File "app.py", line {i}\nValueError: bad {i}\n'
+    if i % 7 == 0
+    else f"2024-01-01 12:00:00 INFO handled request {i}\n"
+    for i in range(200)
+)
+
+
+@pytest.mark.parametrize("budget", [60, 400, 100_000])
+@pytest.mark.parametrize("chunk_size", [1, 64, 4096])
+def test_stream_matches_in_memory_output(strategy, budget, chunk_size):
+    chunks = chunk_text(_SERVICE_LOG, chunk_size)
+    streamed = strategy.compress_stream(chunks, budget, default_token_heuristic)
+    assert streamed == strategy.compress(_SERVICE_LOG, budget, default_token_heuristic)
+
+
+def test_stream_stops_reading_once_an_error_block_overflows(strategy):
+    def endless_errors():
+        for i in range(1_000):
+            yield f"2024-01-01 ERROR failure {i}\nTraceback (most recent call last):\n"
+        raise AssertionError("the whole log was read")
+
+    result = strategy.compress_stream(endless_errors(), 50, default_token_heuristic)
+    assert result.startswith("2024-01-01 ERROR failure 0")
+    assert default_token_heuristic(result) <= 50
+
+
+def test_stream_skips_blocks_larger_than_the_budget(strategy):
+    def log():
+        yield "2024-01-01 INFO start\n"
+        yield "2024-01-01 INFO bulk payload follows\n"
+        for _ in range(10_000):
+            yield "payload line without a header\n"
+        yield "2024-01-01 ERROR Fatal: disk full\n"
+
+    result = strategy.compress_stream(log(), 40, default_token_heuristic)
+    assert result.startswith("2024-01-01 ERROR Fatal: disk full")
+    assert result.endswith("2024-01-01 INFO start")
+    assert "payload" not in result
+
+
+def test_regular_blocks_are_not_counted_once_the_budget_is_full(strategy):
+    log = "".join(f"2024-01-01 INFO request {i}\n" for i in range(20_000))
+    log += "2024-01-01 ERROR boom\nTraceback (most recent call last):\nValueError: bad\n"
+    calls = []
+
+    def counting_heuristic(text):
+        calls.append(text)
+        return default_token_heuristic(text)
+
+    result = strategy.compress(log, 100, counting_heuristic)
+    assert result.startswith("2024-01-01 ERROR boom\nTraceback")
+    assert "2024-01-01 INFO request 0" in result
+    assert len(calls) < 100
+
+
+# ---------------------------------------------------------------------------
+# Head, tail and time-window modes
+# ---------------------------------------------------------------------------
+
+_TIMED_LOG = "".join(
+    f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00 ERROR step {i} failed\n"
+    "Traceback (most recent call last):\nValueError: bad\n"
+    if i % 10 == 0
+    else f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00 INFO step {i}\n"
+    for i in range(600)
+)
+
+
+def test_head_keeps_leading_blocks(strategy):
+    result = strategy.compress(_TIMED_LOG, 60, default_token_heuristic, mode="head")
+    assert result.startswith("2024-01-01T00:00:00 ERROR step 0 failed")
+    assert "step 1\n" in result
+    assert "step 100 " not in result
+
+
+def test_tail_keeps_trailing_blocks(strategy):
+    result = strategy.compress(_TIMED_LOG, 60, default_token_heuristic, mode="tail")
+    assert result.endswith("2024-01-01T09:59:00 INFO step 599")
+    assert "step 500 " not in result
+    assert default_token_heuristic(result) <= 60
+
+
+def test_window_keeps_only_blocks_in_range(strategy):
+    result = strategy.compress(
+        _TIMED_LOG,
+        100_000,
+        default_token_heuristic,
+        mode="window",
+        since="2024-01-01T01:00:00",
+        until="2024-01-01 01:05:00",
+    )
+    assert result.startswith("2024-01-01T01:00:00 ERROR step 60 failed")
+    assert result.endswith("2024-01-01T01:04:00 INFO step 64\n")
+
+
+def test_unknown_mode_raises(strategy):
+    with pytest.raises(ValueError, match="Unknown log mode"):
+        strategy.compress(_TIMED_LOG, 60, default_token_heuristic, mode="middle")
+
+
+@pytest.mark.parametrize("budget", [60, 400, 100_000])
+def test_file_tail_reads_backwards_to_the_same_output(strategy, budget, monkeypatch):
+    import context_diet.strategies.log_diet as log_diet
+
+    monkeypatch.setattr(log_diet, "TAIL_READ_SIZE", 100)
+    handle = io.BytesIO(_TIMED_LOG.encode())
+    result = strategy.compress_file(handle, budget, default_token_heuristic, mode="tail")
+    assert result == strategy.compress(_TIMED_LOG, budget, default_token_heuristic, mode="tail")
+    if budget < 100_000:
+        # Only the tail (plus one read step) was read
+        assert handle.tell() > len(_TIMED_LOG) - budget * 10
+
+
+@pytest.mark.parametrize(
+    ("since", "until"),
+    [
+        ("2024-01-01T00:00:00", None),
+        ("2024-01-01T03:17:30", "2024-01-01T03:40:00"),
+        ("2024-01-01T09:59:00", None),
+        ("2024-01-02T00:00:00", None),
+    ],
+)
+def test_file_window_seeks_to_the_same_output(strategy, since, until):
+    kwargs = {"mode": "window", "since": since, "until": until}
+    handle = io.BytesIO(_TIMED_LOG.encode())
+    try:
+        expected = strategy.compress(_TIMED_LOG, 400, default_token_heuristic, **kwargs)
+    except ContextBudgetExceededError:
+        with pytest.raises(ContextBudgetExceededError):
+            strategy.compress_file(handle, 400, default_token_heuristic, chunk_size=64, **kwargs)
+        return
+    assert (
+        strategy.compress_file(handle, 400, default_token_heuristic, chunk_size=64, **kwargs)
+        == expected
+    )
+
+
+# ---------------------------------------------------------------------------
+# Template mining
+# ---------------------------------------------------------------------------
+
+_HEALTH_LOG = "".join(
+    f"2024-01-01 00:00:{i % 60:02d} ERROR charge {i} failed\n"
+    "Traceback (most recent call last):\nValueError: card declined\n"
+    if i % 50 == 7
+    else f"2024-01-01 00:00:{i % 60:02d} INFO GET /health 200 in {i % 13}ms from 10.0.0.{i % 250}\n"
+    for i in range(1000)
+)
+
+
+def test_templates_collapse_repeated_lines_with_counts(strategy):
+    result = strategy.compress(_HEALTH_LOG, 200, default_token_heuristic, mode="templates")
+    lines = result.splitlines()
+    assert lines[0] == (
+        "2024-01-01 00:00:00 .. 2024-01-01 00:00:39 [x980] INFO GET /health <*> in <*> from <*>"
+    )
+    assert "[x20] ERROR charge <*> failed" in lines[1]
+    assert lines[2].endswith("[x20] Traceback (most recent call last):")
+
+
+def test_templates_emit_lines_seen_once_verbatim(strategy):
+    log = _HEALTH_LOG + "2024-01-02 09:00:00 WARN disk 91% full\n"
+    result = strategy.compress(log, 200, default_token_heuristic, mode="templates")
+    assert result.endswith("\n2024-01-02 09:00:00 WARN disk 91% full")
+
+
+def test_templates_pack_error_templates_first(strategy):
+    result = strategy.compress(_HEALTH_LOG, 45, default_token_heuristic, mode="templates")
+    assert "ERROR charge <*> failed" in result
+    assert "GET /health" not in result
+    assert default_token_heuristic(result) <= 45
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 4096])
+def test_templates_stream_matches_in_memory_output(strategy, chunk_size):
+    chunks = chunk_text(_HEALTH_LOG, chunk_size)
+    streamed = strategy.compress_stream(chunks, 200, default_token_heuristic, mode="templates")
+    assert streamed == strategy.compress(
+        _HEALTH_LOG, 200, default_token_heuristic, mode="templates"
+    )
+
+
+def test_template_miner_bounds_children_per_node():
+    tally = LineTally()
+    for name in ("alpha", "beta", "gamma", "delta"):
+        tally.add(f"{name} worker started")
+    miner = TemplateMiner(max_children=2)
+    miner.add_tally(tally)
+    # Past two distinct first tokens, lines share the wildcard branch and merge there
+    assert [(t.template, t.count) for t in miner.templates] == [
+        ("alpha worker started", 1),
+        ("beta worker started", 1),
+        ("<*> worker started", 2),
+    ]
+
+
+def test_template_masking_keeps_punctuation_around_variables():
+    tally = LineTally()
+    tally.add('File "app.py", line 10, in handler (attempt 3/5).')
+    tally.add('File "app.py", line 27, in handler (attempt 1/5).')
+    miner = TemplateMiner()
+    miner.add_tally(tally)
+    assert [t.template for t in miner.templates] == [
+        'File "app.py", line <*>, in handler (attempt <*>).'
+    ]
+
+
+def test_opaque_ids_share_one_line_shape():
+    tally = LineTally()
+    for second, rid, trace in (
+        (1, "3f2a9c1b-4e1d-4c0a-9b7e-0d5e2f8a1c6b", "ab12cd34ef"),
+        (2, "c0ffee00-beef-4bad-8c0d-deadbeef0001", "0f9e8d7c6b"),
+    ):
+        tally.add(f"2024-01-01T10:00:0{second}Z INFO served id={rid} trace=[{trace}] ok")
+    assert [entry.count for entry in tally.shapes.values()] == [2]
+    tally.add("2024-01-01T10:00:03Z INFO served id=none trace=[ab12cd34ef] ok")
+    assert [entry.count for entry in tally.shapes.values()] == [2, 1]
+    miner = TemplateMiner()
+    miner.add_tally(tally)
+    assert [t.render() for t in miner.templates] == [
+        "2024-01-01T10:00:01Z .. 2024-01-01T10:00:03Z [x3] INFO served <*> <*>] ok"
+    ]
+
+
+def test_line_shapes_keep_the_opening_timestamp():
+    tally = LineTally()
+    tally.add("[2024-01-01T10:00:00Z] beat")
+    tally.add("[2024-01-01T10:00:00.123Z] beat")
+    assert [entry.count for entry in tally.shapes.values()] == [1, 1]
+    assert tally.stamp == "2024-01-01T10:00:00.123Z"
+
+
+def test_template_miner_gives_the_same_templates_across_tallies():
+    lines = _HEALTH_LOG.splitlines()
+    whole = TemplateMiner()
+    tally = LineTally()
+    for line in lines:
+        tally.add(line)
+    whole.add_tally(tally)
+    split = TemplateMiner()
+    for start in range(0, len(lines), 97):
+        tally = LineTally()
+        for line in lines[start : start + 97]:
+            tally.add(line)
+        split.add_tally(tally)
+    assert [t.render() for t in split.templates] == [t.render() for t in whole.templates]
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    ("mode", "log", "budget"),
+    [
+        ("errors", _TIMED_LOG, 400),
+        ("errors", _HEALTH_LOG, 3000),
+        ("errors", _HEALTH_LOG, 300),
+        ("templates", _HEALTH_LOG, 200),
+        ("templates", _TIMED_LOG, 100),
+    ],
+)
+def test_workers_give_the_serial_output(strategy, monkeypatch, mode, log, budget):
+    expected = strategy.compress(log, budget, default_token_heuristic, mode=mode)
+    monkeypatch.setattr(log_diet, "PARALLEL_STRETCH_SIZE", 3000)
+    chunks = chunk_text(log, 500)
+    result = strategy.compress_stream(
+        chunks, budget, default_token_heuristic, mode=mode, workers=2
+    )
+    assert result == expected
+
+
+@pytest.mark.parametrize("budget", [60, 100, 400])
+def test_workers_give_the_serial_folded_output(strategy, monkeypatch, budget):
+    log = _FAILING_LOG + _charge_failure(301).replace("pay.py", "refund.py") + _FAILING_LOG
+    expected = strategy.compress(log, budget, default_token_heuristic, fold=True)
+    monkeypatch.setattr(log_diet, "PARALLEL_STRETCH_SIZE", 3000)
+    chunks = chunk_text(log, 500)
+    result = strategy.compress_stream(
+        chunks, budget, default_token_heuristic, fold=True, workers=2
+    )
+    assert result == expected
+
+
+def test_folding_records_each_traceback_once_and_only_in_parts():
+    serial = log_diet._FoldingSelector(100, default_token_heuristic)
+    serial.feed(_FAILING_LOG)
+    serial.finish()
+    assert not serial.events
+    part = log_diet._select_stretch(
+        log_diet._FoldingSelector, _FAILING_LOG, 100, default_token_heuristic
+    )
+    recorded = [block for block, _, high_value in part.events if high_value]
+    assert recorded == [_charge_failure(3).rstrip("\n")]
+    (seen,) = part.repeats.values()
+    assert seen is not None and (seen.count, seen.last) == (29, "2024-01-01 00:04:53")
+
+
+def test_stretches_end_before_a_block_starts():
+    log = "2024-01-01 INFO a\n  detail\n2024-01-01 INFO b\n  more\n  more\n2024-01-01 INFO c\n"
+    stretches = list(log_diet._stretches(chunk_text(log, 1), 20))
+    assert stretches == [
+        "2024-01-01 INFO a\n  detail",
+        "2024-01-01 INFO b\n  more\n  more",
+        "2024-01-01 INFO c\n",
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Traceback folding
+# ---------------------------------------------------------------------------
+
+
+def _charge_failure(i: int) -> str:
+    return (
+        f"2024-01-01 00:{i // 60:02d}:{i % 60:02d} ERROR charge {i} failed\n"
+        "Traceback (most recent call last):\n"
+        '  File "pay.py", line 3, in charge\n'
+        "    submit()\n"
+        f"ValueError: card {i} declined\n"
+    )
+
+
+_FAILING_LOG = "".join(
+    _charge_failure(i) if i % 10 == 3 else f"2024-01-01 00:{i // 60:02d}:{i % 60:02d} INFO ok\n"
+    for i in range(300)
+)
+
+
+def test_fold_keeps_each_traceback_once_with_count_and_range(strategy):
+    result = strategy.compress(_FAILING_LOG, 100, default_token_heuristic, fold=True)
+    assert result.startswith(
+        "2024-01-01 00:00:03 ERROR charge 3 failed [x30, last 2024-01-01 00:04:53]\n"
+        "Traceback (most recent call last):\n"
+    )
+    assert result.count("Traceback") == 1
+    assert "INFO ok" in result
+
+
+def test_fold_tells_tracebacks_apart_by_frames_and_type(strategy):
+    other = _charge_failure(999).replace("ValueError", "KeyError")
+    result = strategy.compress(_FAILING_LOG + other, 200, default_token_heuristic, fold=True)
+    assert result.count("Traceback") == 2
+    assert "KeyError: card 999 declined" in result
+
+
+def test_fold_collapses_recursive_frames(strategy):
+    frames = (
+        '  File "a.py", line 1, in ping\n    pong()\n  File "a.py", line 2, in pong\n    ping()\n'
+    )
+    log = (
+        "2024-01-01 00:00:00 ERROR recursion\nTraceback (most recent call last):\n"
+        + frames * 400
+        + "RecursionError: maximum recursion depth exceeded\n"
+        + "2024-01-01 00:00:01 INFO ok\n" * 100
+    )
+    result = strategy.compress(log, 80, default_token_heuristic, fold=True)
+    assert result.count("in ping") == 1
+    assert "  [Previous 4 lines repeated 399 more times]\nRecursionError" in result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 4096])
+def test_fold_stream_matches_in_memory_output(strategy, chunk_size):
+    chunks = chunk_text(_FAILING_LOG, chunk_size)
+    streamed = strategy.compress_stream(chunks, 100, default_token_heuristic, fold=True)
+    assert streamed == strategy.compress(_FAILING_LOG, 100, default_token_heuristic, fold=True)
+
+
+def test_fold_rejects_other_modes(strategy):
+    with pytest.raises(ValueError, match="fold applies"):
+        strategy.compress(_FAILING_LOG, 100, default_token_heuristic, mode="tail", fold=True)
+
+
+# ---------------------------------------------------------------------------
+# Terminal output
+# ---------------------------------------------------------------------------
+
+
+def _ci_line(i: int) -> str:
+    if i % 40 == 9:
+        return (
+            f"\x1b[31m2024-01-01 00:{i // 60:02d}:{i % 60:02d} ERROR step {i} failed\x1b[0m\r\n"
+            "Traceback (most recent call last):\r\nValueError: exit 1\r\n"
+        )
+    bar = "".join(f"\rDownloading {i}: {p:3d}%" for p in range(0, 101, 10))
+    return f"2024-01-01 00:{i // 60:02d}:{i % 60:02d} \x1b]0;job {i}\x07\x1b[1mINFO\x1b[0m{bar}\n"
+
+
+_CI_LOG = "".join(_ci_line(i) for i in range(400))
+
+
+def test_terminal_escapes_are_stripped(strategy):
+    text = "\x1b]8;;https://ci\x1b\\link\x1b]8;;\x1b\\ \x1b[1;32mok\x1b[0m\x1b[2K \x1b(Bdone\n"
+    assert strategy.compress(text, 100, default_token_heuristic) == "link ok done\n"
+
+
+def test_carriage_returns_keep_what_the_terminal_shows(strategy):
+    text = (
+        "step 1\r\nloading  10%\rloading 100%\nlong progress line\rshort\nlast\r\n"
+        "2024-01-01T00:00:00Z 50% [=====     ] \r100% [==========]\n"
+    )
+    assert strategy.compress(text, 100, default_token_heuristic) == (
+        "step 1\nloading 100%\nshortprogress line\nlast\n2024-01-01T00:00:00Z 100% [==========]\n"
+    )
+
+
+def test_ci_log_is_cleaned_before_selection(strategy):
+    result = strategy.compress(_CI_LOG, 400, default_token_heuristic)
+    assert "\x1b" not in result and "\r" not in result
+    assert result.startswith("2024-01-01 00:00:09 ERROR step 9 failed\nTraceback")
+    assert "2024-01-01 00:00:00 Downloading 0: 100%\n" in result
+
+
+@pytest.mark.parametrize("mode", ["tail", "window"])
+def test_ci_log_file_paths_clean_like_the_stream(strategy, mode, monkeypatch):
+    monkeypatch.setattr(log_diet, "TAIL_READ_SIZE", 100)
+    kwargs = {"mode": mode, "since": "2024-01-01T00:03:00"} if mode == "window" else {"mode": mode}
+    handle = io.BytesIO(_CI_LOG.encode())
+    result = strategy.compress_file(handle, 200, default_token_heuristic, chunk_size=64, **kwargs)
+    assert result == strategy.compress(_CI_LOG, 200, default_token_heuristic, **kwargs)
+    assert "\x1b" not in result and "\r" not in result
+
+
+# ---------------------------------------------------------------------------
+# Sidecar index
+# ---------------------------------------------------------------------------
+
+
+class _CountingReader(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+_INDEXED_CASES = [
+    {"mode": "errors"},
+    {"mode": "errors", "fold": True},
+    {"mode": "window", "since": "2024-01-01T03:17:30", "until": "2024-01-01T07:00:00"},
+    {"mode": "window", "since": "2024-01-01T09:59:00"},
+]
+
+
+# Colored, with CRLF line ends and the odd non-ASCII character
+_INDEXED_LOG = _TIMED_LOG.replace(" INFO ", " \x1b[32mINFO\x1b[0m ").replace(
+    "ValueError: bad\n", "ValueError: bad \u2013 retried\r\n"
+)
+
+
+@pytest.mark.parametrize("kwargs", _INDEXED_CASES)
+@pytest.mark.parametrize("budget", [60, 400, 100_000])
+def test_index_selects_the_streamed_output(strategy, tmp_path, kwargs, budget):
+    log = tmp_path / "service.log"
+    log.write_bytes(_INDEXED_LOG.encode())
+    expected = strategy.compress(_INDEXED_LOG, budget, default_token_heuristic, **kwargs)
+    for _ in range(2):
+        # Built on the first call, read on the second
+        with open(log, "rb") as handle:
+            result = strategy.compress_file(
+                handle, budget, default_token_heuristic, chunk_size=256, index=True, **kwargs
+            )
+        assert result == expected
+    assert (tmp_path / f"service.log{INDEX_SUFFIX}").exists()
+
+
+def test_index_reads_only_error_blocks_once_regular_blocks_are_full(strategy, tmp_path):
+    path = tmp_path / "index"
+    strategy.compress_file(
+        io.BytesIO(_TIMED_LOG.encode()), 60, default_token_heuristic, index=path
+    )
+    handle = _CountingReader(_TIMED_LOG.encode())
+    result = strategy.compress_file(handle, 60, default_token_heuristic, 256, index=path)
+    assert result == strategy.compress(_TIMED_LOG, 60, default_token_heuristic)
+    # The head of the log, checked against the index, then the first few regular blocks
+    # and the error blocks, one in ten
+    assert handle.bytes_read < 4096 + 2000 + len(_TIMED_LOG) // 4
+
+
+def test_index_is_extended_with_appended_blocks(strategy, tmp_path):
+    log = tmp_path / "service.log"
+    index_path = tmp_path / "service.idx"
+    # The last line is still being written
+    log.write_text(_TIMED_LOG[:5000] + "2024-01-01T09")
+    with open(log, "rb") as handle:
+        strategy.compress_file(handle, 60, default_token_heuristic, index=index_path)
+    with open(log, "a") as handle:
+        handle.write(_TIMED_LOG[5013:])
+    with open(log, "rb") as handle:
+        result = strategy.compress_file(handle, 60, default_token_heuristic, index=index_path)
+    assert result == strategy.compress(_TIMED_LOG, 60, default_token_heuristic)
+
+    extended = LogIndex.load(index_path)
+    with open(log, "rb") as handle:
+        strategy.compress_file(handle, 60, default_token_heuristic, index=tmp_path / "fresh")
+    fresh = LogIndex.load(tmp_path / "fresh")
+    assert extended is not None and fresh is not None
+    assert extended.offsets == fresh.offsets and extended.high == fresh.high
+    assert extended.stamps == fresh.stamps and extended.levels == fresh.levels
+
+
+def test_index_is_rebuilt_for_a_replaced_log(strategy, tmp_path):
+    log = tmp_path / "service.log"
+    log.write_text(_TIMED_LOG)
+    with open(log, "rb") as handle:
+        strategy.compress_file(handle, 60, default_token_heuristic, index=True)
+    rotated = _TIMED_LOG.replace("step", "task")
+    log.write_text(rotated + rotated)
+    with open(log, "rb") as handle:
+        result = strategy.compress_file(handle, 60, default_token_heuristic, index=True)
+    assert result == strategy.compress(rotated + rotated, 60, default_token_heuristic)
+
+
+def test_index_answers_time_and_severity_queries(strategy, tmp_path):
+    path = tmp_path / "index"
+    strategy.compress_file(
+        io.BytesIO(_TIMED_LOG.encode()), 60, default_token_heuristic, index=path
+    )
+    index = LogIndex.load(path)
+    assert index is not None and len(index) == 600
+    errors = index.blocks(since="2024-01-01 01:00:00", until="2024-01-01 02:00:00", level="error")
+    assert errors == list(range(60, 120, 10))
+    assert all(index.high[block] for block in errors)
+    assert index.levels[61] == 2  # info
+
+
+# Severities in turn, with a continuation line under the warnings and a level-less block
+_LEVELED_LOG = "".join(
+    f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00 "
+    + ("DEBUG", "info", "WARN", "ERROR", "FATAL", "-")[i % 6]
+    + f" step {i}\n"
+    + ("  retrying\n" if i % 6 == 2 else "")
+    + ("Traceback (most recent call last):\nValueError: bad\n" if i % 12 == 3 else "")
+    for i in range(300)
+)
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"mode": "window", "since": "2024-01-01T01:00:00", "fold": True}]
+)
+@pytest.mark.parametrize("budget", [60, 600, 100_000])
+@pytest.mark.parametrize("level", ["debug", "warning", "critical"])
+def test_distill_level_keeps_blocks_of_that_severity_or_higher(tmp_path, kwargs, budget, level):
+    log = tmp_path / "service.log"
+    log.write_text(_LEVELED_LOG)
+    expected = distill(_LEVELED_LOG, budget, "log", default_token_heuristic, level=level, **kwargs)
+    kept = {"debug": "DEBUG info WARN ERROR FATAL", "warning": "WARN ERROR FATAL"}.get(
+        level, "FATAL"
+    )
+    headers = [line for line in expected.splitlines() if line.startswith("2024-")]
+    assert headers and all(line.split()[1] in kept.split() for line in headers)
+    if level == "warning" and budget == 100_000:
+        assert "WARN step 266\n  retrying\n" in expected
+    for _ in range(2):
+        # Built on the first call, read on the second
+        result = distill_file(
+            log,
+            budget,
+            "log",
+            default_token_heuristic,
+            chunk_size=256,
+            index=True,
+            **kwargs,
+            level=level,
+        )
+        assert result == expected
+
+
+def test_index_skips_blocks_below_the_level_unread(strategy, tmp_path):
+    path = tmp_path / "index"
+    strategy.compress_file(
+        io.BytesIO(_LEVELED_LOG.encode()), 60, default_token_heuristic, index=path
+    )
+    handle = _CountingReader(_LEVELED_LOG.encode())
+    result = strategy.compress_file(
+        handle, 100_000, default_token_heuristic, 256, index=path, level="critical"
+    )
+    assert result == strategy.compress(
+        _LEVELED_LOG, 100_000, default_token_heuristic, level="critical"
+    )
+    # The head of the log, checked against the index, then the one block in six
+    assert handle.bytes_read < 4096 + len(_LEVELED_LOG) // 4
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "message"),
+    [
+        ({"mode": "tail", "level": "error"}, "level applies"),
+        ({"level": "severe"}, "Unknown log level"),
+    ],
+)
+def test_level_is_checked(strategy, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        strategy.compress(_LEVELED_LOG, 60, default_token_heuristic, **kwargs)
+    with pytest.raises(ValueError, match=message):
+        strategy.compress_file(
+            io.BytesIO(_LEVELED_LOG.encode()), 60, default_token_heuristic, **kwargs
+        )
+
+
+def test_index_true_needs_a_named_log(strategy):
+    with pytest.raises(ValueError, match="index=True"):
+        strategy.compress_file(io.BytesIO(b"x\n"), 60, default_token_heuristic, index=True)
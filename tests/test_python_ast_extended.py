@@ -1,8 +1,11 @@
 """
 Extended coverage for PythonAstDietStrategy: async functions, decorators,
-focus_on kwarg, skeleton mode edge cases, and multiple-function files.
+focus_on kwarg, skeleton mode edge cases, multiple-function files, and the
+tokenize-based streaming skeletonizer.
 """
 
+import ast
+
 import pytest
 
 from context_diet.interfaces import ContextBudgetExceededError
@@ -190,3 +193,114 @@ def test_skeleton_too_large_raises(strategy):
     content = f"class Huge:\n{methods}\n"
     with pytest.raises(ContextBudgetExceededError, match="Minimum Python skeleton exceeds budget"):
         strategy.compress(content, budget=1, token_counter=default_token_heuristic)
+
+
+# ---------------------------------------------------------------------------
+# Streaming tokenize skeletonizer — huge / generated sources
+# ---------------------------------------------------------------------------
+
+
+def test_stream_threshold_uses_tokenize_skeleton(strategy):
+    content = (
+        '"""Generated module."""\n'
+        "import os\n\n"
+        "class Message:\n"
+        '    """Protobuf message."""\n'
+        "    FIELD = 1\n\n"
+        "    def serialize(self, out: list[str] = []) -> bytes:\n"
+        "        out.append(os.sep)\n"
+        "        return b''\n"
+    )
+    result = strategy.compress(
+        content, budget=100_000, token_counter=default_token_heuristic, stream_threshold=0
+    )
+    assert "Generated module." not in result
+    assert "Protobuf message." not in result
+    assert "FIELD = 1" in result
+    assert "def serialize(self, out: list[str] = []) -> bytes:\n        ...\n" in result
+    assert "os.sep" not in result
+
+
+def test_stream_skeleton_handles_multiline_headers_and_one_liners(strategy):
+    content = (
+        "@decorator(key=':')\n"
+        "async def fetch(url: str,\n"
+        "                timeout: dict[str, int] = {'a': 1}) -> str:\n"
+        "    return url\n\n"
+        "def quick(x): return x * 2\n"
+    )
+    result = strategy.compress(
+        content, budget=100_000, token_counter=default_token_heuristic, stream_threshold=0
+    )
+    assert "@decorator(key=':')" in result
+    assert "timeout: dict[str, int] = {'a': 1}) -> str:\n    ...\n" in result
+    assert "def quick(x): ...\n" in result
+    assert "return" not in result
+
+
+def test_stream_skeleton_preserves_code_after_bodies(strategy):
+    content = "def first():\n    return 1\n\n# section marker\nCONSTANT = first()\n"
+    result = strategy.compress(
+        content, budget=100_000, token_counter=default_token_heuristic, stream_threshold=0
+    )
+    assert result == "def first():\n    ...\n\n# section marker\nCONSTANT = first()\n"
+
+
+def test_stream_skeleton_keeps_docstring_only_bodies_valid(strategy):
+    content = (
+        "class ConfigError(Exception):\n"
+        '    """Raised on bad config."""\n\n'
+        "class A:\n"
+        "    def f(self):\n"
+        "        return 1\n\n"
+        'def main():\n    """Entry point."""\n'
+    )
+    result = strategy.compress(
+        content,
+        budget=100_000,
+        token_counter=default_token_heuristic,
+        stream_threshold=0,
+        focus_on="main",
+    )
+    ast.parse(result)
+    assert result == (
+        "class ConfigError(Exception):\n    pass\n\n"
+        "class A:\n    def f(self):\n        ...\n\n"
+        "def main():\n    pass\n"
+    )
+
+
+def test_stream_skeleton_respects_focus_on(strategy):
+    content = (
+        "def helper():\n    return 42\n\n"
+        'def main():\n    """Entry point."""\n    x = helper()\n    return x\n'
+    )
+    result = strategy.compress(
+        content,
+        budget=100_000,
+        token_counter=default_token_heuristic,
+        stream_threshold=0,
+        focus_on="main",
+    )
+    assert "return 42" not in result
+    assert "x = helper()" in result
+    assert "Entry point." not in result
+
+
+def test_stream_skeleton_handles_large_generated_module(strategy):
+    methods = "".join(
+        f"    def method_{i}(self, arg: int) -> int:\n        return arg + {i}\n"
+        for i in range(20_000)
+    )
+    content = f"class Generated:\n{methods}"
+    result = strategy.compress(content, budget=10**7, token_counter=default_token_heuristic)
+    assert "def method_19999(self, arg: int) -> int:" in result
+    assert "return arg" not in result
+
+
+def test_stream_skeleton_syntax_error_raises(strategy):
+    content = "def bad_func(\n    return 1\n"
+    with pytest.raises(ContextBudgetExceededError, match="SyntaxError"):
+        strategy.compress(
+            content, budget=100_000, token_counter=default_token_heuristic, stream_threshold=0
+        )
@@ -5,7 +5,7 @@ heuristic detection edge cases, and priority ordering.
 
 import pytest
 
-from context_diet.sniffer import detect_strategy
+from context_diet.sniffer import SNIFF_SIZE, detect_strategy, rank_strategies
 
 
 # ---------------------------------------------------------------------------
@@ -49,6 +49,11 @@ def test_extension_map_csv():
     assert detect_strategy("", extension=".csv") == "text"
 
 
+def test_extension_map_jsonl():
+    assert detect_strategy("", extension=".jsonl") == "jsonl"
+    assert detect_strategy("", extension=".ndjson") == "jsonl"
+
+
 def test_filename_overrides_heuristic():
     """A .py filename wins over JSON-looking content."""
     json_looking = '{"key": "value"}'
@@ -166,6 +171,162 @@ def test_json_array_detected():
     assert detect_strategy("[1, 2, 3]") == "json"
 
 
+def test_json_lines_detected():
+    content = '{"level": "info", "msg": "up"}\n{"level": "error", "msg": "down"}\n'
+    assert detect_strategy(content) == "jsonl"
+
+
+def test_pretty_printed_json_object_is_not_json_lines():
+    assert detect_strategy('{\n  "a": 1,\n  "b": {}\n}') == "json"
+
+
 def test_extension_wins_over_json_content():
     """When extension=.sql, it wins over JSON-like content."""
     assert detect_strategy('{"a": 1}', extension=".sql") == "sql"
+
+
+def test_rotated_and_compressed_filenames_use_the_inner_extension():
+    assert detect_strategy("", filename="app.log.1") == "log"
+    assert detect_strategy("", filename="app.log.2.gz") == "log"
+    assert detect_strategy("", filename="/var/log/app.log-20240101.bz2") == "log"
+    assert detect_strategy("", filename="dump.sql.xz") == "sql"
+
+
+# ---------------------------------------------------------------------------
+# Bounded sample
+# ---------------------------------------------------------------------------
+
+_PROSE = "The quick brown fox jumps over the lazy dog.\n" * (3 * SNIFF_SIZE // 45)
+_MODULE = "def double(x):\n    return 2 * x\n" * (SNIFF_SIZE // 30)
+_SERVICE_LOG = "2024-01-15 10:00:00 INFO request served\n" * (SNIFF_SIZE // 38)
+
+
+def test_only_the_head_is_sniffed_by_default():
+    assert detect_strategy(_PROSE + _MODULE) == "text"
+    assert detect_strategy(_MODULE + _PROSE) == "python"
+
+
+def test_tail_and_middle_windows_are_sniffed_when_asked_for():
+    assert detect_strategy(_PROSE + _MODULE, windows=2) == "python"
+    middle = _PROSE + _SERVICE_LOG + _PROSE
+    assert detect_strategy(middle, windows=2) == "text"
+    assert detect_strategy(middle, windows=3) == "log"
+
+
+def test_head_is_sniffed_past_leading_whitespace():
+    assert detect_strategy(" \n" * SNIFF_SIZE + "SELECT 1;") == "sql"
+    assert detect_strategy(" " * SNIFF_SIZE + "x" * SNIFF_SIZE + "\nimport os\n") == "text"
+
+
+def test_json_lines_with_a_record_longer_than_the_sample():
+    record = '{"level": "info", "msg": "%s"}\n' % ("x" * SNIFF_SIZE)
+    assert detect_strategy('{"level": "info"}\n' + record * 2) == "jsonl"
+    assert detect_strategy('{"a": 1}\n"x' + "x" * SNIFF_SIZE + '"\n') == "json"
+
+
+def test_windows_must_be_positive():
+    with pytest.raises(ValueError, match="windows"):
+        detect_strategy("import os\n", windows=0)
+
+
+# ---------------------------------------------------------------------------
+# Ranked candidates
+# ---------------------------------------------------------------------------
+
+
+def test_ranked_candidates_have_confidences_that_add_up_to_one():
+    ranked = rank_strategies("import os\n\nQUERY = 'SELECT 1'\nprint(QUERY)\n")
+    assert ranked[0][0] == "python"
+    assert [confidence for _, confidence in ranked] == sorted(
+        (confidence for _, confidence in ranked), reverse=True
+    )
+    assert sum(confidence for _, confidence in ranked) == pytest.approx(1.0)
+    assert "text" in dict(ranked)
+
+
+def test_known_extension_is_the_only_candidate():
+    assert rank_strategies("SELECT 1;", filename="notes.md") == [("text", 1.0)]
+    assert rank_strategies("   ") == [("text", 1.0)]
+
+
+def test_python_with_embedded_sql_is_python():
+    content = (
+        '"""Queries."""\n\nUSERS = """\nSELECT id, name\nFROM users\nWHERE active = 1\n'
+        'ORDER BY name\n"""\n\n\ndef users(db):\n    return db.execute(USERS)\n'
+    )
+    assert detect_strategy(content) == "python"
+
+
+def test_a_key_value_line_in_prose_is_text():
+    content = (
+        "Hi team,\n\nSummary: the release slips by a week.\n"
+        "The migration scripts need another review before we run them.\n"
+        "I will send an update on Friday.\n"
+    )
+    assert detect_strategy(content) == "text"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "From there, we went home.",
+        "Set it to blue before you leave.\nThen lock the door.\n",
+        "Select it, then press enter.\nThe dialog closes.\n",
+        "Copy this to the shared folder.\nAnd it is done.\n",
+        "Delete from the list anything older than a week.\nOr keep it if unsure.\n",
+        "Order by Friday to get the discount.\nLimit 2 per customer.\n",
+        "Grant them access on Monday.\nUpdate everyone set up on the old plan.\n",
+    ],
+)
+def test_prose_opening_with_sql_keywords_is_text(content):
+    assert detect_strategy(content) == "text"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "# Release notes\n\nFrom now on, builds are signed.\n\n- Faster startup\n"
+        "- Select any theme, then restart\n\n## Upgrading\n\n"
+        "Order by version when you list packages.\n",
+        "## Usage\n\nInsert into your config the line below, then restart.\n\n"
+        "> Set the flag to true; the default is false.\n\nAnd that is all.\n",
+    ],
+)
+def test_markdown_with_sql_keywords_is_text(content):
+    assert detect_strategy(content) == "text"
+
+
+def test_log_opening_with_a_bracketed_timestamp_is_a_log():
+    content = "[2024-03-01T10:00:00.000Z] INFO cache warm\n[2024-03-01T10:00:01.000Z] WARN slow\n"
+    assert detect_strategy(content) == "log"
+
+
+def test_sql_dump_opening_with_comments_and_settings_is_sql():
+    content = (
+        "-- PostgreSQL database dump\n\nSET statement_timeout = 0;\n"
+        "SET client_encoding = 'UTF8';\n\nCREATE TABLE public.t (\n    id integer\n);\n"
+    )
+    assert detect_strategy(content) == "sql"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "SELECT id, name FROM users WHERE id = 1;\n",
+        "SELECT u.id, u.name\nFROM users u\nWHERE u.id = 1;\n",
+        "SELECT count(*) FROM users;\n",
+        "SELECT DISTINCT o.user_id, SUM(o.total) AS spent FROM orders o GROUP BY o.user_id;\n",
+    ],
+)
+def test_plain_select_statements_are_sql(content):
+    assert detect_strategy(content) == "sql"
+
+
+def test_lowercase_multiline_query_is_sql():
+    content = "select u.id,\n       u.name\nfrom users u\nwhere u.id = 1\norder by u.name;\n"
+    assert detect_strategy(content) == "sql"
+
+
+def test_access_log_is_a_log():
+    content = '10.0.0.1 - - [01/Mar/2024:10:00:00 +0000] "GET / HTTP/1.1" 200 512\n' * 3
+    assert detect_strategy(content) == "log"
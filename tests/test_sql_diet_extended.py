@@ -1,16 +1,24 @@
 """
 Extended coverage for SqlDietStrategy: DDL-only pass-through, DML-only content,
-ALTER TABLE handling, and budget boundary behavior.
+ALTER TABLE handling, budget boundary behavior, the DDL pre-filter, the
+statement scanner behind the regex tier, streaming dumps with COPY data, the
+Tier 1 render cache and parse pool, the compact schema outline, and
+foreign-key-aware table selection with ``focus_tables``.
 """
 
+import sys
+
 import pytest
 
-from context_diet.strategies.sql_diet import SqlDietStrategy
+from context_diet.strategies import sql_diet
+from context_diet.strategies.sql_diet import FocusTableError, SqlDietStrategy, clear_render_cache
 from context_diet.token_utils import default_token_heuristic
 
 
 @pytest.fixture()
 def strategy():
+    # Renderings are cached across instances; start every test from a cold cache
+    clear_render_cache()
     return SqlDietStrategy()
 
 
@@ -103,7 +111,7 @@ def test_multiple_create_tables_budget_truncation(strategy):
         [f"CREATE TABLE t{i} (id INT PRIMARY KEY, val VARCHAR(100));" for i in range(20)]
     )
     result = strategy.compress(content, budget=30, token_counter=default_token_heuristic)
-    assert "CREATE TABLE" in result
+    assert result.startswith("t0(id:INT PK")
     assert default_token_heuristic(result) <= 30
 
 
@@ -127,3 +135,481 @@ def test_output_statements_end_with_semicolon(strategy):
     lines = [l for l in stripped.splitlines() if l.strip()]
     last_token = lines[-1].strip() if lines else ""
     assert last_token.endswith(";") or "CREATE TABLE" in result
+
+
+# ---------------------------------------------------------------------------
+# DDL pre-filter (only schema statements reach sqlglot)
+# ---------------------------------------------------------------------------
+
+
+def test_dml_statements_are_never_parsed(strategy, monkeypatch):
+    sqlglot = pytest.importorskip("sqlglot")
+    parsed = []
+    real_parse = sqlglot.parse
+
+    def recording_parse(sql, *args, **kwargs):
+        parsed.append(sql)
+        return real_parse(sql, *args, **kwargs)
+
+    monkeypatch.setattr(sqlglot, "parse", recording_parse)
+    content = "CREATE TABLE t (id INT);\n" + "INSERT INTO t VALUES (1);\n" * 50
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert "CREATE TABLE" in result
+    assert len(parsed) == 1
+    assert "INSERT" not in parsed[0]
+
+
+def test_semicolons_inside_dollar_quoted_bodies_do_not_split(strategy):
+    pytest.importorskip("sqlglot")
+    content = (
+        "CREATE TABLE audit (msg TEXT);\n"
+        "DO $body$ BEGIN INSERT INTO audit VALUES ('x'); END; $body$;\n"
+        "CREATE VIEW v AS SELECT msg FROM audit;\n"
+    )
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert "CREATE TABLE audit" in result
+    assert "CREATE VIEW v" in result
+    assert "INSERT" not in result
+
+
+def test_ddl_inside_string_literal_is_not_extracted(strategy):
+    pytest.importorskip("sqlglot")
+    content = (
+        "CREATE TABLE notes (body TEXT);\n"
+        "INSERT INTO notes VALUES ('it''s; DROP TABLE notes; -- gotcha');\n"
+        "INSERT INTO notes VALUES ('O\\'Brien; CREATE TABLE fake (id INT);');\n"
+    )
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert "CREATE TABLE notes" in result
+    assert "DROP" not in result
+    assert "fake" not in result
+
+
+# ---------------------------------------------------------------------------
+# Statement scanner (Tier 2 regex extraction without sqlglot)
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def without_sqlglot(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sqlglot", None)
+
+
+@pytest.fixture(params=["ast", "regex"])
+def tier(request, monkeypatch):
+    if request.param == "ast":
+        pytest.importorskip("sqlglot")
+    else:
+        monkeypatch.setitem(sys.modules, "sqlglot", None)
+    return request.param
+
+
+def test_regex_tier_ignores_semicolons_in_literals(strategy, without_sqlglot):
+    content = (
+        "CREATE TABLE real_table (id INT, body TEXT);\n"
+        "INSERT INTO real_table VALUES (1, 'x; CREATE TABLE fake (id INT);');\n"
+        "-- CREATE TABLE commented (id INT);\n"
+    )
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert result == "CREATE TABLE real_table (id INT, body TEXT);\n"
+
+
+def test_regex_tier_orders_creates_before_alters(strategy, without_sqlglot):
+    content = (
+        "CREATE TABLE a (id INT);\n"
+        "ALTER TABLE a ADD CONSTRAINT a_pk PRIMARY KEY (id);\n"
+        "CREATE UNIQUE INDEX a_idx ON a (id);\n"
+        "CREATE OR REPLACE VIEW a_view AS SELECT id FROM a;\n"
+    )
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert result.splitlines() == [
+        "CREATE TABLE a (id INT);",
+        "CREATE UNIQUE INDEX a_idx ON a (id);",
+        "CREATE OR REPLACE VIEW a_view AS SELECT id FROM a;",
+        "ALTER TABLE a ADD CONSTRAINT a_pk PRIMARY KEY (id);",
+    ]
+
+
+def test_unterminated_quote_does_not_swallow_later_ddl(strategy, without_sqlglot):
+    content = "CREATE TABLE a (id INT);\nINSERT INTO a VALUES ('oops);\nCREATE TABLE b (id INT);\n"
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert "CREATE TABLE a" in result
+    assert "CREATE TABLE b" in result
+
+
+# Standard SQL only doubles a quote, so a trailing backslash ends nothing
+_BACKSLASH_DUMP = (
+    "INSERT INTO t VALUES ('C:\\'); CREATE TABLE x (id int); "
+    "INSERT INTO t VALUES ('b'); CREATE TABLE y (id int);"
+)
+
+
+def test_backslash_is_plain_in_standard_strings(strategy, tier):
+    result = strategy.compress(_BACKSLASH_DUMP, 5000, default_token_heuristic)
+    assert result.upper().splitlines() == ["CREATE TABLE X (ID INT);", "CREATE TABLE Y (ID INT);"]
+
+
+@pytest.mark.parametrize(
+    ("content", "dialect"),
+    [
+        (
+            "INSERT INTO t SELECT E'it\\'; CREATE TABLE x (id int); '; CREATE TABLE y (id int);",
+            None,
+        ),
+        (
+            "INSERT INTO t SELECT 'it\\'; CREATE TABLE x (id int); '; CREATE TABLE y (id int);",
+            "mysql",
+        ),
+    ],
+)
+def test_backslash_escapes_in_escape_strings_and_mysql(strategy, tier, content, dialect):
+    result = strategy.compress(content, 5000, default_token_heuristic, dialect=dialect)
+    assert result.upper() == "CREATE TABLE Y (ID INT);\n"
+
+
+def test_unterminated_dml_is_scanned_in_linear_time(strategy, without_sqlglot):
+    # One unterminated INSERT per line made the old DOTALL pattern rescan to the end of
+    # the input from every line start
+    content = "CREATE TABLE t (id INT);\n" + "INSERT INTO t VALUES ('a', \"b\", $x$\n" * 20_000
+    result = strategy.compress(content, budget=5000, token_counter=default_token_heuristic)
+    assert result == "CREATE TABLE t (id INT);\n"
+
+
+# ---------------------------------------------------------------------------
+# Streaming dumps (compress_stream) and COPY ... FROM stdin payloads
+# ---------------------------------------------------------------------------
+
+_COPY_DUMP = [
+    "CREATE TABLE public.users (id integer, name text);\n",
+    "COPY public.users (id, name) FROM stdin;\n",
+    "1\tO'Brien; DROP TABLE users;\n",
+    "2\t$$ -- not a comment\n",
+    "\\.\n",
+    "CREATE TABLE public.orders (id integer, user_id integer);\n",
+]
+
+
+def test_copy_payload_is_skipped(strategy):
+    result = strategy.compress("".join(_COPY_DUMP), 5000, default_token_heuristic)
+    assert "CREATE TABLE public.users" in result
+    assert "CREATE TABLE public.orders" in result
+    assert "DROP" not in result
+    assert "Brien" not in result
+
+
+def test_stream_skips_copy_payload_across_chunks(strategy):
+    result = strategy.compress_stream(iter(_COPY_DUMP), 5000, default_token_heuristic)
+    assert "CREATE TABLE public.users" in result
+    assert "CREATE TABLE public.orders" in result
+    assert "DROP" not in result
+    assert "Brien" not in result
+
+
+def test_stream_matches_in_memory_output(strategy):
+    pytest.importorskip("sqlglot")
+    lines = [
+        "-- schema\n",
+        "CREATE TABLE a (id INT PRIMARY KEY, note TEXT DEFAULT 'x;y');\n",
+        "INSERT INTO a VALUES (1, 'multi\n",
+        "line; value');\n",
+        "CREATE VIEW v AS SELECT id FROM a WHERE note <> ';';\n",
+        "ALTER TABLE a ADD COLUMN b INT;\n",
+    ]
+    expected = strategy.compress("".join(lines), 5000, default_token_heuristic)
+    assert strategy.compress_stream(iter(lines), 5000, default_token_heuristic) == expected
+
+
+def test_stream_stops_reading_once_budget_is_spent(strategy):
+    def dump():
+        for i in range(1_000):
+            yield f"CREATE TABLE t{i} (id INT, name VARCHAR(100));\n"
+            yield "INSERT INTO t VALUES (1, 'row');\n" * 10
+        raise AssertionError("the whole dump was read")
+
+    result = strategy.compress_stream(dump(), 100, default_token_heuristic)
+    assert result.startswith("t0(id:INT, name:VARCHAR(100))")
+    assert default_token_heuristic(result) <= 100
+
+
+def test_stream_regex_tier_orders_creates_before_alters(strategy, without_sqlglot):
+    lines = [
+        "CREATE TABLE a (id INT);\n",
+        "ALTER TABLE a ADD CONSTRAINT a_pk PRIMARY KEY (id);\n",
+        "INSERT INTO a VALUES (1);\n",
+        "CREATE TABLE b (id INT);\n",
+    ]
+    result = strategy.compress_stream(iter(lines), 5000, default_token_heuristic)
+    assert result.splitlines() == [
+        "CREATE TABLE a (id INT);",
+        "CREATE TABLE b (id INT);",
+        "ALTER TABLE a ADD CONSTRAINT a_pk PRIMARY KEY (id);",
+    ]
+
+
+def test_stream_treats_backslash_as_plain_in_standard_strings(strategy, tier):
+    # One statement per chunk, so the string left open by an escaped quote would span them
+    chunks = iter(_BACKSLASH_DUMP.replace("; ", ";\n").splitlines(keepends=True))
+    result = strategy.compress_stream(chunks, 5000, default_token_heuristic)
+    assert result.upper().splitlines() == ["CREATE TABLE X (ID INT);", "CREATE TABLE Y (ID INT);"]
+
+
+def test_stream_honours_backslash_escapes_for_mysql(strategy, tier):
+    chunks = iter(
+        [
+            "CREATE TABLE a (id int);\n",
+            "INSERT INTO a SELECT 'it\\';\n",
+            "CREATE TABLE x (id int); ';\n",
+        ]
+    )
+    result = strategy.compress_stream(chunks, 5000, default_token_heuristic, dialect="mysql")
+    assert result.upper() == "CREATE TABLE A (ID INT);\n"
+
+
+def test_stream_without_ddl_slices_the_head(strategy):
+    lines = ["INSERT INTO t VALUES (1);\n"] * 100
+    result = strategy.compress_stream(iter(lines), 10, default_token_heuristic)
+    assert result.startswith("INSERT INTO t")
+    assert default_token_heuristic(result) <= 10
+
+
+# ---------------------------------------------------------------------------
+# Render cache and parse pool
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def parse_calls(monkeypatch):
+    sqlglot = pytest.importorskip("sqlglot")
+    calls = []
+    real_parse = sqlglot.parse
+
+    def recording_parse(sql, *args, **kwargs):
+        calls.append((sql, kwargs.get("read")))
+        return real_parse(sql, *args, **kwargs)
+
+    monkeypatch.setattr(sqlglot, "parse", recording_parse)
+    return calls
+
+
+def test_unchanged_statements_are_not_reparsed(strategy, parse_calls):
+    content = "CREATE TABLE a (id INT);\nCREATE TABLE b (id INT);\n"
+    first = strategy.compress(content, 5000, default_token_heuristic)
+    assert len(parse_calls) == 2
+
+    edited = content + "CREATE TABLE c (id INT);\n"
+    second = SqlDietStrategy().compress(edited, 5000, default_token_heuristic)
+    assert second.startswith(first)
+    assert [sql for sql, _ in parse_calls[2:]] == ["CREATE TABLE c (id INT);"]
+
+
+def test_render_cache_is_keyed_by_dialect(strategy, parse_calls):
+    content = "CREATE TABLE a (id INT);\n"
+    strategy.compress(content, 5000, default_token_heuristic)
+    strategy.compress(content, 5000, default_token_heuristic, dialect="mysql")
+    strategy.compress(content, 5000, default_token_heuristic, dialect="mysql")
+    assert [read for _, read in parse_calls] == [None, "mysql"]
+
+
+def test_parse_pool_matches_serial_output(strategy, monkeypatch):
+    pytest.importorskip("sqlglot")
+    monkeypatch.setattr(sql_diet, "PARALLEL_MIN_DDL_CHARS", 100)
+    content = "".join(
+        f"CREATE TABLE t{i} (id INT, name VARCHAR(100));\nINSERT INTO t{i} VALUES (1, 'x');\n"
+        for i in range(40)
+    )
+    serial = strategy.compress(content, 5000, default_token_heuristic)
+    clear_render_cache()
+    parallel = strategy.compress(content, 5000, default_token_heuristic, parse_workers=2)
+    assert parallel == serial
+
+
+# ---------------------------------------------------------------------------
+# Compact schema outline (used before any table is dropped)
+# ---------------------------------------------------------------------------
+
+_PG_SCHEMA = """
+CREATE TABLE public.customers (
+    id integer NOT NULL,
+    email character varying(255) NOT NULL,
+    CONSTRAINT customers_email_key UNIQUE (email)
+) WITH (fillfactor=70);
+
+CREATE TABLE public.orders (
+    id integer NOT NULL,
+    customer_id integer NOT NULL REFERENCES public.customers(id),
+    total numeric(10, 2) DEFAULT 0 CHECK (total >= 0)
+);
+
+CREATE TABLE public.order_lines (
+    order_id integer NOT NULL,
+    line_no integer NOT NULL,
+    note text DEFAULT 'a, (b',
+    PRIMARY KEY (order_id, line_no)
+);
+
+ALTER TABLE ONLY public.customers ADD CONSTRAINT customers_pkey PRIMARY KEY (id);
+ALTER TABLE ONLY public.order_lines
+    ADD CONSTRAINT order_lines_order_fk FOREIGN KEY (order_id) REFERENCES public.orders(id);
+"""
+
+# Tier 1 outlines sqlglot's output, whose types are normalized
+_PG_OUTLINE = {
+    "ast": [
+        "public.customers(id:INT PK, email:VARCHAR(255))",
+        "public.orders(id:INT, customer_id:INT -> public.customers.id, total:DECIMAL(10, 2))",
+        "public.order_lines(order_id:INT -> public.orders.id, line_no:INT, note:TEXT, "
+        "PK(order_id,line_no))",
+    ],
+    "regex": [
+        "public.customers(id:integer PK, email:character varying(255))",
+        "public.orders(id:integer, customer_id:integer -> public.customers.id, "
+        "total:numeric(10, 2))",
+        "public.order_lines(order_id:integer -> public.orders.id, line_no:integer, note:text, "
+        "PK(order_id,line_no))",
+    ],
+}
+
+
+def test_schema_that_fits_keeps_full_ddl(strategy, without_sqlglot):
+    result = strategy.compress(_PG_SCHEMA, 5000, default_token_heuristic)
+    assert "CREATE TABLE public.orders" in result
+
+
+def test_overflowing_schema_switches_to_outline(strategy, tier):
+    result = strategy.compress(_PG_SCHEMA, 120, default_token_heuristic)
+    assert result.splitlines() == _PG_OUTLINE[tier]
+
+
+def test_outline_fits_more_tables_than_full_ddl(strategy, without_sqlglot):
+    content = "".join(
+        f"CREATE TABLE t{i} (id INT NOT NULL DEFAULT 0, name VARCHAR(100) NOT NULL) "
+        f"ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n"
+        for i in range(50)
+    )
+    full_statement_tokens = default_token_heuristic(content.splitlines()[0])
+    result = strategy.compress(content, 10 * full_statement_tokens, default_token_heuristic)
+    assert len(result.splitlines()) >= 30
+    assert result.startswith("t0(id:INT, name:VARCHAR(100))")
+
+
+def test_stream_switches_to_outline(strategy):
+    pytest.importorskip("sqlglot")
+    result = strategy.compress_stream(
+        iter(_PG_SCHEMA.splitlines(keepends=True)), 120, default_token_heuristic
+    )
+    assert result.splitlines()[0] == _PG_OUTLINE["ast"][0]
+
+
+# pg_dump heads every object with a comment block, which stays attached to the statement
+_PG_DUMP = _PG_SCHEMA.replace(
+    "CREATE TABLE public.orders",
+    "--\n-- Name: orders; Type: TABLE\n--\nCREATE TABLE public.orders",
+).replace("CREATE TABLE public.customers", "/* customers */ CREATE TABLE public.customers")
+
+
+def test_outline_keeps_tables_behind_comments(strategy, tier):
+    result = strategy.compress(_PG_DUMP, 120, default_token_heuristic)
+    assert result.splitlines() == _PG_OUTLINE[tier]
+
+
+def test_stream_outline_keeps_tables_behind_comments(strategy):
+    pytest.importorskip("sqlglot")
+    result = strategy.compress_stream(
+        iter(_PG_DUMP.splitlines(keepends=True)), 120, default_token_heuristic
+    )
+    assert result.splitlines() == _PG_OUTLINE["ast"]
+
+
+# ---------------------------------------------------------------------------
+# focus_tables: selection by foreign key distance
+# ---------------------------------------------------------------------------
+
+# suppliers <- products <- order_lines -> orders -> customers; audit_log stands alone
+_SHOP_SCHEMA = """
+CREATE TABLE public.audit_log (id INT PRIMARY KEY, payload TEXT);
+CREATE TABLE public.customers (id INT PRIMARY KEY, email VARCHAR(255));
+CREATE TABLE public.suppliers (id INT PRIMARY KEY, name VARCHAR(255));
+CREATE TABLE public.products (id INT PRIMARY KEY, supplier_id INT REFERENCES suppliers(id));
+CREATE TABLE public.orders (id INT PRIMARY KEY, customer_id INT);
+CREATE TABLE public.order_lines (order_id INT, product_id INT, qty INT);
+CREATE INDEX order_lines_product ON public.order_lines (product_id);
+ALTER TABLE public.orders ADD CONSTRAINT fk_c FOREIGN KEY (customer_id) REFERENCES public.customers(id);
+ALTER TABLE public.order_lines ADD CONSTRAINT fk_o FOREIGN KEY (order_id) REFERENCES public.orders(id);
+ALTER TABLE public.order_lines ADD CONSTRAINT fk_p FOREIGN KEY (product_id) REFERENCES public.products(id);
+"""
+
+
+def _table_names(result):
+    return [line.split("(")[0].split()[-1] for line in result.splitlines()]
+
+
+def test_focus_keeps_the_connected_schema_in_full(strategy, tier):
+    result = strategy.compress(
+        _SHOP_SCHEMA, 5000, default_token_heuristic, focus_tables=["orders"]
+    )
+    assert "audit_log" not in result
+    assert "CREATE INDEX order_lines_product" in result
+    assert result.count("ALTER TABLE") == 3
+    assert _table_names(result)[:5] == [
+        "public.customers",
+        "public.suppliers",
+        "public.products",
+        "public.orders",
+        "public.order_lines",
+    ]
+
+
+def test_focus_packs_the_nearest_tables_first(strategy, tier):
+    result = strategy.compress(
+        _SHOP_SCHEMA, 60, default_token_heuristic, focus_tables=["public.orders"]
+    )
+    # orders, then its neighbours customers and order_lines; products (2 hops) is left out
+    assert _table_names(result) == ["public.customers", "public.orders", "public.order_lines"]
+    assert default_token_heuristic(result) <= 60
+
+
+def test_focus_from_several_tables(strategy, tier):
+    result = strategy.compress(
+        _SHOP_SCHEMA, 30, default_token_heuristic, focus_tables=["suppliers", "audit_log"]
+    )
+    assert _table_names(result) == ["public.audit_log", "public.suppliers"]
+
+
+def test_unknown_focus_table_is_an_error(strategy, tier):
+    with pytest.raises(FocusTableError, match="nowhere"):
+        strategy.compress(_SHOP_SCHEMA, 5000, default_token_heuristic, focus_tables=["nowhere"])
+
+
+def test_stream_unknown_focus_table_is_an_error(strategy):
+    lines = iter(_SHOP_SCHEMA.splitlines(keepends=True))
+    with pytest.raises(FocusTableError, match="nowhere"):
+        strategy.compress_stream(lines, 5000, default_token_heuristic, focus_tables=["nowhere"])
+
+
+def test_stream_honours_focus_tables(strategy):
+    lines = iter(_SHOP_SCHEMA.splitlines(keepends=True))
+    streamed = strategy.compress_stream(
+        lines, 60, default_token_heuristic, focus_tables=["orders"]
+    )
+    in_memory = strategy.compress(
+        _SHOP_SCHEMA, 60, default_token_heuristic, focus_tables=["orders"]
+    )
+    assert streamed == in_memory
+
+
+# a <- b <- c, each headed by a pg_dump comment block
+_COMMENTED_CHAIN = "".join(
+    f"--\n-- Name: {name}; Type: TABLE; Schema: public\n--\n\n{ddl}\n\n"
+    for name, ddl in (
+        ("a", "CREATE TABLE a (id INT PRIMARY KEY, name TEXT);"),
+        ("b", "CREATE TABLE b (id INT PRIMARY KEY, a_id INT REFERENCES a(id));"),
+        ("c", "CREATE TABLE c (id INT PRIMARY KEY, b_id INT REFERENCES b(id));"),
+        ("d", "CREATE TABLE d (id INT PRIMARY KEY, note TEXT);"),
+    )
+)
+
+
+def test_focus_follows_foreign_keys_behind_comments(strategy, tier):
+    result = strategy.compress(_COMMENTED_CHAIN, 40, default_token_heuristic, focus_tables=["c"])
+    # c, then b one hop away, then a two hops away; d stands alone
+    assert _table_names(result) == ["a", "b", "c"]
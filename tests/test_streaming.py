@@ -0,0 +1,78 @@
+"""
+Tests for the incremental text readers feeding the streaming strategy paths.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+import pytest
+
+from context_diet.streaming import chunk_text, iter_files, iter_text
+
+
+def test_chunks_end_on_line_boundaries():
+    blocks = [b"first li", b"ne\nsecond ", b"line\nthird", b" line"]
+    chunks = list(iter_text(iter(blocks)))
+    assert chunks == ["first line\n", "second line\n", "third line"]
+
+
+def test_multibyte_characters_split_across_blocks_are_decoded():
+    encoded = "naïve café\n".encode()
+    blocks = [encoded[i : i + 1] for i in range(len(encoded))]
+    assert "".join(iter_text(iter(blocks))) == "naïve café\n"
+
+
+def test_invalid_utf8_is_dropped():
+    assert "".join(iter_text([b"ok \xff\xfe bytes\n"])) == "ok  bytes\n"
+
+
+def test_reads_paths_and_file_objects(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("a\nb\nc\n")
+    assert "".join(iter_text(path, chunk_size=2)) == "a\nb\nc\n"
+    assert "".join(iter_text(str(path), chunk_size=2)) == "a\nb\nc\n"
+    assert "".join(iter_text(io.StringIO("x\ny"), chunk_size=1)) == "x\ny"
+
+
+def test_chunk_text_cuts_after_newlines():
+    text = "alpha\nbeta\ngamma\ndelta"
+    assert list(chunk_text(text, chunk_size=7)) == ["alpha\nbeta\n", "gamma\ndelta"]
+    assert list(chunk_text("", chunk_size=7)) == []
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress, lzma.compress])
+def test_compressed_bytes_are_decompressed(compress):
+    text = "".join(f"line {i}\n" for i in range(1000))
+    data = compress(text.encode())
+    blocks = [data[i : i + 3] for i in range(0, len(data), 3)]
+    assert "".join(iter_text(iter(blocks), chunk_size=100)) == text
+    assert "".join(iter_text(io.BytesIO(data), chunk_size=100)) == text
+
+
+def test_concatenated_gzip_members_are_read_through():
+    data = gzip.compress(b"first\n") + gzip.compress(b"second\n")
+    assert "".join(iter_text(io.BytesIO(data))) == "first\nsecond\n"
+
+
+def test_text_starting_like_bzip2_is_not_decompressed():
+    assert "".join(iter_text([b"BZh9 is not a header\n"])) == "BZh9 is not a header\n"
+
+
+def test_decompression_stops_with_the_reader():
+    data = gzip.compress("".join(os.urandom(32).hex() + "\n" for _ in range(20_000)).encode())
+    handle = io.BytesIO(data)
+    next(iter_text(handle, chunk_size=1024))
+    assert handle.tell() < len(data) // 10
+
+
+def test_iter_files_joins_files_on_line_boundaries(tmp_path):
+    (tmp_path / "app.log.2.gz").write_bytes(gzip.compress(b"a\nb"))
+    (tmp_path / "app.log.1").write_text("")
+    (tmp_path / "app.log").write_text("c\nd")
+    paths = [tmp_path / "app.log.2.gz", tmp_path / "app.log.1", tmp_path / "app.log"]
+    chunks = list(iter_files(paths, chunk_size=1))
+    assert "".join(chunks) == "a\nb\nc\nd"
+    assert all(chunk.endswith("\n") for chunk in chunks[:-1])
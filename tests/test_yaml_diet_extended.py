@@ -1,12 +1,15 @@
 """
 Extended coverage for YamlDietStrategy: empty YAML, comment stripping,
-nested content, malformed YAML, and budget error.
+nested content, malformed YAML, budget error, the comment-free fast path,
+one-pass depth selection, breadth capping, the alias expansion ceiling,
+multi-document streams, and lexical comment stripping.
 """
 
 import pytest
+from ruamel.yaml import YAML
 
 from context_diet.interfaces import ContextBudgetExceededError
-from context_diet.strategies.yaml_diet import YamlDietStrategy
+from context_diet.strategies.yaml_diet import MIN_BREADTH_ENTRIES, YamlDietStrategy
 from context_diet.token_utils import default_token_heuristic
 
 
@@ -195,3 +198,304 @@ def test_yaml_list_within_budget(strategy):
     result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
     assert "items:" in result
     assert "one" in result
+
+
+# ---------------------------------------------------------------------------
+# Comment-free fast path (no round-trip load)
+# ---------------------------------------------------------------------------
+
+
+def test_comment_free_yaml_within_budget_returned_verbatim(strategy):
+    content = "\nserver:   {host: localhost,  port: 8080}\nitems: [a, b]\n"
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert result == content
+
+
+def test_comment_free_malformed_yaml_still_raises(strategy):
+    content = "key: [unclosed\n"
+    with pytest.raises(ContextBudgetExceededError, match="Malformed YAML"):
+        strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+
+
+def test_comment_free_custom_tags_pass_through(strategy):
+    """Tags such as CloudFormation's `!Ref` have no safe constructor but are valid YAML."""
+    content = "Resources:\n  Bucket:\n    Name: !Ref BucketName\n"
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert "!Ref BucketName" in result
+
+
+def test_pruned_yaml_preserves_source_key_order(strategy):
+    content = "zeta:\n  inner:\n    deep: 1\nalpha:\n  inner:\n    deep: 2\n"
+    result = strategy.compress(content, budget=8, token_counter=default_token_heuristic)
+    assert result.index("zeta") < result.index("alpha")
+
+
+# ---------------------------------------------------------------------------
+# One-pass depth selection
+# ---------------------------------------------------------------------------
+
+
+def test_depth_selection_keeps_deepest_level_that_fits(strategy):
+    content = "app:\n  db:\n    host: localhost\n    pool:\n      max: 20\n"
+    # The full document is 51 chars; masking below depth 3 costs 46
+    result = strategy.compress(content, budget=46, token_counter=len)
+    assert result == "app:\n  db:\n    host: '...'\n    pool: {}\n"
+
+
+def test_depth_selection_dumps_once_for_large_documents(strategy):
+    calls = []
+
+    def counting_heuristic(text):
+        calls.append(len(text))
+        return default_token_heuristic(text)
+
+    content = "".join(
+        f"svc{i}:\n  spec:\n    containers:\n      - name: app\n        image: img{i}\n"
+        for i in range(200)
+    )
+    result = strategy.compress(content, budget=400, token_counter=counting_heuristic)
+    assert default_token_heuristic(result) <= 400
+    # One count for the raw input, one for the single verified candidate dump
+    assert len(calls) == 2
+
+
+# ---------------------------------------------------------------------------
+# Breadth capping of long sequences and mappings
+# ---------------------------------------------------------------------------
+
+
+def _deployment(env_count):
+    env = "".join(f"    - name: VAR_{i}\n      value: v{i}\n" for i in range(env_count))
+    return "kind: Deployment\nspec:\n  image: nginx\n  env:\n" + env + "  replicas: 3\n"
+
+
+def test_long_sequence_is_capped_instead_of_collapsed(strategy):
+    result = strategy.compress(_deployment(5000), budget=300, token_counter=len)
+    assert len(result) <= 300
+
+    data = YAML(typ="safe").load(result)
+    assert data["kind"] == "Deployment"
+    assert data["spec"]["image"] == "nginx"
+    assert data["spec"]["replicas"] == 3
+    # Kept entries retain full depth; the marker reports how many were dropped
+    env = data["spec"]["env"]
+    kept = len(env) - 1
+    assert kept >= MIN_BREADTH_ENTRIES
+    assert env[0] == {"name": "VAR_0", "value": "v0"}
+    assert env[-1] == {"__context_diet_warning__": f"TRUNCATED ({5000 - kept} more entries)"}
+
+
+def test_long_mapping_is_capped_with_marker(strategy):
+    content = "".join(f"key{i}: value{i}\n" for i in range(100))
+    result = strategy.compress(content, budget=200, token_counter=len)
+    assert len(result) <= 200
+
+    lines = result.splitlines()
+    kept = len(lines) - 1
+    assert lines[:kept] == content.splitlines()[:kept]
+    assert lines[-1] == f"__context_diet_warning__: TRUNCATED ({100 - kept} more entries)"
+
+
+def test_breadth_search_dumps_once(strategy):
+    calls = []
+
+    def counting_len(text):
+        calls.append(len(text))
+        return len(text)
+
+    result = strategy.compress(_deployment(5000), budget=1000, token_counter=counting_len)
+    assert len(result) <= 1000
+    # One count for the raw input, one for the single verified candidate dump
+    assert len(calls) == 2
+
+
+# ---------------------------------------------------------------------------
+# Alias expansion ceiling ("billion laughs")
+# ---------------------------------------------------------------------------
+
+
+def _billion_laughs(levels=9):
+    lines = ['a0: &a0 "lol"']
+    for level in range(1, levels + 1):
+        refs = ", ".join([f"*a{level - 1}"] * 9)
+        lines.append(f"a{level}: &a{level} [{refs}]")
+    return "\n".join(lines) + "\n"
+
+
+def test_alias_bomb_raises_before_expanding(strategy):
+    with pytest.raises(ContextBudgetExceededError, match="aliases expand beyond"):
+        strategy.compress(_billion_laughs(), budget=50, token_counter=len)
+
+
+def test_alias_bomb_raises_even_when_source_fits(strategy):
+    content = _billion_laughs()
+    with pytest.raises(ContextBudgetExceededError, match="aliases expand beyond"):
+        strategy.compress(content, budget=100_000, token_counter=len)
+
+
+def test_alias_ceiling_is_configurable(strategy):
+    content = "base: &base {image: nginx, replicas: 2}\nweb: *base\nworker: *base\n"
+    assert strategy.compress(content, budget=100_000, token_counter=len) == content
+    with pytest.raises(ContextBudgetExceededError, match="aliases expand beyond"):
+        strategy.compress(content, budget=100_000, token_counter=len, max_alias_nodes=5)
+    with pytest.raises(ContextBudgetExceededError, match="aliases expand beyond"):
+        strategy.compress(content, budget=100_000, token_counter=len, max_alias_bytes=20)
+
+
+def test_pruned_output_keeps_aliases_shared(strategy):
+    content = (
+        "base: &base\n  env:\n"
+        + "".join(f"    - name: VAR_{i}\n      value: v{i}\n" for i in range(100))
+        + "".join(f"svc{i}: *base\n" for i in range(20))
+    )
+    result = strategy.compress(content, budget=600, token_counter=len)
+    assert len(result) <= 600
+    # The shared node is emitted once and referenced, not expanded into copies
+    assert result.count("env:") == 1
+    assert "svc0: *id" in result
+
+
+# ---------------------------------------------------------------------------
+# Multi-document streams (rendered Helm charts, Kubernetes bundles)
+# ---------------------------------------------------------------------------
+
+
+def _manifest(i):
+    return f"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: config-{i}\ndata:\n  key: value-{i}\n"
+
+
+def test_multi_document_stream_within_budget(strategy):
+    content = "---\n" + "---\n".join(_manifest(i) for i in range(3))
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert result == content
+
+
+def test_multi_document_stream_strips_comments_per_document(strategy):
+    content = (
+        "# Source: chart/a.yaml\n" + _manifest(0) + "---\n# Source: chart/b.yaml\n" + _manifest(1)
+    )
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert "Source:" not in result
+    assert "config-0" in result
+    assert "---\n" in result
+    assert "config-1" in result
+
+
+def test_multi_document_stream_truncates_with_tombstone(strategy):
+    content = "---\n".join(_manifest(i) for i in range(100))
+    result = strategy.compress(content, budget=100, token_counter=default_token_heuristic)
+    assert default_token_heuristic(result) <= 100
+    assert "config-0" in result
+    assert "config-99" not in result
+    assert result.endswith("__context_diet_warning__: TRUNCATED\n")
+
+
+def test_multi_document_stream_with_directives_after_an_end_marker(strategy):
+    content = "a: 1\n...\n%YAML 1.2\n---\nb: 2\n...\n# next\n%YAML 1.2\n---\nc: 3\n"
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert list(YAML(typ="safe").load_all(result)) == [{"a": 1}, {"b": 2}, {"c": 3}]
+    assert "next" not in result
+
+
+def test_multi_document_stream_that_fits_exactly_is_kept_whole(strategy):
+    content = "a: 1\n---\nb: 2\n---\nc: 3\n"
+    budget = default_token_heuristic(content)
+    assert strategy.compress(content, budget, default_token_heuristic) == content
+
+
+def test_multi_document_stream_flags_every_truncation(strategy):
+    content = "a: 1\n---\n" + _manifest(1) + "---\n" + _manifest(2)
+    tombstone = "__context_diet_warning__: TRUNCATED\n"
+    for budget in range(default_token_heuristic(tombstone), default_token_heuristic(content)):
+        result = strategy.compress(content, budget, default_token_heuristic)
+        assert default_token_heuristic(result) <= budget
+        assert result.endswith(tombstone)
+    # Too tight even to flag the truncation
+    with pytest.raises(ContextBudgetExceededError, match="exceeds budget"):
+        strategy.compress(content, default_token_heuristic(tombstone) - 1, default_token_heuristic)
+
+
+def test_multi_document_stream_keeps_a_first_document_that_fits_with_the_tombstone(strategy):
+    content = "a: 1\n---\n" + _manifest(1)
+    expected = "a: 1\n---\n__context_diet_warning__: TRUNCATED\n"
+    result = strategy.compress(content, default_token_heuristic(expected), default_token_heuristic)
+    assert result == expected
+
+
+def test_multi_document_stream_stops_parsing_after_budget(strategy):
+    """Documents past the budget are never parsed, so a malformed tail does not raise."""
+    content = "---\n".join(_manifest(i) for i in range(50)) + "---\nbroken: [unclosed\n"
+    result = strategy.compress(content, budget=100, token_counter=default_token_heuristic)
+    assert "TRUNCATED" in result
+
+
+def test_multi_document_stream_prunes_oversized_first_document(strategy):
+    nested = "root:\n" + "".join(f"  key{i}:\n    deep: value{i}\n" for i in range(30))
+    content = nested + "---\n" + _manifest(1)
+    result = strategy.compress(content, budget=60, token_counter=default_token_heuristic)
+    assert default_token_heuristic(result) <= 60
+    assert "root:" in result
+    assert "config-1" not in result
+
+
+def test_multi_document_stream_skips_empty_documents(strategy):
+    content = "---\n---\n" + _manifest(0) + "---\n# only a comment\n---\n" + _manifest(1)
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert "config-0" in result
+    assert "config-1" in result
+    assert "only a comment" not in result
+
+
+# ---------------------------------------------------------------------------
+# Lexical comment stripping — original formatting kept byte-for-byte
+# ---------------------------------------------------------------------------
+
+
+def test_comment_stripping_preserves_formatting(strategy):
+    content = (
+        "# header\n"
+        "server:   {host: localhost,  port: 8080}  # flow mapping\n"
+        "\n"
+        "tags: [a, b]\n"
+        "    # indented full-line comment\n"
+        "name: 'quoted'   # trailing\n"
+    )
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert result == "server:   {host: localhost,  port: 8080}\n\ntags: [a, b]\nname: 'quoted'\n"
+
+
+def test_comment_stripping_respects_quoted_scalars(strategy):
+    content = "a: 'not # a comment'\nb: \"also # not\" # real\nurl: http://host/#frag\n"
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert result == "a: 'not # a comment'\nb: \"also # not\"\nurl: http://host/#frag\n"
+
+
+def test_comment_stripping_respects_block_scalars(strategy):
+    content = (
+        "script: |\n"
+        "  echo start # literal text\n"
+        "\n"
+        "  # also literal\n"
+        "# real comment\n"
+        "items:\n"
+        "  - cmd: >-\n"
+        "      folded # literal\n"
+        "    retries: 3 # real\n"
+    )
+    result = strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)
+    assert result == (
+        "script: |\n"
+        "  echo start # literal text\n"
+        "\n"
+        "  # also literal\n"
+        "items:\n"
+        "  - cmd: >-\n"
+        "      folded # literal\n"
+        "    retries: 3\n"
+    )
+
+
+def test_commented_malformed_yaml_still_raises(strategy):
+    content = "# comment\nkey: [unclosed # trailing\n"
+    with pytest.raises(ContextBudgetExceededError, match="Malformed YAML"):
+        strategy.compress(content, budget=100_000, token_counter=default_token_heuristic)